@@ -0,0 +1,367 @@
+"""
+Streaming analytics over archived games.
+
+A record file (see records.py) is split into chunks of games by its index.
+Each chunk is read one game at a time in a worker process and reduced to an
+ArchiveStats of counters and sums only, so memory does not grow with the
+archive. The partial statistics are merged as workers send them back.
+
+Run from the command line, e.g.
+	python analytics.py games.hrc --workers 8
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, QUEEN_OF_SPADES_BIT, penalty
+from multiprocessing import Pool
+from records import RecordReader, RoundRecord, next_leader
+import argparse
+import os
+import time
+
+MAX_TRICKS = 17
+
+
+class GroupStats:
+	"""A class to represent the statistics of one seat or one strategy over many rounds.
+
+	Attributes
+	----------
+	rounds: int
+		number of rounds played
+	score_counts: list[int]
+		number of rounds ending with each round score, from 0 to 26
+	queen_captures: int
+		number of rounds in which the queen of spades was taken
+	moon_shots: int
+		number of rounds in which the moon was shot
+	passing_rounds: int
+		number of rounds in which cards were passed
+	points_passed: int
+		penalty points in the cards passed away
+	points_received: int
+		penalty points in the cards received
+	passing_score_sum: int
+		sum of the round scores of rounds with passing
+	holding_score_sum: int
+		sum of the round scores of rounds without passing
+
+	Methods
+	-------
+	add_round(self, score: int, took_queen: bool, shot_moon: bool, passing: bool, points_passed: int, points_received: int) -> None
+		Counts one round
+
+	merge(self, other: GroupStats) -> None
+		Adds the counts of another GroupStats
+
+	mean_score(self) -> float
+		Returns the average round score
+
+	score_percentile(self, fraction: float) -> int
+		Returns a percentile of the round scores
+
+	Methods defined here:
+	__init__(self) -> None
+		Constructs empty statistics.
+	"""
+	def __init__(self) -> None:
+		self.rounds = 0
+		self.score_counts = [0]*27
+		self.queen_captures = 0
+		self.moon_shots = 0
+		self.passing_rounds = 0
+		self.points_passed = 0
+		self.points_received = 0
+		self.passing_score_sum = 0
+		self.holding_score_sum = 0
+
+
+	def add_round(self, score: int, took_queen: bool, shot_moon: bool, passing: bool, points_passed: int, points_received: int) -> None:
+		"""Counts one round
+
+		Parameters
+		----------
+		score: int
+			the round score, after shooting the moon
+		took_queen: bool
+			True if the queen of spades was taken
+		shot_moon: bool
+			True if the moon was shot
+		passing: bool
+			True if cards were passed this round
+		points_passed: int
+			penalty points in the cards passed away
+		points_received: int
+			penalty points in the cards received
+
+		Return
+		------
+		None
+		"""
+		self.rounds += 1
+		self.score_counts[score] += 1
+		self.queen_captures += took_queen
+		self.moon_shots += shot_moon
+		if passing:
+			self.passing_rounds += 1
+			self.points_passed += points_passed
+			self.points_received += points_received
+			self.passing_score_sum += score
+		else:
+			self.holding_score_sum += score
+
+
+	def merge(self, other: GroupStats) -> None:
+		"""Adds the counts of another GroupStats"""
+		self.rounds += other.rounds
+		for score, count in enumerate(other.score_counts):
+			self.score_counts[score] += count
+		self.queen_captures += other.queen_captures
+		self.moon_shots += other.moon_shots
+		self.passing_rounds += other.passing_rounds
+		self.points_passed += other.points_passed
+		self.points_received += other.points_received
+		self.passing_score_sum += other.passing_score_sum
+		self.holding_score_sum += other.holding_score_sum
+
+
+	def mean_score(self) -> float:
+		"""Returns the average round score"""
+		return (self.passing_score_sum + self.holding_score_sum) / max(self.rounds, 1)
+
+
+	def score_percentile(self, fraction: float) -> int:
+		"""Returns the lowest round score reached or beaten by the given fraction of rounds"""
+		seen = 0
+		for score, count in enumerate(self.score_counts):
+			seen += count
+			if seen >= fraction*self.rounds:
+				return score
+		return 26
+
+
+
+class ArchiveStats:
+	"""A class to represent the merged statistics of archived games.
+
+	Attributes
+	----------
+	games: int
+		number of games merged so far
+	rounds: int
+		number of rounds merged so far
+	by_seat: dict[int, GroupStats]
+		statistics of each seat index
+	by_strategy: dict[str, GroupStats]
+		statistics of each strategy
+	hearts_broken: list[int]
+		number of rounds in which hearts were first played at each trick index, the last entry for never
+
+	Methods
+	-------
+	add_game(self, game_record: GameRecord) -> None
+		Counts every round of a game
+
+	add_round(self, seats: list[str], round_record: RoundRecord) -> None
+		Counts one round
+
+	merge(self, other: ArchiveStats) -> None
+		Merges the statistics of another part of the archive
+
+	report(self) -> str
+		Returns tables of the per-seat and per-strategy statistics
+
+	Methods defined here:
+	__init__(self) -> None
+		Constructs empty statistics.
+	"""
+	def __init__(self) -> None:
+		self.games = 0
+		self.rounds = 0
+		self.by_seat = {}
+		self.by_strategy = {}
+		self.hearts_broken = [0]*(MAX_TRICKS+1)
+
+
+	def add_game(self, game_record) -> None:
+		"""Counts every round of a game
+
+		Parameters
+		----------
+		game_record: GameRecord
+			the game, as read from a record file
+
+		Return
+		------
+		None
+		"""
+		self.games += 1
+		for round_record in game_record.rounds:
+			self.add_round(game_record.seats, round_record)
+
+
+	def add_round(self, seats: list[str], round_record: RoundRecord) -> None:
+		"""Counts one round
+
+		Parameters
+		----------
+		seats: list[str]
+			the strategy of each seat
+		round_record: RoundRecord
+			the round
+
+		Return
+		------
+		None
+		"""
+		num_of_player = len(seats)
+		self.rounds += 1
+
+		# who took the queen of spades and when hearts were first played
+		queen_idx = -1
+		broken_trick_idx = MAX_TRICKS
+		for trick_idx, (leader_idx, trick) in enumerate(round_record.tricks()):
+			trick_mask = 0
+			for bit in trick:
+				trick_mask |= bit
+			if trick_mask & HEARTS_MASK and broken_trick_idx == MAX_TRICKS:
+				broken_trick_idx = trick_idx
+			if trick_mask & QUEEN_OF_SPADES_BIT:
+				queen_idx = next_leader(leader_idx, trick, num_of_player)
+		self.hearts_broken[broken_trick_idx] += 1
+
+		passing = round_record.round_num % num_of_player != 0
+		moon_idx = round_record.scores.index(0) if round_record.scores.count(26) == num_of_player-1 else -1
+		for seat_idx, seat in enumerate(seats):
+			received = round_record.passes[(seat_idx-round_record.round_num) % num_of_player]
+			args = (round_record.scores[seat_idx], seat_idx == queen_idx, seat_idx == moon_idx, passing, penalty(round_record.passes[seat_idx]), penalty(received))
+			self.by_seat.setdefault(seat_idx, GroupStats()).add_round(*args)
+			self.by_strategy.setdefault(seat, GroupStats()).add_round(*args)
+
+
+	def merge(self, other: ArchiveStats) -> None:
+		"""Merges the statistics of another part of the archive
+
+		Parameters
+		----------
+		other: ArchiveStats
+			statistics of other games
+
+		Return
+		------
+		None
+		"""
+		self.games += other.games
+		self.rounds += other.rounds
+		for groups, other_groups in ((self.by_seat, other.by_seat), (self.by_strategy, other.by_strategy)):
+			for key, group in other_groups.items():
+				groups.setdefault(key, GroupStats()).merge(group)
+		for trick_idx, count in enumerate(other.hearts_broken):
+			self.hearts_broken[trick_idx] += count
+
+
+	def report(self) -> str:
+		"""Returns tables of the per-seat and per-strategy statistics"""
+		header = f"{'':<14}{'avg':>7}{'p50':>5}{'p95':>5}{'queen':>8}{'moon':>8}{'passed':>8}{'recv':>7}{'pass avg':>10}{'hold avg':>10}"
+		lines = [f"{self.games} games, {self.rounds} rounds", "", header]
+		groups = [(f"seat {seat_idx+1}", group) for seat_idx, group in sorted(self.by_seat.items())]
+		groups += [(strategy, group) for strategy, group in sorted(self.by_strategy.items())]
+		for label, group in groups:
+			rounds = max(group.rounds, 1)
+			passing_rounds = max(group.passing_rounds, 1)
+			holding_rounds = max(group.rounds - group.passing_rounds, 1)
+			lines.append(f"{label:<14}{group.mean_score():>7.2f}{group.score_percentile(0.5):>5}{group.score_percentile(0.95):>5}"
+				f"{group.queen_captures/rounds:>8.1%}{group.moon_shots/rounds:>8.2%}"
+				f"{group.points_passed/passing_rounds:>8.2f}{group.points_received/passing_rounds:>7.2f}"
+				f"{group.passing_score_sum/passing_rounds:>10.2f}{group.holding_score_sum/holding_rounds:>10.2f}")
+
+		broken = self.hearts_broken[:MAX_TRICKS]
+		broken_rounds = max(sum(broken), 1)
+		mean_trick = sum(trick_idx*count for trick_idx, count in enumerate(broken)) / broken_rounds
+		lines.append("")
+		lines.append(f"hearts first played on trick {mean_trick+1:.2f} on average, never in {self.hearts_broken[MAX_TRICKS]/max(self.rounds, 1):.1%} of rounds")
+		lines.append("by trick: " + " ".join(f"{trick_idx+1}:{count/max(self.rounds, 1):.1%}" for trick_idx, count in enumerate(broken) if count))
+		return "\n".join(lines)
+
+
+
+def analyze_chunk(path: str, start: int, stop: int) -> ArchiveStats:
+	"""Reduces a chunk of an archive to its statistics, reading one game at a time
+
+	Parameters
+	----------
+	path: str
+		the record file
+	start: int
+		index of the first game of the chunk
+	stop: int
+		index after the last game of the chunk
+
+	Return
+	------
+	ArchiveStats: the statistics of the chunk
+	"""
+	stats = ArchiveStats()
+	reader = RecordReader(path)
+	for game_record in reader.games(start, stop):
+		stats.add_game(game_record)
+	reader.close()
+	return stats
+
+
+def analyze_chunk_task(task: tuple) -> ArchiveStats:
+	"""Unpacks a (path, start, stop) task for analyze_chunk"""
+	return analyze_chunk(*task)
+
+
+def analyze_archive(path: str, workers: int = None, chunk_size: int = 500) -> ArchiveStats:
+	"""Computes the statistics of a whole archive across a pool of worker processes
+
+	Parameters
+	----------
+	path: str
+		the record file
+	workers: int
+		number of worker processes, every core when None, no pool when 1
+	chunk_size: int
+		number of games each worker reads per task
+
+	Return
+	------
+	ArchiveStats: the merged statistics
+	"""
+	if workers is None:
+		workers = os.cpu_count() or 1
+	reader = RecordReader(path)
+	num_of_games = reader.num_of_games()
+	reader.close()
+	tasks = [(path, start, min(start+chunk_size, num_of_games)) for start in range(0, num_of_games, chunk_size)]
+
+	stats = ArchiveStats()
+	if workers == 1:
+		for task in tasks:
+			stats.merge(analyze_chunk(*task))
+	else:
+		with Pool(workers) as pool:
+			for part in pool.imap_unordered(analyze_chunk_task, tasks):
+				stats.merge(part)
+	return stats
+
+
+def main() -> None:
+	"""Analyzes a record file from the command line and prints the report"""
+	parser = argparse.ArgumentParser(description="Compute statistics over archived games of Hearts.")
+	parser.add_argument("path", help="record file written by records.RecordWriter")
+	parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: every core)")
+	parser.add_argument("--chunk-size", type=int, default=500, help="games per worker task")
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	stats = analyze_archive(args.path, args.workers, args.chunk_size)
+	elapsed = time.perf_counter() - start
+	print(stats.report())
+	print(f"analyzed in {elapsed:.1f}s ({stats.games/elapsed:.0f} games/sec)")
+
+
+
+if __name__ == "__main__":
+	main()
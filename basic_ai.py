@@ -1,7 +1,8 @@
 from __future__ import annotations
 from cards import Card, Rank, Suit
+from observation import SeatObservation
 from player import Player
-from copy import copy
+from rules import is_first_trick, legal_moves
 
 
 class BasicAIPlayer(Player):
@@ -9,7 +10,7 @@ class BasicAIPlayer(Player):
 
 	Methods
 	-------
-	play_card(self, trick: list[Card], broken_hearts: bool) -> Card
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
 		returns the Card that will be played for the turn 
 
 	pass_cards(self) -> list[Card]
@@ -38,7 +39,7 @@ class BasicAIPlayer(Player):
 	highest_trick_card(self, trick: list[Card]) -> Card
 		returns the highest card in the trick with the same suit as the lead
 	"""
-	def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
 		"""Makes the decision for the card that the ai will choose to play
 
 		Parameters
@@ -47,20 +48,15 @@ class BasicAIPlayer(Player):
 			list of Cards in played order from trick
 		broken_hearts: bool
 			indicates whether Hearts have been broken before
+		observation: SeatObservation
+			the round seen from the player's seat, not needed to play the lowest legal card
 
 		Return
 		------
 		A Card that will be played
 		"""
-		valid_cards = []
-		
-		if self.check_all_hearts(self.hand) and broken_hearts==False:
-			valid_cards = copy(self.hand)
-		else:
-			for elem in self.hand:
-				if self.check_valid_play(elem, trick,broken_hearts)[0]:
-					valid_cards.append(elem)
-		final = min(valid_cards)
+		valid_cards = legal_moves(self.hand, trick, broken_hearts, is_first_trick(self.hand, trick))
+		final = valid_cards[0]
 		self.hand.remove(final)
 		return final
 	
@@ -0,0 +1,423 @@
+"""
+Lockstep batch engine, simulating many tables of Hearts at once with NumPy.
+
+Every table is a row of arrays: the hands are 52-bit masks (as in
+bitboard.py) in a (tables, players) uint64 matrix, and the trick, scores and
+hearts-broken flags are one entry per table. All tables deal, pass and play
+one card at a time together, so each step is a handful of array operations
+over every table instead of a Python loop per card.
+
+The policies of BasicAIPlayer and BetterAIPlayer are re-expressed on these
+arrays and play exactly the same cards.
+
+NumPy is optional for the rest of the game, and only needed here.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, POINTS_MASK, QUEEN_OF_SPADES_BIT, TWO_OF_CLUBS_BIT, cards_of, deck_mask
+import time
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+POLICIES = ("basic", "better")
+
+
+def require_numpy() -> None:
+	"""Raises ImportError with a helpful message if NumPy is not installed"""
+	if np is None:
+		raise ImportError("The batch engine needs NumPy, install it with 'pip install numpy'")
+
+
+def suit_tables() -> tuple:
+	"""Builds the lookup tables used on the 13-bit mask of one suit
+
+	Return
+	------
+	a tuple with the following types in order:
+		np.ndarray: the highest bit of every 13-bit mask, 0 for the empty mask
+		np.ndarray: the number of bits of every 13-bit mask
+	"""
+	highest = np.zeros(1 << 13, dtype=np.uint64)
+	for rank_idx in range(13):
+		highest[1 << rank_idx:1 << (rank_idx+1)] = 1 << rank_idx
+	counts = np.array([bin(mask).count("1") for mask in range(1 << 13)], dtype=np.int64)
+	return (highest, counts)
+
+
+
+class BatchResult:
+	"""A class to represent the outcome of a batch of headless games.
+
+	Attributes
+	----------
+	seats: list[str]
+		the policy of each seat
+	total_scores: np.ndarray
+		(tables, players) final total scores
+	winner_idx: np.ndarray
+		the winning seat of each table
+	round_count: np.ndarray
+		the number of rounds played at each table
+	moon_shots: np.ndarray
+		(tables, players) number of moon shots
+	tricks: int
+		number of tricks played over all tables
+
+	Methods defined here:
+	__init__(self, seats: list[str], total_scores, winner_idx, round_count, moon_shots, tricks: int) -> None
+		Constructs the attributes of a BatchResult object.
+	"""
+	def __init__(self, seats: list[str], total_scores, winner_idx, round_count, moon_shots, tricks: int) -> None:
+		"""Constructs all the necessary attributes for the BatchResult object.
+
+		Parameters
+		----------
+		seats: list[str]
+			the policy of each seat
+		total_scores: np.ndarray
+			(tables, players) final total scores
+		winner_idx: np.ndarray
+			the winning seat of each table
+		round_count: np.ndarray
+			the number of rounds played at each table
+		moon_shots: np.ndarray
+			(tables, players) number of moon shots
+		tricks: int
+			number of tricks played over all tables
+
+		Return
+		------
+		None
+		"""
+		self.seats = seats
+		self.total_scores = total_scores
+		self.winner_idx = winner_idx
+		self.round_count = round_count
+		self.moon_shots = moon_shots
+		self.tricks = tricks
+
+
+
+class BatchEngine:
+	"""A class to represent a batch of tables played in lockstep.
+
+	Attributes
+	----------
+	seats: list[str]
+		the policy of each seat, "basic" or "better"
+	num_of_tables: int
+		number of tables played at once
+	num_of_player: int
+		number of players at each table
+	hand_size: int
+		number of cards dealt to each player
+	rng: np.random.Generator
+		random number generator of the whole batch
+
+	Methods
+	-------
+	deal(self) -> np.ndarray
+		Deals a valid deal to every table
+
+	pass_cards(self, hands: np.ndarray, round_num: int) -> np.ndarray
+		Passes the three highest cards of every player
+
+	legal_masks(self, hand, lead_suit_mask, broken_hearts, first_trick) -> np.ndarray
+		Works out the legal cards of the players to move
+
+	choose_cards(self, seat_idx, legal, lead_suit_mask, winning_bit) -> np.ndarray
+		Applies the policy of each player to move
+
+	play_round(self, hands: np.ndarray) -> tuple
+		Plays a round at every table from the passed hands
+
+	play_games(self, target_score: int = 100) -> BatchResult
+		Plays a complete game at every table
+
+	Methods defined here:
+	__init__(self, seats: list[str], num_of_tables: int, seed: int = None) -> None
+		Constructs the tables and lookup tables.
+	"""
+	def __init__(self, seats: list[str], num_of_tables: int, seed: int = None) -> None:
+		"""Constructs all the necessary attributes for the BatchEngine object.
+
+		Parameters
+		----------
+		seats: list[str]
+			the policy of each seat, "basic" or "better"
+		num_of_tables: int
+			number of tables played at once
+		seed: int
+			seed of the batch, a fresh one when None
+
+		Return
+		------
+		None
+		"""
+		require_numpy()
+		if len(seats) < 3 or len(seats) > 5:
+			raise ValueError(f"Hearts needs 3 to 5 players, got {len(seats)}")
+		for seat in seats:
+			if seat not in POLICIES:
+				raise ValueError(f"Unknown policy '{seat}', choose from {', '.join(POLICIES)}")
+		self.seats = seats
+		self.num_of_tables = num_of_tables
+		self.num_of_player = len(seats)
+		self.rng = np.random.default_rng(seed)
+		self.deck = np.array([card.bit for card in cards_of(deck_mask(self.num_of_player))], dtype=np.uint64)
+		self.hand_size = len(self.deck) // self.num_of_player
+		self.better_seats = np.array([seat == "better" for seat in seats])
+		self.highest_in_suit, self.count_in_suit = suit_tables()
+		self.tables = np.arange(num_of_tables)
+
+
+	def highest_bit(self, mask: np.ndarray) -> np.ndarray:
+		"""Returns the highest bit of every mask, 0 for an empty mask"""
+		out = np.zeros_like(mask)
+		for offset in (0, 13, 26, 39):
+			suit_bits = self.highest_in_suit[((mask >> np.uint64(offset)) & np.uint64(0x1FFF)).astype(np.int64)]
+			out = np.where(suit_bits != 0, suit_bits << np.uint64(offset), out)
+		return out
+
+
+	def lowest_bit(self, mask: np.ndarray) -> np.ndarray:
+		"""Returns the lowest bit of every mask, 0 for an empty mask"""
+		return mask & (~mask + np.uint64(1))
+
+
+	def suit_mask_of(self, bit: np.ndarray) -> np.ndarray:
+		"""Returns the mask of the suit of every single-bit mask"""
+		out = np.zeros_like(bit)
+		for offset in (0, 13, 26, 39):
+			suit_mask = np.uint64(0x1FFF << offset)
+			out = np.where(bit & suit_mask, suit_mask, out)
+		return out
+
+
+	def penalty(self, mask: np.ndarray) -> np.ndarray:
+		"""Counts the penalty points of every mask, one per heart and 13 for the queen of spades"""
+		hearts = self.count_in_suit[((mask >> np.uint64(39)) & np.uint64(0x1FFF)).astype(np.int64)]
+		return hearts + np.where(mask & np.uint64(QUEEN_OF_SPADES_BIT), 13, 0)
+
+
+	def deal(self) -> np.ndarray:
+		"""Deals a valid deal to every table, redealing the tables where a player has no point card
+
+		Return
+		------
+		np.ndarray: (tables, players) hand masks
+		"""
+		hands = np.zeros((self.num_of_tables, self.num_of_player), dtype=np.uint64)
+		to_deal = self.tables
+		while len(to_deal):
+			order = np.argsort(self.rng.random((len(to_deal), len(self.deck))), axis=1)
+			cards = self.deck[order].reshape(len(to_deal), self.num_of_player, self.hand_size)
+			hands[to_deal] = np.bitwise_or.reduce(cards, axis=2)
+			to_deal = to_deal[((hands[to_deal] & np.uint64(POINTS_MASK)) == 0).any(axis=1)]
+		return hands
+
+
+	def pass_cards(self, hands: np.ndarray, round_num: int) -> np.ndarray:
+		"""Passes the three highest cards of every player, as both AI players do
+
+		Parameters
+		----------
+		hands: np.ndarray
+			(tables, players) hand masks
+		round_num: int
+			the current round count, player i passes to player (i+round_num) % players as in Hearts.pass_cards
+
+		Return
+		------
+		np.ndarray: the hand masks after passing
+		"""
+		passed = np.zeros_like(hands)
+		remaining = hands.copy()
+		for _ in range(3):
+			bit = self.highest_bit(remaining)
+			passed |= bit
+			remaining ^= bit
+		return remaining | np.roll(passed, round_num % self.num_of_player, axis=1)
+
+
+	def legal_masks(self, hand: np.ndarray, lead_suit_mask: np.ndarray, broken_hearts: np.ndarray, first_trick: bool) -> np.ndarray:
+		"""Works out the legal cards of the players to move, as rules.legal_mask does
+
+		Parameters
+		----------
+		hand: np.ndarray
+			hand mask of the player to move at each table
+		lead_suit_mask: np.ndarray
+			mask of the suit led at each table, 0 when leading
+		broken_hearts: np.ndarray
+			whether hearts have been broken at each table
+		first_trick: bool
+			whether this is the first trick of the round
+
+		Return
+		------
+		np.ndarray: mask of the legal cards at each table
+		"""
+		leading = lead_suit_mask == 0
+		# leading
+		non_hearts = hand & np.uint64(~HEARTS_MASK & ((1 << 64)-1))
+		lead = np.where(~broken_hearts & (non_hearts != 0), non_hearts, hand)
+		if first_trick:
+			lead = np.where(hand & np.uint64(TWO_OF_CLUBS_BIT), np.uint64(TWO_OF_CLUBS_BIT), lead)
+		# not leading
+		following = hand & lead_suit_mask
+		follow = np.where(following != 0, following, hand)
+		if first_trick:
+			no_points = hand & np.uint64(~POINTS_MASK & ((1 << 64)-1))
+			follow = np.where((following == 0) & (no_points != 0), no_points, follow)
+		return np.where(leading, lead, follow)
+
+
+	def choose_cards(self, seat_idx: np.ndarray, legal: np.ndarray, lead_suit_mask: np.ndarray, winning_bit: np.ndarray) -> np.ndarray:
+		"""Applies the policy of the player to move at every table
+
+		BasicAIPlayer always plays its lowest legal card. BetterAIPlayer leads
+		its lowest card, follows with its highest card below the winning card
+		(or its lowest card), and when void throws the queen of spades or else
+		its highest card.
+
+		Parameters
+		----------
+		seat_idx: np.ndarray
+			seat of the player to move at each table
+		legal: np.ndarray
+			mask of the legal cards at each table
+		lead_suit_mask: np.ndarray
+			mask of the suit led at each table, 0 when leading
+		winning_bit: np.ndarray
+			the card winning the trick so far at each table, 0 when leading
+
+		Return
+		------
+		np.ndarray: the bit of the card played at each table
+		"""
+		lowest = self.lowest_bit(legal)
+		below = self.highest_bit(legal & (winning_bit - np.uint64(1)) & lead_suit_mask)
+		following = np.where(below != 0, below, lowest)
+		queen = np.uint64(QUEEN_OF_SPADES_BIT)
+		void = np.where(legal & queen, queen, self.highest_bit(legal))
+		better = np.where(lead_suit_mask == 0, lowest, np.where(legal & lead_suit_mask, following, void))
+		return np.where(self.better_seats[seat_idx], better, lowest)
+
+
+	def play_round(self, hands: np.ndarray, leader_idx: np.ndarray = None) -> tuple:
+		"""Plays a round at every table from the hands after passing
+
+		Parameters
+		----------
+		hands: np.ndarray
+			(tables, players) hand masks, not modified
+		leader_idx: np.ndarray
+			the player holding the two of clubs at each table, found when None
+
+		Return
+		------
+		a tuple with the following types in order:
+			np.ndarray: (tables, players) round scores, after shooting the moon
+			np.ndarray: the seat that shot the moon at each table, -1 if nobody did
+		"""
+		tables = self.tables
+		num_of_player = self.num_of_player
+		hands = hands.copy()
+		if leader_idx is None:
+			leader_idx = np.argmax((hands & np.uint64(TWO_OF_CLUBS_BIT)) != 0, axis=1)
+		broken_hearts = np.zeros(self.num_of_tables, dtype=bool)
+		points = np.zeros((self.num_of_tables, num_of_player), dtype=np.int64)
+
+		for trick_idx in range(self.hand_size):
+			lead_suit_mask = np.zeros(self.num_of_tables, dtype=np.uint64)
+			winning_bit = np.zeros(self.num_of_tables, dtype=np.uint64)
+			winner_idx = leader_idx
+			trick_mask = np.zeros(self.num_of_tables, dtype=np.uint64)
+			for pos in range(num_of_player):
+				seat_idx = (leader_idx + pos) % num_of_player
+				hand = hands[tables, seat_idx]
+				legal = self.legal_masks(hand, lead_suit_mask, broken_hearts, trick_idx == 0)
+				bit = self.choose_cards(seat_idx, legal, lead_suit_mask, winning_bit)
+				hands[tables, seat_idx] = hand ^ bit
+				if pos == 0:
+					lead_suit_mask = self.suit_mask_of(bit)
+				wins = ((bit & lead_suit_mask) != 0) & (bit > winning_bit)
+				winning_bit = np.where(wins, bit, winning_bit)
+				winner_idx = np.where(wins, seat_idx, winner_idx)
+				trick_mask |= bit
+			points[tables, winner_idx] += self.penalty(trick_mask)
+			broken_hearts |= (trick_mask & np.uint64(HEARTS_MASK)) != 0
+			leader_idx = winner_idx
+
+		shooter = np.where((points == 26).any(axis=1), np.argmax(points == 26, axis=1), -1)
+		moon = shooter >= 0
+		points[moon] = 26
+		points[tables[moon], shooter[moon]] = 0
+		return (points, shooter)
+
+
+	def play_games(self, target_score: int = 100) -> BatchResult:
+		"""Plays a complete game at every table, ending each one as Hearts.game_end does
+
+		Parameters
+		----------
+		target_score: int
+			the score that ends each game
+
+		Return
+		------
+		BatchResult: the final scores and winner of every table
+		"""
+		total_scores = np.zeros((self.num_of_tables, self.num_of_player), dtype=np.int64)
+		moon_shots = np.zeros((self.num_of_tables, self.num_of_player), dtype=np.int64)
+		round_count = np.zeros(self.num_of_tables, dtype=np.int64)
+		active = np.ones(self.num_of_tables, dtype=bool)
+		tricks = 0
+		round_num = 1
+		while active.any():
+			hands = self.pass_cards(self.deal(), round_num)
+			round_scores, shooter = self.play_round(hands)
+			total_scores[active] += round_scores[active]
+			moon = active & (shooter >= 0)
+			moon_shots[self.tables[moon], shooter[moon]] += 1
+			round_count[active] = round_num
+			tricks += int(active.sum()) * self.hand_size
+
+			# a game ends once someone reaches the target and the lowest score is not tied
+			lowest = total_scores.min(axis=1)
+			game_end = (total_scores >= target_score).any(axis=1) & ((total_scores == lowest[:, None]).sum(axis=1) == 1)
+			active &= ~game_end
+			round_num += 1
+		return BatchResult(self.seats, total_scores, np.argmin(total_scores, axis=1), round_count, moon_shots, tricks)
+
+
+def measure_tricks_per_second(seats: list[str], num_of_tables: int, target_score: int = 100) -> float:
+	"""Measures how many tricks per second the batch engine plays
+
+	Parameters
+	----------
+	seats: list[str]
+		the policy of each seat
+	num_of_tables: int
+		number of tables played at once
+	target_score: int
+		the score that ends each game
+
+	Return
+	------
+	float: tricks played per second, over all tables
+	"""
+	start = time.perf_counter()
+	result = BatchEngine(seats, num_of_tables).play_games(target_score)
+	return result.tricks / (time.perf_counter() - start)
+
+
+
+if __name__ == "__main__":
+	for num_of_player in range(3, 6):
+		seats = ["basic", "better"] + ["better"]*(num_of_player-2)
+		print(f"{num_of_player} players: {measure_tricks_per_second(seats, 10000):,.0f} tricks/sec")
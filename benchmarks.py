@@ -0,0 +1,379 @@
+"""
+Benchmark suite for the rules and AI hot paths.
+
+Every benchmark builds its inputs from a fixed seed, so two runs time exactly
+the same work. Each one is timed for ops/sec and then run once more under
+tracemalloc for its memory use. The results are printed as JSON, and can be
+saved as a baseline and compared with later runs to flag regressions.
+
+Run from the command line, e.g.
+	python benchmarks.py --out baseline.json
+	python benchmarks.py --baseline baseline.json --threshold 0.15
+	python benchmarks.py --filter round
+"""
+
+from __future__ import annotations
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from bitboard import Hand, cards_of, deck_mask
+from deals import DealGenerator
+from engine import play_game
+from presenter import NullPresenter
+from round import Round
+from rules import is_first_trick, legal_moves
+from state import GameState
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+SEED = 2024
+PLAYER_COUNTS = (3, 4, 5)
+
+
+class PositionRecorder(BasicAIPlayer):
+	"""A class to represent a basic AI player that records every position it plays from.
+
+	Attributes
+	----------
+	positions: list[tuple[int, list, bool]]
+		(hand mask, trick, broken_hearts) before each card played, shared by the whole table
+
+	Methods defined here:
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
+		Records the position, then plays as BasicAIPlayer
+	"""
+	def __init__(self, name: str, positions: list) -> None:
+		super().__init__(name)
+		self.positions = positions
+
+	def play_card(self, trick: list, broken_hearts: bool, observation=None):
+		self.positions.append((self.hand.mask, trick[:], broken_hearts))
+		return super().play_card(trick, broken_hearts, observation)
+
+
+
+class TrickRecorder(NullPresenter):
+	"""A class to represent a headless presenter that records every complete trick.
+
+	Attributes
+	----------
+	tricks: list[tuple[int, list]]
+		(leader seat, trick) of every trick taken
+	players: list[Player]
+		the players seated at the table
+
+	Methods defined here:
+	card_played(self, player, card: Card, leading: bool) -> None
+		Adds the card to the current trick
+	trick_taken(self, player, penalty_sum: int) -> None
+		Stores the current trick
+	"""
+	def __init__(self, players: list) -> None:
+		self.players = players
+		self.tricks = []
+		self.trick = []
+		self.leader_idx = 0
+
+	def card_played(self, player, card, leading: bool) -> None:
+		if leading:
+			self.trick = []
+			self.leader_idx = self.players.index(player)
+		self.trick.append(card)
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		self.tricks.append((self.leader_idx, self.trick))
+
+
+def deck_cards(num_of_player: int) -> list:
+	"""Returns the deck for a number of players, as Hearts.generate_deck does"""
+	return cards_of(deck_mask(num_of_player))
+
+
+def sample_deals(num_of_player: int, num_of_deals: int) -> list[list[int]]:
+	"""Draws deals from the fixed seed"""
+	dealer = DealGenerator(deck_cards(num_of_player), num_of_player)
+	rng = random.Random(SEED + num_of_player)
+	return [dealer.deal(rng) for _ in range(num_of_deals)]
+
+
+def seat_players(hands: list[int]) -> list:
+	"""Seats a basic AI and better AIs and gives them the hands"""
+	players = [BasicAIPlayer("Player 1")] + [BetterAIPlayer(f"Player {num}") for num in range(2, len(hands)+1)]
+	for player, hand in zip(players, hands):
+		player.hand = Hand.from_mask(hand)
+	return players
+
+
+def sample_positions(num_of_rounds: int = 40) -> tuple[list, list]:
+	"""Plays rounds of 4 players from the fixed seed, recording every position and trick
+
+	Return
+	------
+	a tuple with the following types in order:
+		list[tuple[int, list, bool]]: (hand mask, trick, broken_hearts) before every card played
+		list[tuple[int, list]]: (leader seat, trick) of every trick
+	"""
+	positions = []
+	tricks = []
+	for hands in sample_deals(4, num_of_rounds):
+		players = [PositionRecorder(f"Player {num}", positions) for num in range(1, 5)]
+		for player, hand in zip(players, hands):
+			player.hand = Hand.from_mask(hand)
+		recorder = TrickRecorder(players)
+		Round(players, recorder)
+		tricks.extend(recorder.tricks)
+	return (positions, tricks)
+
+
+def bench_check_valid_play() -> tuple:
+	"""Player.check_valid_play on every card of every recorded hand"""
+	positions, _ = sample_positions()
+	calls = []
+	for hand, trick, broken_hearts in positions:
+		player = BasicAIPlayer("Player 1")
+		player.hand = Hand.from_mask(hand)
+		for card in player.hand:
+			calls.append((player.check_valid_play, card, trick, broken_hearts))
+
+	def run() -> None:
+		for check_valid_play, card, trick, broken_hearts in calls:
+			check_valid_play(card, trick, broken_hearts)
+	return (run, len(calls))
+
+
+def bench_basic_play_card() -> tuple:
+	"""BasicAIPlayer.play_card from every recorded position, including restoring the hand"""
+	positions, _ = sample_positions()
+	player = BasicAIPlayer("Player 1")
+
+	def run() -> None:
+		for hand, trick, broken_hearts in positions:
+			player.hand = Hand.from_mask(hand)
+			player.play_card(trick, broken_hearts)
+	return (run, len(positions))
+
+
+def bench_check_best_card() -> tuple:
+	"""BetterAIPlayer.check_best_card from every recorded position where a card was led"""
+	positions, _ = sample_positions()
+	player = BetterAIPlayer("Player 1")
+	calls = []
+	for hand, trick, broken_hearts in positions:
+		if trick:
+			hand = Hand.from_mask(hand)
+			calls.append((trick, legal_moves(hand, trick, broken_hearts, is_first_trick(hand, trick))))
+
+	def run() -> None:
+		for trick, valid_cards in calls:
+			# check_best_card removes cards from the list it is given
+			player.check_best_card(trick, valid_cards[:])
+	return (run, len(calls))
+
+
+def bench_trick_scoring() -> tuple:
+	"""Round.highest_player then Round.update_score on every recorded trick"""
+	_, tricks = sample_positions()
+	players = [BasicAIPlayer(f"Player {num}") for num in range(1, 5)]
+	# a Round that is not executed, only used for its trick scoring
+	round_obj = Round.__new__(Round)
+	round_obj.players = players
+
+	def run() -> None:
+		for leader_idx, trick in tricks:
+			round_obj.starting_player_idx = leader_idx
+			round_obj.update_score(round_obj.highest_player(players, trick), trick)
+	return (run, len(tricks))
+
+
+def bench_make_unmake() -> tuple:
+	"""GameState.make_move through whole rounds from fixed deals, then unmake_move back to the deal"""
+	states = []
+	for hands in sample_deals(4, 20):
+		state = GameState(hands)
+		moves = []
+		while not state.is_over():
+			legal = state.legal_mask()
+			moves.append(legal & -legal)
+			state.make_move(legal & -legal)
+		for _ in moves:
+			state.unmake_move()
+		states.append((state, moves))
+
+	def run() -> None:
+		for state, moves in states:
+			for bit in moves:
+				state.make_move(bit)
+			for _ in moves:
+				state.unmake_move()
+	return (run, sum(len(moves) for _, moves in states))
+
+
+def bench_round(num_of_player: int) -> tuple:
+	"""A complete Round from fixed deals, without passing"""
+	deals = sample_deals(num_of_player, 20)
+	presenter = NullPresenter()
+
+	def run() -> None:
+		for hands in deals:
+			Round(seat_players(hands), presenter)
+	return (run, len(deals))
+
+
+def bench_deal(num_of_player: int) -> tuple:
+	"""DealGenerator.deal, one valid deal per op"""
+	dealer = DealGenerator(deck_cards(num_of_player), num_of_player)
+	rng = random.Random(SEED)
+
+	def run() -> None:
+		rng.seed(SEED)
+		for _ in range(200):
+			dealer.deal(rng)
+	return (run, 200)
+
+
+def bench_game(num_of_player: int) -> tuple:
+	"""A complete headless game with engine.play_game"""
+	seats = [BasicAIPlayer] + [BetterAIPlayer]*(num_of_player-1)
+	seeds = [SEED + game_idx for game_idx in range(3)]
+
+	def run() -> None:
+		for seed in seeds:
+			play_game(seats, 100, seed)
+	return (run, len(seeds))
+
+
+def collect_benchmarks() -> dict:
+	"""Returns the setup function of every benchmark by name"""
+	benchmarks = {
+		"player.check_valid_play": bench_check_valid_play,
+		"basic_ai.play_card": bench_basic_play_card,
+		"better_ai.check_best_card": bench_check_best_card,
+		"round.highest_player+update_score": bench_trick_scoring,
+		"state.make_move+unmake_move": bench_make_unmake,
+	}
+	for num_of_player in PLAYER_COUNTS:
+		benchmarks[f"round.Round[{num_of_player}p]"] = lambda num_of_player=num_of_player: bench_round(num_of_player)
+		benchmarks[f"deals.deal[{num_of_player}p]"] = lambda num_of_player=num_of_player: bench_deal(num_of_player)
+		benchmarks[f"engine.play_game[{num_of_player}p]"] = lambda num_of_player=num_of_player: bench_game(num_of_player)
+	return benchmarks
+
+
+def measure(setup, min_time: float = 0.2, repeat: int = 3) -> dict:
+	"""Times a benchmark and measures its memory use
+
+	Parameters
+	----------
+	setup: Callable
+		returns (run, ops): a function doing the work, and how many ops one call of it does
+	min_time: float
+		minimum time of each timed repeat, in seconds
+	repeat: int
+		number of timed repeats, the best one is kept
+
+	Return
+	------
+	dict: ops_per_sec, plus peak_bytes and retained_blocks of one call under tracemalloc
+	"""
+	run, ops = setup()
+	run()
+	best = 0.0
+	for _ in range(repeat):
+		calls = 0
+		start = time.perf_counter()
+		while True:
+			run()
+			calls += 1
+			elapsed = time.perf_counter() - start
+			if elapsed >= min_time:
+				break
+		best = max(best, calls*ops / elapsed)
+
+	# CPython only counts live blocks, so report the peak during one call and what it left behind
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	run()
+	peak_bytes = tracemalloc.get_traced_memory()[1]
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+	return {"ops_per_sec": best, "ops_per_call": ops, "peak_bytes": peak_bytes, "retained_blocks": retained_blocks}
+
+
+def run_benchmarks(name_filter: str = "", min_time: float = 0.2, repeat: int = 3) -> dict:
+	"""Runs every benchmark whose name contains name_filter
+
+	Return
+	------
+	dict: the environment and the results of every benchmark, ready for JSON
+	"""
+	results = {}
+	for name, setup in collect_benchmarks().items():
+		if name_filter in name:
+			results[name] = measure(setup, min_time, repeat)
+	return {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED, "benchmarks": results}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+	"""Lists the benchmarks slower, or using more memory, than the baseline by more than threshold
+
+	Parameters
+	----------
+	results: dict
+		as returned by run_benchmarks
+	baseline: dict
+		an earlier output of run_benchmarks
+	threshold: float
+		allowed relative change, e.g. 0.15 for 15%
+
+	Return
+	------
+	list[str]: one message per regression
+	"""
+	regressions = []
+	for name, result in results["benchmarks"].items():
+		base = baseline["benchmarks"].get(name)
+		if base is None:
+			continue
+		if result["ops_per_sec"] < base["ops_per_sec"]*(1-threshold):
+			regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/sec, baseline {base['ops_per_sec']:.0f} ops/sec")
+		# a few hundred bytes of noise is usual, so small peaks get some slack
+		if result["peak_bytes"] > max(base["peak_bytes"]*(1+threshold), base["peak_bytes"]+4096):
+			regressions.append(f"{name}: peak {result['peak_bytes']} bytes, baseline {base['peak_bytes']} bytes")
+	return regressions
+
+
+def main(argv: list[str] = None) -> None:
+	"""Runs the benchmarks from the command line and prints the results as JSON"""
+	parser = argparse.ArgumentParser(description="Benchmark the rules and AI hot paths of Hearts.")
+	parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+	parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds of each timed repeat")
+	parser.add_argument("--repeat", type=int, default=3, help="timed repeats, the best one is kept")
+	parser.add_argument("--out", default=None, help="also write the results to this JSON file, e.g. to use as a baseline")
+	parser.add_argument("--baseline", default=None, help="JSON file of an earlier run to compare with")
+	parser.add_argument("--threshold", type=float, default=0.15, help="relative change flagged as a regression")
+	args = parser.parse_args(argv)
+
+	results = run_benchmarks(args.filter, args.min_time, args.repeat)
+	if args.baseline is not None:
+		with open(args.baseline) as file:
+			results["regressions"] = compare(results, json.load(file), args.threshold)
+	output = json.dumps(results, indent=2)
+	print(output)
+	if args.out is not None:
+		with open(args.out, "w") as file:
+			file.write(output + "\n")
+	if results.get("regressions"):
+		for message in results["regressions"]:
+			print(f"REGRESSION {message}", file=sys.stderr)
+		sys.exit(1)
+
+
+
+if __name__ == "__main__":
+	main()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from cards import Card, Rank, Suit
+from observation import SeatObservation
 from player import Player
-from copy import copy
+from rules import is_first_trick, legal_moves
 
 
 class BetterAIPlayer(Player):
@@ -9,7 +10,7 @@ class BetterAIPlayer(Player):
 
 	Methods
 	-------
-	play_card(self, trick: list[Card], broken_hearts: bool) -> Card
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
 		returns the Card that will be played for the turn 
 
 	pass_cards(self) -> list[Card]
@@ -38,19 +39,12 @@ class BetterAIPlayer(Player):
 	highest_trick_card(self, trick: list[Card]) -> Card
 		returns the highest card in the trick with the same suit as the lead
 	"""
-	def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
 		if len(self.hand)!=0:
-			valid_cards = []
-			
-			if self.check_all_hearts(self.hand) and broken_hearts==False:
-				valid_cards = copy(self.hand)
-			else:
-				for elem in self.hand:
-					if self.check_valid_play(elem, trick,broken_hearts)[0]:
-						valid_cards.append(elem)
+			valid_cards = legal_moves(self.hand, trick, broken_hearts, is_first_trick(self.hand, trick))
 						
 			if len(trick)==0:
-				final = min(valid_cards)
+				final = valid_cards[0]
 			else:
 				final = self.check_best_card(trick, valid_cards)
 			self.hand.remove(final)
@@ -86,18 +80,5 @@ class BetterAIPlayer(Player):
 	
 		
 if __name__ == "__main__":
-	player = BetterAIPlayer("Test Player 1")
-	player.hand = [Card(Rank.Four, Suit.Clubs), Card(Rank.Ace, Suit.Hearts), Card(Rank.King, Suit.Spades), Card(Rank.Ten, Suit.Spades)]
-	
-	trick, broken_hearts = [Card(Rank.Seven, Suit.Spades), Card(Rank.Eight, Suit.Spades)], False
-	print(player.check_valid_play(player.hand[0], trick, broken_hearts))
-	
-	
-	player = BetterAIPlayer("Test Player 1")
-	player.hand.append(Card(Rank.Four, Suit.Clubs))
-	player.hand.append(Card(Rank.Ace, Suit.Hearts))
-	player.hand.append(Card(Rank.King, Suit.Spades))
-	player.hand.append(Card(Rank.Ten, Suit.Spades))
-	
-	print(player.play_card(trick=[Card(Rank.Seven, Suit.Spades)], broken_hearts=False))
-	pass
\ No newline at end of file
+	from benchmarks import main
+	main(["--filter", "better_ai"])
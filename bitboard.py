@@ -0,0 +1,292 @@
+"""
+Bitboard representation of cards for the rules core.
+
+Every card owns one bit of a 52-bit integer. Bits are ordered exactly like
+Card.__lt__ (suit first, then rank), so the clubs occupy bits 0-12, the
+diamonds bits 13-25, the spades bits 26-38 and the hearts bits 39-51.
+"""
+
+from __future__ import annotations
+from cards import CARDS, Card, Rank, Suit
+
+SUIT_ORDER = [Suit.Clubs, Suit.Diamonds, Suit.Spades, Suit.Hearts]
+SUIT_OFFSET = {suit: 13*suit_idx for suit_idx, suit in enumerate(SUIT_ORDER)}
+RANK_OFFSET = {Rank(rank_val): rank_val-2 for rank_val in range(2,15)}
+
+INDEX_CARD = CARDS
+
+SUIT_MASKS = {suit: 0x1FFF << SUIT_OFFSET[suit] for suit in SUIT_ORDER}
+CLUBS_MASK = SUIT_MASKS[Suit.Clubs]
+DIAMONDS_MASK = SUIT_MASKS[Suit.Diamonds]
+SPADES_MASK = SUIT_MASKS[Suit.Spades]
+HEARTS_MASK = SUIT_MASKS[Suit.Hearts]
+FULL_DECK_MASK = (1 << 52) - 1
+
+TWO_OF_CLUBS_BIT = 1 << (SUIT_OFFSET[Suit.Clubs] + RANK_OFFSET[Rank.Two])
+QUEEN_OF_SPADES_BIT = 1 << (SUIT_OFFSET[Suit.Spades] + RANK_OFFSET[Rank.Queen])
+POINTS_MASK = HEARTS_MASK | QUEEN_OF_SPADES_BIT
+TWO_OF_DIAMONDS_BIT = 1 << (SUIT_OFFSET[Suit.Diamonds] + RANK_OFFSET[Rank.Two])
+TWO_OF_SPADES_BIT = 1 << (SUIT_OFFSET[Suit.Spades] + RANK_OFFSET[Rank.Two])
+
+# the mask of the suit of each bit index, to find the led suit from a bit alone
+INDEX_SUIT_MASK = [SUIT_MASKS[SUIT_ORDER[idx//13]] for idx in range(52)]
+
+
+def deck_mask(num_of_player: int) -> int:
+	"""Returns the mask of the deck used for a number of players
+
+	Parameters
+	----------
+	num_of_player: int
+		number of players
+
+	Return
+	------
+	int: every card, without the two of diamonds for 3 and 5 players and the two of spades for 5, as in Hearts.generate_deck
+	"""
+	mask = FULL_DECK_MASK
+	if num_of_player == 3 or num_of_player == 5:
+		mask &= ~TWO_OF_DIAMONDS_BIT
+	if num_of_player == 5:
+		mask &= ~TWO_OF_SPADES_BIT
+	return mask
+
+
+def card_index(card: Card) -> int:
+	"""Returns the bit index of a card
+
+	Parameters
+	----------
+	card: Card
+		card to look up
+
+	Return
+	------
+	int: the index of the card, from 0 (two of clubs) to 51 (ace of hearts)
+	"""
+	return card.index
+
+
+def card_bit(card: Card) -> int:
+	"""Returns the single-bit mask of a card
+
+	Parameters
+	----------
+	card: Card
+		card to look up
+
+	Return
+	------
+	int: a mask with only the bit of the card set
+	"""
+	return card.bit
+
+
+def mask_of(cards) -> int:
+	"""Returns the mask of a collection of cards
+
+	Parameters
+	----------
+	cards: Hand or list[Card]
+		the cards to convert, a Hand is returned as is
+
+	Return
+	------
+	int: a mask with the bit of every card set
+	"""
+	if isinstance(cards, Hand):
+		return cards.mask
+	mask = 0
+	for card in cards:
+		mask |= card.bit
+	return mask
+
+
+def cards_of(mask: int) -> list[Card]:
+	"""Returns the cards in a mask, lowest first
+
+	Parameters
+	----------
+	mask: int
+		mask of cards
+
+	Return
+	------
+	list[Card]: the cards in sorted order
+	"""
+	cards = []
+	while mask:
+		lowest_bit = mask & -mask
+		cards.append(INDEX_CARD[lowest_bit.bit_length()-1])
+		mask ^= lowest_bit
+	return cards
+
+
+def lowest_card(mask: int) -> Card:
+	"""Returns the lowest card in a non-empty mask"""
+	return INDEX_CARD[(mask & -mask).bit_length()-1]
+
+
+def highest_card(mask: int) -> Card:
+	"""Returns the highest card in a non-empty mask"""
+	return INDEX_CARD[mask.bit_length()-1]
+
+
+def penalty(mask: int) -> int:
+	"""Counts the penalty points in a mask of cards
+
+	Parameters
+	----------
+	mask: int
+		mask of cards, e.g. a trick or the cards a player has taken
+
+	Return
+	------
+	int: one point per heart plus 13 for the queen of spades
+	"""
+	points = (mask & HEARTS_MASK).bit_count()
+	if mask & QUEEN_OF_SPADES_BIT:
+		points += 13
+	return points
+
+
+def trick_winner(trick: list[Card]) -> int:
+	"""Finds which card of a trick takes it
+
+	Parameters
+	----------
+	trick: list[Card]
+		list of Cards in played order from trick
+
+	Return
+	------
+	int: the position in the trick of the highest card of the leading suit
+	"""
+	lead_mask = SUIT_MASKS[trick[0].suit]
+	trick_mask = 0
+	for card in trick:
+		trick_mask |= card.bit
+	return trick.index(INDEX_CARD[(trick_mask & lead_mask).bit_length()-1])
+
+
+
+class Hand:
+	"""A class to represent a hand of cards as a 52-bit mask.
+
+	It behaves like the sorted list[Card] a Player used to hold, so existing
+	code that appends, removes, indexes or iterates the hand keeps working.
+
+	Attributes
+	----------
+	mask: int
+		the bit of every card in the hand
+
+	Methods
+	-------
+	append(self, card: Card) -> None
+		Adds a card to the hand
+
+	extend(self, cards) -> None
+		Adds several cards to the hand
+
+	remove(self, card: Card) -> None
+		Removes a card from the hand
+
+	sort(self) -> None
+		Does nothing, a Hand is always sorted
+
+	from_mask(mask: int) -> Hand
+		Returns a Hand holding the cards of a mask
+
+	suit_mask(self, suit: Suit) -> int
+		Returns the sub-mask of the hand for one suit
+
+	Methods defined here:
+	__init__(self, cards=()) -> None
+		Constructs the mask of a Hand object.
+	"""
+	__slots__ = ("mask",)
+
+	def __init__(self, cards=()) -> None:
+		"""Constructs the mask for the Hand object.
+
+		Parameters
+		----------
+		cards: list[Card]
+			cards initially in the hand
+
+		Return
+		------
+		None
+		"""
+		self.mask = mask_of(cards)
+
+
+	def __repr__(self) -> str:
+		"""Return the hand the same way a list of cards is shown"""
+		return repr(cards_of(self.mask))
+
+
+	def __len__(self) -> int:
+		return self.mask.bit_count()
+
+
+	def __iter__(self):
+		return iter(cards_of(self.mask))
+
+
+	def __getitem__(self, idx):
+		return cards_of(self.mask)[idx]
+
+
+	def __contains__(self, card: Card) -> bool:
+		return bool(self.mask & card.bit)
+
+
+	def __eq__(self, other) -> bool:
+		"""Return True if both hold the same cards"""
+		if isinstance(other, (Hand, list)):
+			return self.mask == mask_of(other)
+		return NotImplemented
+
+	__hash__ = None
+
+
+	@staticmethod
+	def from_mask(mask: int) -> Hand:
+		"""Returns a Hand holding the cards of a mask"""
+		new_hand = Hand()
+		new_hand.mask = mask
+		return new_hand
+
+
+	def __copy__(self) -> Hand:
+		return Hand.from_mask(self.mask)
+
+
+	def append(self, card: Card) -> None:
+		"""Adds a card to the hand"""
+		self.mask |= card.bit
+
+
+	def extend(self, cards) -> None:
+		"""Adds several cards to the hand"""
+		self.mask |= mask_of(cards)
+
+
+	def remove(self, card: Card) -> None:
+		"""Removes a card from the hand, raises ValueError if it is not there"""
+		bit = card.bit
+		if not self.mask & bit:
+			raise ValueError(f"{card!r} is not in hand")
+		self.mask ^= bit
+
+
+	def sort(self) -> None:
+		"""Does nothing, the cards of a Hand are always in sorted order"""
+		pass
+
+
+	def suit_mask(self, suit: Suit) -> int:
+		"""Returns the sub-mask of the hand holding only cards of the given suit"""
+		return self.mask & SUIT_MASKS[suit]
@@ -0,0 +1,207 @@
+"""
+Offline generator of the endgame tablebase.
+
+Every canonical position of the last few tricks is enumerated from one
+representative deal: the number of live cards of each suit, which seat holds
+each of them from the lowest up, and where the queen of spades is. Each
+position is solved with the double-dummy solver for every seat and every
+state of the points already taken, on a process pool, and the results are
+written with Tablebase.write.
+
+Run from the command line, e.g.
+	python build_tablebase.py --tricks 2 --players 3 4
+"""
+
+from __future__ import annotations
+from bitboard import CLUBS_MASK, DIAMONDS_MASK, HEARTS_MASK, QUEEN_OF_SPADES_BIT, SPADES_MASK
+from multiprocessing import Pool
+from solver import DoubleDummySolver
+from tablebase import DEFAULT_PATH, NO_SCORE, Tablebase, canonical_key, score_slot
+import argparse
+import os
+import time
+
+
+def owner_sequences(counts: list[int], length: int) -> list[tuple]:
+	"""Lists every sequence of seats in which seat i appears counts[i] times
+
+	Parameters
+	----------
+	counts: list[int]
+		how many times each seat appears, not modified
+	length: int
+		length of the sequences, the sum of counts
+
+	Return
+	------
+	list[tuple]: the distinct sequences
+	"""
+	if length == 0:
+		return [()]
+	out = []
+	for seat_idx, count in enumerate(counts):
+		if count:
+			counts[seat_idx] -= 1
+			for rest in owner_sequences(counts, length-1):
+				out.append((seat_idx,) + rest)
+			counts[seat_idx] += 1
+	return out
+
+
+def suit_sizes(total: int) -> list[tuple[int,int,int,int]]:
+	"""Lists every split of the live cards into (clubs, diamonds, spades, hearts) with no more clubs than diamonds"""
+	out = []
+	for clubs in range(min(total, 13)+1):
+		for diamonds in range(clubs, min(total-clubs, 13)+1):
+			for spades in range(min(total-clubs-diamonds, 13)+1):
+				hearts = total-clubs-diamonds-spades
+				if hearts <= 13:
+					out.append((clubs, diamonds, spades, hearts))
+	return out
+
+
+def suit_bits(suit_mask: int, size: int, queen_pos: int) -> list[int]:
+	"""Picks representative cards of a suit, lowest first
+
+	Parameters
+	----------
+	suit_mask: int
+		mask of the suit
+	size: int
+		number of live cards in the suit
+	queen_pos: int
+		for spades, position of the queen among the live spades, -1 if it is not live
+
+	Return
+	------
+	list[int]: the bits of the cards, from the lowest
+	"""
+	ranks = [(suit_mask & -suit_mask) << rank_idx for rank_idx in range(13)]
+	if suit_mask != SPADES_MASK:
+		return ranks[:size]
+	others = [bit for bit in ranks if bit != QUEEN_OF_SPADES_BIT]
+	if queen_pos == -1:
+		return others[:size]
+	# the spades above the queen are the king and the ace
+	above = size-1-queen_pos
+	return others[:queen_pos] + [QUEEN_OF_SPADES_BIT] + others[len(others)-above:]
+
+
+def solve_position(solver: DoubleDummySolver, hands: list[int], broken_hearts: bool) -> bytes:
+	"""Solves a position led by seat 0 for every seat and every state of the points taken
+
+	Parameters
+	----------
+	solver: DoubleDummySolver
+		the solver of this process
+	hands: list[int]
+		hand mask of every seat, the leader first
+	broken_hearts: bool
+		indicates whether Hearts have been broken
+
+	Return
+	------
+	bytes: the scores of the record, laid out by score_slot
+	"""
+	num_of_player = len(hands)
+	live = 0
+	for hand in hands:
+		live |= hand
+	taken = 26 - (live & HEARTS_MASK).bit_count() - (13 if live & QUEEN_OF_SPADES_BIT else 0)
+	scores = bytearray([NO_SCORE]*(num_of_player*(num_of_player+1)))
+	for seat_idx in range(num_of_player):
+		if taken == 0:
+			break
+		for moon_idx in range(num_of_player):
+			points = [0]*num_of_player
+			points[moon_idx] = taken
+			scores[score_slot(num_of_player, seat_idx, moon_idx)] = solver.solve(hands, 0, [], points, broken_hearts, False, seat_idx)[0]
+		if taken >= 2:
+			# split between two other seats, so the seat has no points and gets only what it still takes
+			others = [other_idx for other_idx in range(num_of_player) if other_idx != seat_idx]
+			points = [0]*num_of_player
+			points[others[0]] = 1
+			points[others[1]] = taken-1
+			scores[score_slot(num_of_player, seat_idx, num_of_player)] = solver.solve(hands, 0, [], points, broken_hearts, False, seat_idx)[0]
+	return bytes(scores)
+
+
+def solve_sizes(task: tuple) -> dict[int, bytes]:
+	"""Solves every position with the given number of live cards in each suit
+
+	Parameters
+	----------
+	task: tuple
+		(num_of_player, num_of_tricks, sizes), sizes as returned by suit_sizes
+
+	Return
+	------
+	dict[int, bytes]: the scores of every canonical key
+	"""
+	num_of_player, num_of_tricks, sizes = task
+	solver = DoubleDummySolver(14, use_tablebase=False)
+	records = {}
+	queen_positions = ([-1] if sizes[2] <= 12 else []) + [queen_pos for queen_pos in range(sizes[2]) if sizes[2]-1-queen_pos <= 2 and queen_pos <= 10]
+	for queen_pos in queen_positions:
+		bits = suit_bits(CLUBS_MASK, sizes[0], -1) + suit_bits(DIAMONDS_MASK, sizes[1], -1) + suit_bits(SPADES_MASK, sizes[2], queen_pos) + suit_bits(HEARTS_MASK, sizes[3], -1)
+		for owners in owner_sequences([num_of_tricks]*num_of_player, num_of_player*num_of_tricks):
+			hands = [0]*num_of_player
+			for bit, seat_idx in zip(bits, owners):
+				hands[seat_idx] |= bit
+			for broken_hearts in ((True,) if sizes[3] == 0 else (False, True)):
+				key = canonical_key(hands, 0, broken_hearts)
+				if key not in records:
+					records[key] = solve_position(solver, hands, broken_hearts)
+	return records
+
+
+def build_tablebase(path: str, num_of_tricks: int, player_counts: list[int], workers: int = None) -> dict[int, int]:
+	"""Solves every canonical endgame and writes the tablebase
+
+	Parameters
+	----------
+	path: str
+		file to write
+	num_of_tricks: int
+		number of last tricks to solve
+	player_counts: list[int]
+		numbers of players to solve for
+	workers: int
+		number of worker processes, every core when None
+
+	Return
+	------
+	dict[int, int]: the number of positions stored for each number of players
+	"""
+	sections = {}
+	with Pool(workers or os.cpu_count() or 1) as pool:
+		for num_of_player in player_counts:
+			records = {}
+			for tricks_left in range(1, num_of_tricks+1):
+				tasks = [(num_of_player, tricks_left, sizes) for sizes in suit_sizes(num_of_player*tricks_left)]
+				for part in pool.imap_unordered(solve_sizes, tasks):
+					records.update(part)
+			sections[num_of_player] = (num_of_tricks, records)
+	Tablebase.write(path, sections)
+	return {num_of_player: len(records) for num_of_player, (_, records) in sections.items()}
+
+
+def main() -> None:
+	"""Builds a tablebase from the command line"""
+	parser = argparse.ArgumentParser(description="Solve every endgame of the last tricks of a round of Hearts.")
+	parser.add_argument("--tricks", type=int, default=1, help="number of last tricks to solve")
+	parser.add_argument("--players", type=int, nargs="+", default=[3, 4, 5], choices=[3, 4, 5], help="numbers of players")
+	parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: every core)")
+	parser.add_argument("--out", default=DEFAULT_PATH, help="tablebase file to write")
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	counts = build_tablebase(args.out, args.tricks, args.players, args.workers)
+	for num_of_player, count in counts.items():
+		print(f"{num_of_player} players: {count} positions")
+	print(f"written to {args.out} ({os.path.getsize(args.out)} bytes) in {time.perf_counter()-start:.1f}s")
+
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,226 @@
+"""
+Rank-equivalence canonicalization of positions.
+
+Once cards have been played, only the order of the cards still in play
+matters within a suit: a seven and a nine with the eight gone play the same.
+Canonicalizing relabels the live cards of every suit to the lowest ranks,
+in order, so that every position differing only in the ranks of the played
+cards becomes the same representative. Results found for the representative,
+by a solver, a tablebase or a decision cache, then hold for all of them.
+
+Points limit what can be merged, as scored by Round.update_score: hearts
+stay hearts, each worth one point, and the queen of spades keeps its rank,
+with the live spades below it kept below and those above kept above. No
+other spade is ever moved onto the queen's rank.
+
+The two of clubs has rules of its own during the first trick, so while they
+apply only the real two of clubs is ever labelled as one. After the first
+trick clubs and diamonds play the same, so they can be swapped into a
+canonical order instead.
+
+The relabeling is returned as a card map, so moves found on the
+representative are mapped back to the real cards with unmap_bit.
+"""
+
+from __future__ import annotations
+from bitboard import SUIT_OFFSET, SUIT_ORDER
+from cards import Suit
+from functools import lru_cache
+
+QUEEN_RANK_IDX = 10
+SPADES_OFFSET = SUIT_OFFSET[Suit.Spades]
+CLUBS_OFFSET = SUIT_OFFSET[Suit.Clubs]
+DIAMONDS_OFFSET = SUIT_OFFSET[Suit.Diamonds]
+SUIT_OFFSETS = [SUIT_OFFSET[suit] for suit in SUIT_ORDER]
+
+
+@lru_cache(maxsize=None)
+def suit_map(offset: int, suit_live: int, keep_two_of_clubs: bool) -> tuple[tuple[int, ...], int]:
+	"""Works out where the live cards of one suit go
+
+	Parameters
+	----------
+	offset: int
+		index of the suit's two
+	suit_live: int
+		mask of the suit's cards still in play, shifted down to the two
+	keep_two_of_clubs: bool
+		only label the two of clubs itself as the two of clubs, the other clubs starting from the three
+
+	Return
+	------
+	a tuple with the following types in order:
+		tuple[int, ...]: for each rank of the suit, the index of its canonical card, -1 for cards not in play
+		int: the canonical mask of the suit's live cards
+	"""
+	segment = [-1]*13
+	if offset == SPADES_OFFSET:
+		# below the queen from the two up, above it from the king up, the queen itself unmoved
+		low = offset
+		high = offset + QUEEN_RANK_IDX + 1
+		for rank_idx in range(13):
+			if not suit_live >> rank_idx & 1:
+				continue
+			if rank_idx < QUEEN_RANK_IDX:
+				segment[rank_idx] = low
+				low += 1
+			elif rank_idx == QUEEN_RANK_IDX:
+				segment[rank_idx] = offset + rank_idx
+			else:
+				segment[rank_idx] = high
+				high += 1
+	else:
+		target = offset + 1 if offset == CLUBS_OFFSET and keep_two_of_clubs and not suit_live & 1 else offset
+		for rank_idx in range(13):
+			if suit_live >> rank_idx & 1:
+				segment[rank_idx] = target
+				target += 1
+	mask = 0
+	for target in segment:
+		if target >= 0:
+			mask |= 1 << target
+	return (tuple(segment), mask)
+
+
+def rank_map(live: int, keep_two_of_clubs: bool) -> list[int]:
+	"""Works out where every live card goes
+
+	Parameters
+	----------
+	live: int
+		mask of every card still in play
+	keep_two_of_clubs: bool
+		only label the two of clubs itself as the two of clubs, the other clubs starting from the three
+
+	Return
+	------
+	list[int]: for each card index, the index of its canonical card, -1 for cards not in play
+	"""
+	card_map = []
+	for offset in SUIT_OFFSETS:
+		card_map += suit_map(offset, (live >> offset) & 0x1FFF, keep_two_of_clubs)[0]
+	return card_map
+
+
+def map_mask(mask: int, card_map: list[int]) -> int:
+	"""Returns the canonical mask of a mask of live cards"""
+	out = 0
+	while mask:
+		bit = mask & -mask
+		mask ^= bit
+		out |= 1 << card_map[bit.bit_length()-1]
+	return out
+
+
+def unmap_bit(bit: int, card_map: list[int]) -> int:
+	"""Returns the real card of a canonical card, the inverse of the card map"""
+	return 1 << card_map.index(bit.bit_length()-1)
+
+
+def swap_minor_suits(card_map: list[int]) -> None:
+	"""Swaps the canonical clubs and diamonds of a card map in place"""
+	for idx, target in enumerate(card_map):
+		if CLUBS_OFFSET <= target < CLUBS_OFFSET+13:
+			card_map[idx] = target - CLUBS_OFFSET + DIAMONDS_OFFSET
+		elif DIAMONDS_OFFSET <= target < DIAMONDS_OFFSET+13:
+			card_map[idx] = target - DIAMONDS_OFFSET + CLUBS_OFFSET
+
+
+def suit_signature(masks: list[int], offset: int) -> list[int]:
+	"""Lists which mask holds each card of a suit, from the lowest"""
+	owners = []
+	for rank_idx in range(13):
+		bit = 1 << (offset + rank_idx)
+		for mask_idx, mask in enumerate(masks):
+			if mask & bit:
+				owners.append(mask_idx)
+				break
+	return owners
+
+
+def canonical_masks(masks: list[int], first_trick: bool) -> tuple[list[int], list[int]]:
+	"""Canonicalizes disjoint sets of live cards together, e.g. every hand and every card of the trick
+
+	Parameters
+	----------
+	masks: list[int]
+		disjoint masks whose union is every card still in play
+	first_trick: bool
+		True while the rules of the first trick apply, False to also put clubs and diamonds in a canonical order
+
+	Return
+	------
+	a tuple with the following types in order:
+		list[int]: the canonical mask of each of the masks
+		list[int]: the card map, for each card index the index of its canonical card, -1 if not in play
+	"""
+	live = 0
+	for mask in masks:
+		live |= mask
+	card_map = rank_map(live, first_trick)
+	out = [map_mask(mask, card_map) for mask in masks]
+	if not first_trick and suit_signature(out, DIAMONDS_OFFSET) < suit_signature(out, CLUBS_OFFSET):
+		swap_minor_suits(card_map)
+		out = [map_mask(mask, card_map) for mask in masks]
+	return (out, card_map)
+
+
+def canonical_position(hands: list[int], trick: list[int], first_trick: bool) -> tuple[list[int], list[int], list[int]]:
+	"""Canonicalizes a position where every hand is known
+
+	Parameters
+	----------
+	hands: list[int]
+		hand mask of every seat
+	trick: list[int]
+		bits already played to the current trick, in played order
+	first_trick: bool
+		indicates whether the current trick is the first of the round
+
+	Return
+	------
+	a tuple with the following types in order:
+		list[int]: the canonical hand of every seat
+		list[int]: the canonical bits of the trick, in played order
+		list[int]: the card map, see canonical_masks
+	"""
+	out, card_map = canonical_masks(list(hands) + list(trick), first_trick)
+	return (out[:len(hands)], out[len(hands):], card_map)
+
+
+def canonical_view(hand_mask: int, trick: list[int]) -> tuple[int, list[int], list[int]]:
+	"""Canonicalizes what a player sees: its hand and the trick, taking every other card as played
+
+	Only valid for players that decide from the order of these cards
+	alone, such as BasicAIPlayer and BetterAIPlayer. Suits are never
+	swapped, since those players prefer one suit to another, and the two of
+	clubs is kept, since the player works out the first trick from it.
+
+	Parameters
+	----------
+	hand_mask: int
+		mask of the cards in the player's hand
+	trick: list[int]
+		bits already played to the current trick, in played order
+
+	Return
+	------
+	a tuple with the following types in order:
+		int: the canonical hand
+		list[int]: the canonical bits of the trick, in played order
+		list[int]: the card map, see canonical_masks
+	"""
+	live = hand_mask
+	for bit in trick:
+		live |= bit
+	card_map = []
+	canonical_live = 0
+	for offset in SUIT_OFFSETS:
+		segment, mask = suit_map(offset, (live >> offset) & 0x1FFF, True)
+		card_map += segment
+		canonical_live |= mask
+	canonical_trick = [1 << card_map[bit.bit_length()-1] for bit in trick]
+	# the hand is every live card but the trick
+	for bit in canonical_trick:
+		canonical_live ^= bit
+	return (canonical_live, canonical_trick, card_map)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations # for type hints of a class in itself
 from enum import Enum
+from functools import lru_cache
 
 
 class Rank(Enum):
@@ -92,6 +93,10 @@ class Suit(Enum):
 			
 class Card:
 	"""A class to represent a card.
+
+	Cards are interned flyweights: there is exactly one Card object for every
+	rank and suit, so Card(rank, suit) always returns the shared instance and
+	two cards are equal only if they are the same object.
 	
 	Attributes
 	----------
@@ -99,6 +104,10 @@ class Card:
 		the rank of the card
 	suit : Suit
 		the suit of the card
+	index : int
+		the position of the card in sorted order, from 0 (two of clubs) to 51 (ace of hearts)
+	bit : int
+		the single-bit mask of the card, 1 << index
 
 	Methods
 	-------
@@ -106,8 +115,8 @@ class Card:
 		a tuple of the list that makes up the card art and the complete string card art
 
 	Methods defined here:
-	__init__(self, rank: Rank, suit: Suit) -> None
-		Constructs the rank and suit attribute of an Card object.
+	__new__(cls, rank: Rank, suit: Suit) -> Card
+		Returns the shared Card object for the rank and suit.
 
 	__repr__(self) -> str
 		Return a string representation of the Card object.
@@ -115,14 +124,16 @@ class Card:
 	__str__(self) -> str:
 		Return the art for the Card object.
 
-	__eq__(self, other: Card) -> bool:
-		Return True if the card is equal to another
+	__hash__(self) -> int:
+		Return the precomputed index of the card
 
 	__lt__(self, other: Card) -> bool:
 		Checks if the Card object is lower than another Card object by comparing its suit and rank.
 	"""
-	def __init__(self, rank: Rank, suit: Suit) -> None:
-		"""Constructs all the necessary attributes for the Card object.
+	__slots__ = ("rank", "suit", "index", "bit")
+	
+	def __new__(cls, rank: Rank, suit: Suit) -> Card:
+		"""Returns the shared Card object for the rank and suit.
 		
 		Parameters
 		----------
@@ -133,10 +144,14 @@ class Card:
 		
 		Return
 		------
-		None
+		Card: the interned card
 		"""
-		self.rank = rank
-		self.suit = suit
+		return INTERNED_CARDS[rank][suit]
+		
+		
+	def __reduce__(self):
+		"""Pickles and copies a card as a lookup of the interned instance"""
+		return (Card, (self.rank, self.suit))
 		
 		
 	def __repr__(self) -> str:
@@ -149,12 +164,9 @@ class Card:
 		return self.get_card_art()[1]
 	
 	
-	def __eq__(self, other: Card) -> bool:
-		"""Return True if the card are equal"""
-		if (self.suit is other.suit) and (self.rank is other.rank) :
-			return True
-		else:
-			return False
+	def __hash__(self) -> int:
+		"""Return the precomputed index of the card"""
+		return self.index
 		
 		
 	def __lt__(self, other: Card) -> bool:
@@ -174,17 +186,21 @@ class Card:
 			if it is not lower
 		"""
 		if self.__class__ is other.__class__:
-			if self.suit < other.suit:
-				return True
-			elif self.suit is other.suit:
-				return self.rank < other.rank
-			else:
-				return False
+			return self.index < other.index
 		else:
 			raise NotImplementedError
 			
+			
+	def __gt__(self, other: Card) -> bool:
+		"""Compares and checks if the the Card object is higher than the other Card object."""
+		if self.__class__ is other.__class__:
+			return self.index > other.index
+		else:
+			raise NotImplementedError
+			
+			
 	def get_card_art(self) -> tuple[list,str]:
-		"""Constructs the card art for any card given
+		"""Returns the card art for any card given, drawn once when the module is loaded
 
 		Parameters
 		----------
@@ -196,21 +212,138 @@ class Card:
 			list: a list of the string for card art
 			str: a complete string representation of the card
 		"""
-		suit_art = ["♣","♦","♠","♥"]
-		rank_art = ["2","3","4","5","6","7","8","9","10","J","Q","K","A"]
-		
-		rank_art_idx = self.rank.value - 2
-		suit_art_idx = self.suit.value - 1
-		
-		if self.rank.value == 10:
-			art_list = ["┌─────┐", f"│{rank_art[rank_art_idx]}   │",f"│  {suit_art[suit_art_idx]}  │",f"│   {rank_art[rank_art_idx]}│", "└─────┘"]
-		else:
-			art_list = ["┌─────┐", f"│{rank_art[rank_art_idx]}    │",f"│  {suit_art[suit_art_idx]}  │",f"│    {rank_art[rank_art_idx]}│", "└─────┘"]
-						
-		art_str = ""
-		for elem in art_list:
-			art_str += (elem + "\n") 
-		return (art_list,art_str)
+		art_rows, art_str = CARD_ART[self]
+		return (list(art_rows), art_str)
+	
+	
+	
+	
+def intern_cards() -> dict[Rank, dict[Suit, Card]]:
+	"""Builds the table of shared Card objects, one for every rank and suit
+
+	Parameters
+	----------
+	None
+
+	Return
+	------
+	dict: the Card for each rank, then suit
+	"""
+	table = {}
+	for rank in Rank:
+		table[rank] = {}
+		for suit in Suit:
+			card = object.__new__(Card)
+			card.rank = rank
+			card.suit = suit
+			card.index = (suit.value-1)*13 + (rank.value-2)
+			card.bit = 1 << card.index if card.index >= 0 else 0
+			table[rank][suit] = card
+	return table
+
+
+INTERNED_CARDS = intern_cards()
+# the 52 playing cards in sorted order, CARDS[card.index] is card
+CARDS = [INTERNED_CARDS[Rank(rank_val)][Suit(suit_val)] for suit_val in range(1,5) for rank_val in range(2,15)]
+
+
+def draw_card_art(rank: Rank, suit: Suit) -> list[str]:
+	"""Draws the rows of the art for one card
+
+	Parameters
+	----------
+	rank : Rank
+		rank of card
+	suit : Suit
+		suit of card
+
+	Return
+	------
+	list: a list of the string for card art
+	"""
+	suit_art = ["♣","♦","♠","♥"]
+	rank_art = ["2","3","4","5","6","7","8","9","10","J","Q","K","A"]
+	
+	rank_art_idx = rank.value - 2
+	suit_art_idx = suit.value - 1
+	
+	if rank.value == 10:
+		return ["┌─────┐", f"│{rank_art[rank_art_idx]}   │",f"│  {suit_art[suit_art_idx]}  │",f"│   {rank_art[rank_art_idx]}│", "└─────┘"]
+	else:
+		return ["┌─────┐", f"│{rank_art[rank_art_idx]}    │",f"│  {suit_art[suit_art_idx]}  │",f"│    {rank_art[rank_art_idx]}│", "└─────┘"]
+
+
+def build_card_art() -> dict[Card, tuple[tuple, str]]:
+	"""Draws the art of every interned card once
+
+	Parameters
+	----------
+	None
+
+	Return
+	------
+	dict: the art rows and the complete art string of each card
+	"""
+	table = {}
+	for rank_cards in INTERNED_CARDS.values():
+		for card in rank_cards.values():
+			art_rows = tuple(draw_card_art(card.rank, card.suit))
+			table[card] = (art_rows, "".join([row + "\n" for row in art_rows]))
+	return table
+
+
+CARD_ART = build_card_art()
+CARD_ART_ROW_COUNT = 5
+# the index shown under each card of a hand, wide enough to line up with the card art
+INDEX_FOOTER = [f"   {card_i}  " if card_i >= 10 else f"   {card_i}   " for card_i in range(52)]
+
+
+@lru_cache(maxsize=256)
+def render_card_list_art(cards: tuple[Card, ...], add_idx: bool) -> str:
+	"""Joins the cached art rows of several cards, remembering recent results
+
+	Parameters
+	----------
+	cards: tuple[Card, ...]
+		cards to display, in order
+	add_idx: bool
+		True if the index of cards is shown at the bottom of each card
+
+	Return
+	------
+	str: the art of the cards side by side
+	"""
+	card_rows = [CARD_ART[card][0] for card in cards]
+	rows = ["".join([art_rows[row] for art_rows in card_rows]) for row in range(CARD_ART_ROW_COUNT)]
+	if add_idx == True:
+		rows.append("".join(INDEX_FOOTER[:len(cards)]))
+	rows.append("")
+	return "\n".join(rows)
+
+
+def card_list_art(card_list: list[Card], add_idx: bool) -> str:
+	"""Constructs the art for multiple cards that will be displayed side by side 
+
+	The art is only rendered again when the cards or add_idx change, so
+	redrawing the same hand costs a cache lookup.
+
+	Parameters
+	----------
+	card_list: list[Card]
+		list of cards to display
+	add_idx: bool
+		True:
+			if the index of cards is needed to be shown at the bottom of each card
+		False:
+			no index will be displayed
+	Return
+	------
+	str: the art of the cards, or a prompt to lead when there are none
+	"""
+	if len(card_list)>0:
+		return render_card_list_art(tuple(card_list), add_idx)
+	else:
+		return "You are leading, please choose a leading card."
 	
 	
 	
@@ -0,0 +1,185 @@
+"""
+Reference client for server.py, playing a networked seat from the terminal.
+
+The game is shown with a TerminalPresenter and the choices are read by a
+Human player, as in a local game, but the server deals, checks and scores.
+
+Run from the command line, e.g.
+	python client.py --name Ada
+	python client.py --name Ada --players 5 --target 50 --unix /tmp/hearts.sock
+"""
+
+from __future__ import annotations
+from bitboard import Hand, mask_of
+from human import Human
+from player import Player
+from presenter import FastPresenter, TerminalPresenter
+from server import card_code, parse_card
+import argparse
+import socket
+
+
+class Client:
+	"""A class to represent the terminal side of a networked seat.
+
+	Attributes
+	----------
+	sock_file: file
+		the connection to the server, read and written line by line
+	presenter: TerminalPresenter
+		shows the game and reads the human's choices
+	human: Human
+		the human player, whose hand is the one the server sent
+	players: list[Player]
+		the players at the table, keeping their total scores
+	seat_idx: int
+		the seat of the human
+	hand_mask: int
+		the hand the server sent, less the cards played since
+	round_count: int
+		the round being played
+	trick: list[Card]
+		the cards of the current trick
+	broken_hearts: bool
+		True once a heart has been played in a previous trick
+	hearts_played: bool
+		True once a heart has been played this round
+
+	Methods
+	-------
+	send(self, line: str) -> None
+		Writes a line to the server
+
+	handle(self, words: list[str]) -> bool
+		Shows or answers one line from the server
+
+	run(self) -> None
+		Plays until the game is over or the server closes the connection
+
+	Methods defined here:
+	__init__(self, sock_file, name: str, presenter: TerminalPresenter) -> None
+		Constructs a client not yet seated.
+	"""
+	def __init__(self, sock_file, name: str, presenter: TerminalPresenter) -> None:
+		self.sock_file = sock_file
+		self.presenter = presenter
+		self.human = Human(name)
+		self.human.presenter = presenter
+		self.players = []
+		self.seat_idx = None
+		self.hand_mask = 0
+		self.round_count = 0
+		self.trick = []
+		self.broken_hearts = False
+		self.hearts_played = False
+
+
+	def send(self, line: str) -> None:
+		"""Writes a line to the server"""
+		self.sock_file.write(line + "\n")
+		self.sock_file.flush()
+
+
+	def handle(self, words: list[str]) -> bool:
+		"""Shows or answers one line from the server
+
+		Parameters
+		----------
+		words: list[str]
+			the line, split into words
+
+		Return
+		------
+		bool: False once the game is over
+		"""
+		command = words[0]
+		if command == "WELCOME":
+			self.presenter.welcome()
+		elif command == "SEATED":
+			self.seat_idx = int(words[2])
+			self.players = [self.human if seat_idx == self.seat_idx else Player(name) for seat_idx, name in enumerate(" ".join(words[3:]).split(","))]
+		elif command == "ROUND":
+			self.round_count = int(words[1])
+			self.trick = []
+			self.broken_hearts = False
+			self.hearts_played = False
+			self.presenter.round_started(self.round_count)
+		elif command == "HAND":
+			self.hand_mask = mask_of([parse_card(code) for code in words[1:]])
+		elif command == "ASK" and words[1] == "PASS":
+			# Human takes the cards it chooses out of its hand, so it starts from the server's hand on every ask
+			self.human.hand = Hand.from_mask(self.hand_mask)
+			self.send("PASS " + " ".join(card_code(card) for card in self.human.pass_cards()))
+		elif command == "ASK":
+			self.human.hand = Hand.from_mask(self.hand_mask)
+			self.send("PLAY " + card_code(self.human.play_card(self.trick[:], self.broken_hearts)))
+		elif command == "PLAYED":
+			card = parse_card(words[2])
+			if int(words[1]) == self.seat_idx:
+				self.hand_mask ^= card.bit
+			self.presenter.card_played(self.players[int(words[1])], card, len(self.trick) == 0)
+			self.trick.append(card)
+		elif command == "BROKEN":
+			self.hearts_played = True
+			self.presenter.hearts_broken()
+		elif command == "TRICK":
+			self.trick = []
+			self.broken_hearts = self.hearts_played
+			self.presenter.trick_taken(self.players[int(words[1])], int(words[2]))
+		elif command == "MOON":
+			self.presenter.moon_shot(self.players[int(words[1])])
+		elif command == "SCORES":
+			for player, total_score in zip(self.players, words[1:]):
+				player.total_score = int(total_score)
+			self.presenter.round_ended(self.round_count, self.players)
+		elif command == "WON":
+			self.presenter.game_won(self.players[int(words[1])])
+			return False
+		elif command == "ERROR":
+			self.presenter.show_error(" ".join(words[1:]))
+		return True
+
+
+	def run(self) -> None:
+		"""Plays until the game is over or the server closes the connection"""
+		for line in self.sock_file:
+			words = line.split()
+			if not words:
+				continue
+			if not self.handle(words):
+				break
+
+
+
+def connect(host: str, port: int, unix_path: str = None) -> socket.socket:
+	"""Connects to the server, over a Unix socket if unix_path is given, over TCP otherwise"""
+	if unix_path is not None:
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		sock.connect(unix_path)
+		return sock
+	return socket.create_connection((host, port))
+
+
+def main() -> None:
+	"""Joins a table on the server from the command line and plays it"""
+	parser = argparse.ArgumentParser(description="Play Hearts on a server started with server.py.")
+	parser.add_argument("--name", default=None, help="your player name, prompted for when not given")
+	parser.add_argument("--players", type=int, default=4, help="number of players at the table (3-5)")
+	parser.add_argument("--target", type=int, default=100, help="score that ends the game")
+	parser.add_argument("--host", default="127.0.0.1", help="address of the server")
+	parser.add_argument("--port", type=int, default=7777, help="TCP port of the server")
+	parser.add_argument("--unix", default=None, help="connect to this Unix socket instead of TCP")
+	parser.add_argument("--fast", action="store_true", help="do not pause between messages")
+	args = parser.parse_args()
+
+	name = args.name if args.name is not None else input("Please enter your player name: ")
+	sock = connect(args.host, args.port, args.unix)
+	with sock, sock.makefile("rw", encoding="utf-8", newline="\n") as sock_file:
+		client = Client(sock_file, name.replace(" ", "_"), FastPresenter() if args.fast else TerminalPresenter())
+		client.send(f"JOIN {client.human.name} {args.players} {args.target}")
+		client.run()
+
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,470 @@
+"""
+Full-screen terminal UI for the human player, using the curses module.
+
+The screen is split into regions (header and scores, trick, message log,
+hand and status line). Every region remembers what it last drew and is only
+redrawn when its content changes, so each event updates just a few lines of
+the terminal. Cards are chosen with the arrow keys, and cards that are not
+legal to play are greyed out.
+
+Run with
+	python curses_ui.py
+"""
+
+from __future__ import annotations
+from bitboard import mask_of
+from cards import CARD_ART, CARD_ART_ROW_COUNT, Card, Suit
+from hearts import Hearts
+from human import Human
+from instrumentation import instrument_from_env
+from observation import SeatObservation
+from presenter import NullPresenter
+from rules import is_first_trick, legal_mask
+import curses
+import locale
+
+RANK_LABELS = ["2","3","4","5","6","7","8","9","10","J","Q","K","A"]
+SUIT_LABELS = {Suit.Clubs: "♣", Suit.Diamonds: "♦", Suit.Spades: "♠", Suit.Hearts: "♥"}
+CARD_WIDTH = 7
+LOG_HEIGHT = 6
+ENTER_KEYS = (curses.KEY_ENTER, 10, 13)
+BACKSPACE_KEYS = (curses.KEY_BACKSPACE, 8, 127)
+
+
+class CursesPresenter(NullPresenter):
+	"""A class to represent a full-screen curses presenter with incremental redraws.
+
+	Attributes
+	----------
+	stdscr: curses.window
+		the whole screen
+	players: list[Player]
+		the players at the table, shown with their scores
+	delay: float
+		seconds to wait after each card so the play can be followed
+
+	Methods
+	-------
+	select_cards(self, hand: list[Card], legal: int, count: int, title: str, invalid_reason: str) -> list[Card]
+		Lets the human pick cards from their hand with the arrow keys
+
+	show_hand(self, hand: list[Card]) -> None
+		Shows the human's hand with no card selected
+
+	Methods defined here:
+	All of the events of NullPresenter, drawn into the screen regions.
+	"""
+	def __init__(self, stdscr, delay: float = 0.3) -> None:
+		"""Constructs all the necessary attributes for the CursesPresenter object.
+
+		Parameters
+		----------
+		stdscr: curses.window
+			the screen given by curses.wrapper
+		delay: float
+			seconds to wait after each card
+
+		Return
+		------
+		None
+		"""
+		self.stdscr = stdscr
+		self.delay = delay
+		self.players = []
+		self.round_count = 0
+		self.trick = []
+		self.log = []
+		self.hand_lines = []
+		self.status = ("", curses.A_NORMAL)
+		self.red = curses.A_NORMAL
+		try:
+			curses.curs_set(0)
+		except curses.error:
+			pass
+		if curses.has_colors():
+			curses.start_color()
+			curses.use_default_colors()
+			curses.init_pair(1, curses.COLOR_RED, -1)
+			self.red = curses.color_pair(1)
+		self.layout()
+
+
+	def layout(self) -> None:
+		"""Splits the screen into regions and forgets what was drawn, so everything is redrawn"""
+		height, width = self.stdscr.getmaxyx()
+		self.stdscr.erase()
+		self.stdscr.noutrefresh()
+		hand_height = CARD_ART_ROW_COUNT + 2
+		trick_height = CARD_ART_ROW_COUNT + 1
+		heights = [("header", 3), ("trick", trick_height), ("log", LOG_HEIGHT), ("hand", hand_height)]
+		self.windows = {}
+		self.drawn = {}
+		top = 0
+		for name, region_height in heights:
+			# squeeze the regions on a small screen, the status line always keeps the bottom line
+			region_height = max(1, min(region_height, height-1-top))
+			top = min(top, max(height-2, 0))
+			self.windows[name] = curses.newwin(region_height, width, top, 0)
+			top += region_height
+		self.windows["status"] = curses.newwin(1, width, height-1, 0)
+		self.width = width
+
+
+	def draw_region(self, name: str, lines: list[list[tuple[str,int]]]) -> None:
+		"""Draws a region if its content changed since it was last drawn
+
+		Parameters
+		----------
+		name: str
+			name of the region
+		lines: list[list[tuple[str,int]]]
+			for each line, the (text, curses attribute) segments to draw
+
+		Return
+		------
+		None
+		"""
+		if self.drawn.get(name) == lines:
+			return
+		window = self.windows[name]
+		window.erase()
+		height, width = window.getmaxyx()
+		for y, segments in enumerate(lines[:height]):
+			x = 0
+			for text, attr in segments:
+				if x >= width-1:
+					break
+				text = text[:width-1-x]
+				try:
+					window.addstr(y, x, text, attr)
+				except curses.error:
+					pass
+				x += len(text)
+		window.noutrefresh()
+		self.drawn[name] = lines
+
+
+	def refresh(self) -> None:
+		"""Redraws every region that changed and pushes the changes to the terminal"""
+		self.draw_region("header", self.header_lines())
+		self.draw_region("trick", self.trick_lines())
+		self.draw_region("log", [[(message, curses.A_NORMAL)] for message in self.log[-LOG_HEIGHT:]])
+		self.draw_region("hand", self.hand_lines)
+		self.draw_region("status", [[self.status]])
+		curses.doupdate()
+
+
+	def card_attr(self, card: Card) -> int:
+		"""Returns the colour of a card, red for hearts and diamonds"""
+		if card.suit is Suit.Hearts or card.suit is Suit.Diamonds:
+			return self.red
+		return curses.A_NORMAL
+
+
+	def card_label(self, card: Card) -> str:
+		"""Returns a short label for a card, e.g. 10♥"""
+		return f"{RANK_LABELS[card.index % 13]}{SUIT_LABELS[card.suit]}"
+
+
+	def fits_art(self, num_of_cards: int) -> bool:
+		"""Checks if the card art of num_of_cards cards fits across the screen"""
+		return num_of_cards*CARD_WIDTH < self.width
+
+
+	def header_lines(self) -> list:
+		"""Builds the title and score lines"""
+		scores = []
+		for player in self.players:
+			scores.append((f"{player}: {player.total_score} (+{player.round_score})   ", curses.A_NORMAL))
+		return [[("♥ HEARTS ♥", curses.A_BOLD), (f"   Round {self.round_count}" if self.round_count else "", curses.A_NORMAL)], scores]
+
+
+	def trick_lines(self) -> list:
+		"""Builds the lines showing the cards played to the current trick"""
+		if len(self.trick) == 0:
+			return [[("Current trick: no cards played yet", curses.A_DIM)]]
+		if not self.fits_art(len(self.trick)):
+			return [[("Current trick: ", curses.A_NORMAL)] + [(f"{player}: {self.card_label(card)}  ", self.card_attr(card)) for player, card in self.trick]]
+		lines = [[(f"{str(player)[:CARD_WIDTH-1]:<{CARD_WIDTH}}", curses.A_BOLD) for player, card in self.trick]]
+		for row in range(CARD_ART_ROW_COUNT):
+			lines.append([(CARD_ART[card][0][row], self.card_attr(card)) for player, card in self.trick])
+		return lines
+
+
+	def build_hand_lines(self, hand: list[Card], legal: int, cursor: int, selected: list[Card], title: str) -> list:
+		"""Builds the lines of the hand region
+
+		Parameters
+		----------
+		hand: list[Card]
+			cards in the human's hand
+		legal: int
+			mask of the cards that may be chosen, the others are greyed out
+		cursor: int
+			index of the card under the cursor, or -1 for none
+		selected: list[Card]
+			cards already selected
+		title: str
+			line shown above the hand
+
+		Return
+		------
+		list: the lines of the region
+		"""
+		def attr(card_idx, card):
+			out = self.card_attr(card)
+			if not card.bit & legal:
+				out = curses.A_DIM
+			if card in selected:
+				out |= curses.A_BOLD | curses.A_UNDERLINE
+			if card_idx == cursor:
+				out |= curses.A_REVERSE
+			return out
+
+		lines = [[(title, curses.A_BOLD)]]
+		if self.fits_art(len(hand)):
+			for row in range(CARD_ART_ROW_COUNT):
+				lines.append([(CARD_ART[card][0][row], attr(card_idx, card)) for card_idx, card in enumerate(hand)])
+			lines.append([(("   ^   " if card_idx == cursor else "   *   " if card in selected else " "*CARD_WIDTH), curses.A_BOLD) for card_idx, card in enumerate(hand)])
+		else:
+			lines.append([(f"{self.card_label(card):>4} ", attr(card_idx, card)) for card_idx, card in enumerate(hand)])
+		return lines
+
+
+	def show_hand(self, hand: list[Card]) -> None:
+		"""Shows the human's hand with no card selected
+
+		Parameters
+		----------
+		hand: list[Card]
+			cards in the human's hand
+
+		Return
+		------
+		None
+		"""
+		hand = list(hand)
+		self.hand_lines = self.build_hand_lines(hand, mask_of(hand), -1, [], "Your hand")
+		self.refresh()
+
+
+	def select_cards(self, hand: list[Card], legal: int, count: int, title: str, invalid_reason: str) -> list[Card]:
+		"""Lets the human pick cards from their hand with the arrow keys
+
+		Left and right move the cursor. With one card to pick, enter plays the
+		card under the cursor. With several, space selects or unselects the
+		card and enter confirms once enough cards are selected.
+
+		Parameters
+		----------
+		hand: list[Card]
+			cards in the human's hand
+		legal: int
+			mask of the cards that may be chosen
+		count: int
+			number of cards to pick
+		title: str
+			instructions shown above the hand
+		invalid_reason: str
+			shown when the human tries to pick a card that is not legal
+
+		Return
+		------
+		list[Card]: the chosen cards
+		"""
+		cursor = 0
+		for card_idx, card in enumerate(hand):
+			if card.bit & legal:
+				cursor = card_idx
+				break
+		selected = []
+		self.status = ("←/→ move   " + ("enter play" if count == 1 else "space select   enter confirm"), curses.A_DIM)
+
+		while True:
+			self.hand_lines = self.build_hand_lines(hand, legal, cursor, selected, title)
+			self.refresh()
+			key = self.stdscr.getch()
+
+			if key in (curses.KEY_LEFT, ord("h")):
+				cursor = (cursor-1) % len(hand)
+			elif key in (curses.KEY_RIGHT, ord("l")):
+				cursor = (cursor+1) % len(hand)
+			elif key == curses.KEY_RESIZE:
+				self.layout()
+			elif key == ord(" ") and count > 1:
+				if hand[cursor] in selected:
+					selected.remove(hand[cursor])
+				elif len(selected) < count and hand[cursor].bit & legal:
+					selected.append(hand[cursor])
+			elif key in ENTER_KEYS:
+				if count == 1 and hand[cursor].bit & legal:
+					selected = [hand[cursor]]
+				if len(selected) == count:
+					self.status = ("", curses.A_NORMAL)
+					return selected
+				self.show_error(invalid_reason if count == 1 else f"Select {count} cards with space, then press enter")
+
+
+	def pause(self, seconds: float) -> None:
+		"""Waits between two events so the game can be followed"""
+		curses.napms(int(seconds*1000))
+
+
+	def add_log(self, message: str) -> None:
+		"""Adds a message to the log region and redraws"""
+		self.log.append(message)
+		del self.log[:-LOG_HEIGHT]
+		self.refresh()
+
+
+	def welcome(self) -> None:
+		self.refresh()
+
+	def round_started(self, round_count: int) -> None:
+		self.round_count = round_count
+		self.trick = []
+		self.add_log(f"Starting round {round_count}")
+
+	def cards_passed(self) -> None:
+		self.add_log("Cards have been passed")
+
+	def card_played(self, player, card: Card, leading: bool) -> None:
+		if leading:
+			self.trick = []
+		self.trick.append((player, card))
+		self.add_log(f"{player} {'leads with' if leading else 'plays'} {self.card_label(card)}")
+		self.pause(self.delay)
+
+	def hearts_broken(self) -> None:
+		self.add_log("Hearts have been broken!")
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		self.add_log(f"{player} takes the trick. Points received: {penalty_sum}")
+		self.pause(self.delay*2)
+
+	def moon_shot(self, player) -> None:
+		self.add_log(f"{player} has shot the moon! Everyone else receives 26 points")
+
+	def round_ended(self, round_count: int, players: list) -> None:
+		self.players = players
+		self.add_log(f"End of round {round_count}")
+
+	def game_won(self, player) -> None:
+		self.status = (f"{player} is the winner! Press any key to exit.", curses.A_BOLD)
+		self.refresh()
+		self.stdscr.getch()
+
+	def show_cards(self, title: str, cards: list[Card], add_idx: bool) -> None:
+		if add_idx:
+			self.show_hand(cards)
+
+	def show_error(self, message: str) -> None:
+		self.status = (message, curses.A_BOLD | self.red)
+		self.refresh()
+
+	def ask(self, prompt: str) -> str:
+		"""Reads a line typed on the status line"""
+		answer = ""
+		while True:
+			self.status = (prompt + answer + "_", curses.A_NORMAL)
+			self.refresh()
+			key = self.stdscr.get_wch()
+			if key in ("\n", "\r") or key in ENTER_KEYS:
+				self.status = ("", curses.A_NORMAL)
+				return answer
+			elif key in ("\b", "\x7f") or key in BACKSPACE_KEYS:
+				answer = answer[:-1]
+			elif key == curses.KEY_RESIZE:
+				self.layout()
+			elif isinstance(key, str) and key.isprintable():
+				answer += key
+
+
+
+class CursesHuman(Human):
+	"""A class to represent a human player choosing cards in the curses UI.
+
+	It keeps the Human interface, so it can sit at any Hearts table whose
+	presenter is a CursesPresenter.
+
+	Methods
+	-------
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
+		returns the Card chosen with the arrow keys among the legal cards
+
+	pass_cards(self) -> list[Card]
+		returns the three Cards chosen to pass
+	"""
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
+		"""Returns the card based on the player's decision
+
+		Parameters
+		----------
+		trick: list[Card]
+			list of Cards in played order from trick
+		broken_hearts: bool
+			indicates whether Hearts have been broken before
+		observation: SeatObservation
+			the round seen from the player's seat, left to the human to remember
+
+		Return
+		------
+		A Card that will be played
+		"""
+		legal, invalid_reason = legal_mask(mask_of(self.hand), trick, broken_hearts, is_first_trick(self.hand, trick))
+		card = self.presenter.select_cards(list(self.hand), legal, 1, "Your hand - choose a card to play", invalid_reason)[0]
+		self.hand.remove(card)
+		self.presenter.show_hand(self.hand)
+		return card
+
+
+	def pass_cards(self) -> list[Card]:
+		"""Gets the decision for the cards that will be passed from the player
+
+		Parameters
+		----------
+		None
+
+		Return
+		------
+		A list Card that will be passed
+		"""
+		out = self.presenter.select_cards(list(self.hand), mask_of(self.hand), 3, "Your hand - choose three cards to pass", "")
+		for card in out:
+			self.hand.remove(card)
+		self.presenter.show_hand(self.hand)
+		return out
+
+
+
+class CursesHearts(Hearts):
+	"""A class to represent a game of Hearts played in the curses UI.
+
+	Methods defined here:
+	generate_human(self) -> Human
+		Seats a CursesHuman, named on the status line
+
+	generate_players(self, num_of_players) -> None
+		Generates the players and shows them in the score region
+	"""
+	def generate_human(self) -> Human:
+		"""Creates the human player, asking for their name in the UI"""
+		return CursesHuman(self.presenter.ask("Please enter your player name: "))
+
+
+	def generate_players(self, num_of_players) -> None:
+		"""Generates the players and shows them in the score region"""
+		super().generate_players(num_of_players)
+		self.presenter.players = self.players
+
+
+def main(stdscr) -> None:
+	"""Plays a game of Hearts in the curses UI"""
+	CursesHearts(presenter=CursesPresenter(stdscr))
+
+
+
+if __name__ == "__main__":
+	instrument_from_env()
+	locale.setlocale(locale.LC_ALL, "")
+	curses.wrapper(main)
@@ -0,0 +1,178 @@
+"""
+Rejection-free generation of valid deals.
+
+A deal is valid when every player holds at least one point card (a heart or
+the queen of spades). Rather than shuffling until a deal is valid, a deal is
+drawn in two steps:
+
+1. how many point cards each player gets, with probability proportional to
+   the number of deals having those counts;
+2. a shuffle of the point cards and of the other cards, split by those counts.
+
+This gives every valid deal the same probability, with no retries and the
+same cost for every deal.
+"""
+
+from __future__ import annotations
+from bisect import bisect_right
+from bitboard import POINTS_MASK, mask_of
+from cards import Card
+from functools import lru_cache
+from math import factorial
+import random
+
+
+def split_counts(total: int, parts: int, low: int, high: int) -> list[tuple]:
+	"""Lists every way to split a total into ordered parts within bounds
+
+	Parameters
+	----------
+	total: int
+		the number to split
+	parts: int
+		number of parts
+	low: int
+		smallest allowed part
+	high: int
+		largest allowed part
+
+	Return
+	------
+	list[tuple]: every tuple of parts adding up to total
+	"""
+	if parts == 0:
+		return [()] if total == 0 else []
+	out = []
+	for first in range(low, min(high, total)+1):
+		for rest in split_counts(total-first, parts-1, low, high):
+			out.append((first,) + rest)
+	return out
+
+
+@lru_cache(maxsize=None)
+def point_count_table(num_of_point_cards: int, num_of_other_cards: int, num_of_player: int) -> tuple[list[tuple], list[int]]:
+	"""Works out the distribution of point cards per player over valid deals
+
+	Parameters
+	----------
+	num_of_point_cards: int
+		number of hearts and queen of spades in the deck
+	num_of_other_cards: int
+		number of cards in the deck that carry no points
+	num_of_player: int
+		number of players
+
+	Return
+	------
+	a tuple with the following types in order:
+		list[tuple]: every possible number of point cards per player
+		list[int]: the cumulative number of deals up to each of them
+	"""
+	hand_size = (num_of_point_cards + num_of_other_cards) // num_of_player
+	counts_list = split_counts(num_of_point_cards, num_of_player, 1, hand_size)
+	cumulative = []
+	total = 0
+	for counts in counts_list:
+		# multinomial(point cards; counts) * multinomial(other cards; hand_size - counts)
+		ways = factorial(num_of_point_cards) * factorial(num_of_other_cards)
+		for count in counts:
+			ways //= factorial(count) * factorial(hand_size - count)
+		total += ways
+		cumulative.append(total)
+	return (counts_list, cumulative)
+
+
+
+class DealGenerator:
+	"""A class to represent a generator of valid deals for one deck and number of players.
+
+	Attributes
+	----------
+	num_of_player: int
+		number of players
+	hand_size: int
+		number of cards dealt to each player
+	point_cards: list[Card]
+		the hearts and the queen of spades
+	other_cards: list[Card]
+		the cards carrying no points
+
+	Methods
+	-------
+	deal(self, rng: random.Random) -> list[int]
+		Draws one valid deal
+
+	deal_many(self, rng: random.Random, num_of_deals: int) -> list[list[int]]
+		Draws many valid deals at once
+
+	Methods defined here:
+	__init__(self, deck_list: list[Card], num_of_player: int) -> None
+		Constructs the tables used to draw deals.
+	"""
+	def __init__(self, deck_list: list[Card], num_of_player: int) -> None:
+		"""Constructs all the necessary attributes for the DealGenerator object.
+
+		Parameters
+		----------
+		deck_list: list[Card]
+			the deck, as returned by Hearts.generate_deck
+		num_of_player: int
+			number of players
+
+		Return
+		------
+		None
+		"""
+		self.num_of_player = num_of_player
+		self.hand_size = len(deck_list) // num_of_player
+		self.point_cards = [card for card in sorted(deck_list) if card.bit & POINTS_MASK]
+		self.other_cards = [card for card in sorted(deck_list) if not card.bit & POINTS_MASK]
+		self.counts_list, self.cumulative = point_count_table(len(self.point_cards), len(self.other_cards), num_of_player)
+		if len(self.counts_list) == 0:
+			raise ValueError(f"No valid deal exists for {num_of_player} players with this deck")
+
+
+	def deal(self, rng: random.Random) -> list[int]:
+		"""Draws one valid deal, uniformly over all valid deals
+
+		Parameters
+		----------
+		rng: random.Random
+			random number generator of the game
+
+		Return
+		------
+		list[int]: the hand mask of each player
+		"""
+		counts = self.counts_list[bisect_right(self.cumulative, rng.randrange(self.cumulative[-1]))]
+		point_cards = self.point_cards[:]
+		other_cards = self.other_cards[:]
+		rng.shuffle(point_cards)
+		rng.shuffle(other_cards)
+
+		hands = []
+		point_idx = 0
+		other_idx = 0
+		for count in counts:
+			other_count = self.hand_size - count
+			hands.append(mask_of(point_cards[point_idx:point_idx+count]) | mask_of(other_cards[other_idx:other_idx+other_count]))
+			point_idx += count
+			other_idx += other_count
+		return hands
+
+
+	def deal_many(self, rng: random.Random, num_of_deals: int) -> list[list[int]]:
+		"""Draws many valid deals at once
+
+		Parameters
+		----------
+		rng: random.Random
+			random number generator to draw from
+		num_of_deals: int
+			number of deals
+
+		Return
+		------
+		list[list[int]]: the hand masks of each deal
+		"""
+		return [self.deal(rng) for _ in range(num_of_deals)]
@@ -0,0 +1,368 @@
+"""
+Bounded cache of the decisions of deterministic AI players.
+
+An AI whose choice depends only on its hand, the trick and whether hearts
+are broken, such as BasicAIPlayer and BetterAIPlayer, decides the same way
+every time it meets the same state. Mixing CachedDecisions into such a
+player looks the decision up before asking the player, and remembers it
+afterwards. Each strategy has one DecisionCache, shared by all its players
+in the process, evicting the least recently used decision once it is full
+and counting its hits and misses.
+
+A cache can also be backed by a shared SQLite file, so that decisions made
+by one process, e.g. a tournament worker, are found by the others and by the
+next run. Set HEARTS_DECISION_CACHE to the file name, or pass a path to
+configure_cache.
+
+Players that only compare their cards with each other and with the trick,
+such as both ready-made cached players, may set rank_equivalent so that
+states are canonicalized first (see canonical.py): a hand of 3, 7 and 9 of
+clubs is then the same state as one of 2, 3 and 4. Far more decisions are
+found and fewer are kept, but every lookup pays for the canonicalization,
+so it is worth it for a bounded cache or a shared file rather than a warm
+cache in memory.
+"""
+
+from __future__ import annotations
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from bitboard import INDEX_CARD, cards_of, mask_of
+from canonical import canonical_view, map_mask
+from cards import Card
+from collections import OrderedDict
+from observation import SeatObservation
+import atexit
+import os
+import sqlite3
+
+DEFAULT_SIZE = 1 << 16
+DEFAULT_PATH = os.environ.get("HEARTS_DECISION_CACHE")
+BROKEN_HEARTS_BIT = 1 << 76
+PASSING_BIT = 1 << 77
+KEY_BYTES = 10
+WRITE_BATCH = 1000
+
+
+def decision_key(hand_mask: int, trick: list[int], broken_hearts: bool) -> int:
+	"""Returns the key of the state a card is played from
+
+	The hand takes the low 52 bits, then each card of the trick six bits
+	(its index plus one), then a bit for broken hearts.
+
+	Parameters
+	----------
+	hand_mask: int
+		mask of the cards in the player's hand
+	trick: list[int]
+		bits of the cards in played order from trick
+	broken_hearts: bool
+		indicates whether Hearts have been broken before
+
+	Return
+	------
+	int: a key of at most 78 bits
+	"""
+	key = hand_mask
+	shift = 52
+	for bit in trick:
+		key |= bit.bit_length() << shift
+		shift += 6
+	return key | BROKEN_HEARTS_BIT if broken_hearts else key
+
+
+def passing_key(hand_mask: int) -> int:
+	"""Returns the key of the hand cards are passed from"""
+	return hand_mask | PASSING_BIT
+
+
+
+class DecisionCache:
+	"""A class to represent a bounded cache of decisions, evicting the least recently used.
+
+	Attributes
+	----------
+	max_size: int
+		number of decisions kept in memory
+	namespace: str
+		tells apart the decisions of different strategies in a shared file
+	path: str
+		the shared SQLite file, None to keep decisions in memory only
+	entries: OrderedDict[int, int]
+		the decisions in memory, from the least to the most recently used
+	hits: int
+		number of lookups found in memory
+	disk_hits: int
+		number of lookups found in the shared file
+	misses: int
+		number of lookups not found
+	evictions: int
+		number of decisions dropped from memory
+
+	Methods
+	-------
+	get(self, key: int) -> int
+		Returns a decision, None if it is not cached
+
+	put(self, key: int, value: int) -> None
+		Stores a decision
+
+	hit_rate(self) -> float
+		Returns the fraction of lookups that were found
+
+	stats(self) -> dict
+		Returns the counters and size of the cache
+
+	flush(self) -> None
+		Writes the pending decisions to the shared file
+
+	close(self) -> None
+		Flushes and closes the shared file
+
+	Methods defined here:
+	__init__(self, max_size: int = DEFAULT_SIZE, namespace: str = "", path: str = None) -> None
+		Constructs an empty cache, opening the shared file if there is one.
+	"""
+	def __init__(self, max_size: int = DEFAULT_SIZE, namespace: str = "", path: str = None) -> None:
+		"""Constructs all the necessary attributes for the DecisionCache object.
+
+		Parameters
+		----------
+		max_size: int
+			number of decisions kept in memory
+		namespace: str
+			tells apart the decisions of different strategies in a shared file
+		path: str
+			the shared SQLite file, created if needed, None to keep decisions in memory only
+
+		Return
+		------
+		None
+		"""
+		if max_size < 1:
+			raise ValueError("A decision cache holds at least one decision")
+		self.max_size = max_size
+		self.namespace = namespace
+		self.path = path
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.disk_hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.pending = []
+		self.db = None
+		if path is not None:
+			# other processes may be writing, so wait for their locks rather than fail
+			self.db = sqlite3.connect(path, timeout=60)
+			self.db.execute("PRAGMA journal_mode=WAL")
+			self.db.execute("CREATE TABLE IF NOT EXISTS decisions (namespace TEXT, key BLOB, value INTEGER, PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+			self.db.commit()
+			atexit.register(self.close)
+
+
+	def get(self, key: int) -> int:
+		"""Returns a decision, marking it as the most recently used
+
+		Parameters
+		----------
+		key: int
+			the key of the state
+
+		Return
+		------
+		int: the decision, None if it is not cached
+		"""
+		value = self.entries.get(key)
+		if value is not None:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return value
+		if self.db is not None:
+			row = self.db.execute("SELECT value FROM decisions WHERE namespace = ? AND key = ?", (self.namespace, key.to_bytes(KEY_BYTES, "little"))).fetchone()
+			if row is not None:
+				self.disk_hits += 1
+				self.remember(key, row[0])
+				return row[0]
+		self.misses += 1
+		return None
+
+
+	def put(self, key: int, value: int) -> None:
+		"""Stores a decision, in memory and, in batches, in the shared file
+
+		Parameters
+		----------
+		key: int
+			the key of the state
+		value: int
+			the decision
+
+		Return
+		------
+		None
+		"""
+		self.remember(key, value)
+		if self.db is not None:
+			self.pending.append((self.namespace, key.to_bytes(KEY_BYTES, "little"), value))
+			if len(self.pending) >= WRITE_BATCH:
+				self.flush()
+
+
+	def remember(self, key: int, value: int) -> None:
+		"""Stores a decision in memory, evicting the least recently used one if the cache is full"""
+		entries = self.entries
+		entries[key] = value
+		entries.move_to_end(key)
+		if len(entries) > self.max_size:
+			entries.popitem(last=False)
+			self.evictions += 1
+
+
+	def hit_rate(self) -> float:
+		"""Returns the fraction of lookups found in memory or in the shared file"""
+		lookups = self.hits + self.disk_hits + self.misses
+		return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+	def stats(self) -> dict:
+		"""Returns the counters and size of the cache"""
+		return {
+			"namespace": self.namespace,
+			"size": len(self.entries),
+			"max_size": self.max_size,
+			"hits": self.hits,
+			"disk_hits": self.disk_hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"hit_rate": self.hit_rate(),
+		}
+
+
+	def flush(self) -> None:
+		"""Writes the pending decisions to the shared file"""
+		if self.db is None or not self.pending:
+			return
+		self.db.executemany("INSERT OR IGNORE INTO decisions VALUES (?, ?, ?)", self.pending)
+		self.db.commit()
+		self.pending = []
+
+
+	def close(self) -> None:
+		"""Flushes and closes the shared file, keeping the decisions in memory"""
+		if self.db is not None:
+			self.flush()
+			self.db.close()
+			self.db = None
+
+
+# one cache per strategy, shared by all its players in the process
+CACHES = {}
+
+
+def configure_cache(cls: type, max_size: int = DEFAULT_SIZE, path: str = DEFAULT_PATH) -> DecisionCache:
+	"""Gives a strategy a new cache, replacing the one it had
+
+	Parameters
+	----------
+	cls: type
+		the player class, mixing in CachedDecisions
+	max_size: int
+		number of decisions kept in memory
+	path: str
+		the shared SQLite file, None to keep decisions in memory only
+
+	Return
+	------
+	DecisionCache: the new cache
+	"""
+	old_cache = CACHES.get(cls.__name__)
+	if old_cache is not None:
+		old_cache.close()
+	cache = CACHES[cls.__name__] = DecisionCache(max_size, cls.__name__, path)
+	return cache
+
+
+def cache_stats() -> list[dict]:
+	"""Returns the statistics of the cache of every strategy used so far"""
+	return [cache.stats() for _, cache in sorted(CACHES.items())]
+
+
+
+class CachedDecisions:
+	"""A class to represent a mixin caching the decisions of a deterministic player.
+
+	Put it before the player class, e.g.
+		class CachedBetterAIPlayer(CachedDecisions, BetterAIPlayer): pass
+	Only players whose choices depend on nothing but their hand, the trick
+	and broken_hearts may use it.
+
+	Attributes
+	----------
+	rank_equivalent: bool
+		True if the player only compares cards, so that states are canonicalized before they are looked up
+
+	Methods
+	-------
+	decision_cache(self) -> DecisionCache
+		Returns the cache of the player's strategy
+
+	Methods defined here:
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
+		Plays the cached card, or the player's own choice, remembering it
+
+	pass_cards(self) -> list[Card]
+		Passes the cached cards, or the player's own choice, remembering them
+	"""
+	rank_equivalent = False
+
+	def decision_cache(self) -> DecisionCache:
+		"""Returns the cache of the player's strategy, creating it on first use"""
+		cache = CACHES.get(type(self).__name__)
+		if cache is None:
+			cache = configure_cache(type(self))
+		return cache
+
+
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
+		cache = self.decision_cache()
+		hand_mask = self.hand.mask
+		trick_bits = [card.bit for card in trick]
+		card_map = None
+		if self.rank_equivalent:
+			hand_mask, trick_bits, card_map = canonical_view(hand_mask, trick_bits)
+		key = decision_key(hand_mask, trick_bits, broken_hearts)
+		card_idx = cache.get(key)
+		if card_idx is None:
+			card = super().play_card(trick, broken_hearts, observation)
+			cache.put(key, card.index if card_map is None else card_map[card.index])
+			return card
+		card = INDEX_CARD[card_idx if card_map is None else card_map.index(card_idx)]
+		self.hand.remove(card)
+		return card
+
+
+	def pass_cards(self) -> list[Card]:
+		cache = self.decision_cache()
+		hand_mask = self.hand.mask
+		card_map = None
+		if self.rank_equivalent:
+			hand_mask, _, card_map = canonical_view(hand_mask, [])
+		key = passing_key(hand_mask)
+		passed = cache.get(key)
+		if passed is None:
+			cards = super().pass_cards()
+			cache.put(key, mask_of(cards) if card_map is None else map_mask(mask_of(cards), card_map))
+			return cards
+		cards = cards_of(passed) if card_map is None else [INDEX_CARD[card_map.index(card.index)] for card in cards_of(passed)]
+		for card in cards:
+			self.hand.remove(card)
+		return cards
+
+
+
+class CachedBasicAIPlayer(CachedDecisions, BasicAIPlayer):
+	"""A class to represent a basic AI player with a decision cache."""
+
+
+
+class CachedBetterAIPlayer(CachedDecisions, BetterAIPlayer):
+	"""A class to represent a better AI player with a decision cache."""
@@ -0,0 +1,210 @@
+from __future__ import annotations
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from hearts import Hearts
+from player import Player
+from presenter import NullPresenter
+from records import RecordingPresenter, RecordWriter
+import hashlib
+import random
+import time
+
+
+class GameResult:
+	"""A class to represent the outcome of a headless game of Hearts.
+
+	Attributes
+	----------
+	seed: int
+		the seed that replays the game exactly
+	seats: list[str]
+		the strategy (class name) of the player in each seat
+	total_scores: list[int]
+		the final total score of each seat
+	winner_idx: int
+		the index of the winning seat
+	round_count: int
+		the number of rounds played
+	moon_shots: list[int]
+		how many times each seat shot the moon
+
+	Methods defined here:
+	__init__(self, seed: int, seats: list[str], total_scores: list[int], winner_idx: int, round_count: int, moon_shots: list[int]) -> None
+		Constructs the attributes of a GameResult object.
+
+	__repr__(self) -> str
+		Return a string representation of the GameResult object.
+	"""
+	def __init__(self, seed: int, seats: list[str], total_scores: list[int], winner_idx: int, round_count: int, moon_shots: list[int]) -> None:
+		"""Constructs all the necessary attributes for the GameResult object.
+
+		Parameters
+		----------
+		seed: int
+			the seed that replays the game exactly
+		seats: list[str]
+			the strategy of the player in each seat
+		total_scores: list[int]
+			the final total score of each seat
+		winner_idx: int
+			the index of the winning seat
+		round_count: int
+			the number of rounds played
+		moon_shots: list[int]
+			how many times each seat shot the moon
+
+		Return
+		------
+		None
+		"""
+		self.seed = seed
+		self.seats = seats
+		self.total_scores = total_scores
+		self.winner_idx = winner_idx
+		self.round_count = round_count
+		self.moon_shots = moon_shots
+
+
+	def __repr__(self) -> str:
+		"""Return a string representation of the GameResult object."""
+		return f"GameResult(seed={self.seed}, seats={self.seats}, total_scores={self.total_scores}, winner_idx={self.winner_idx}, round_count={self.round_count}, moon_shots={self.moon_shots})"
+
+
+class MoonShotCounter(NullPresenter):
+	"""A class to represent a headless presenter that only counts moon shots.
+
+	Attributes
+	----------
+	players: list[Player]
+		the players seated at the table
+	moon_shots: list[int]
+		how many times each seat shot the moon
+
+	Methods defined here:
+	moon_shot(self, player: Player) -> None
+		Counts a moon shot for the player's seat
+	"""
+	def __init__(self, players: list[Player]) -> None:
+		self.players = players
+		self.moon_shots = [0]*len(players)
+
+	def moon_shot(self, player: Player) -> None:
+		self.moon_shots[self.players.index(player)] += 1
+
+
+def derive_seed(master_seed: int, game_idx: int) -> int:
+	"""Derives the seed of one game from the seed of a whole run
+
+	The seed only depends on the master seed and the game index, so a game
+	gets the same independent random stream however the run is split up.
+
+	Parameters
+	----------
+	master_seed: int
+		seed of the whole run
+	game_idx: int
+		index of the game in the run
+
+	Return
+	------
+	int: a 64-bit seed for the game
+	"""
+	digest = hashlib.blake2b(f"{master_seed}:{game_idx}".encode(), digest_size=8).digest()
+	return int.from_bytes(digest, "little")
+
+
+def generate_seated_players(seats: list[type[Player]]) -> list[Player]:
+	"""Creates a player for every seat at the table
+
+	Parameters
+	----------
+	seats: list[type[Player]]
+		the AI player class for each seat, in playing order
+
+	Return
+	------
+	list[Player]: the players, named after their seat number
+	"""
+	if len(seats) < 3 or len(seats) > 5:
+		raise ValueError(f"Hearts needs 3 to 5 players, got {len(seats)}")
+	return [seat(f"Player {num}") for num, seat in enumerate(seats, start=1)]
+
+
+def play_game(seats: list[type[Player]], target_score: int = 100, seed: int = None, writer: RecordWriter = None) -> GameResult:
+	"""Plays a complete game of Hearts without any printing, input or pausing
+
+	Parameters
+	----------
+	seats: list[type[Player]]
+		the AI player class for each seat, in playing order
+	target_score: int
+		the score that ends the game
+	seed: int
+		seed of the game, a fresh one is drawn when None
+	writer: RecordWriter
+		where the game is recorded, not recorded when None
+
+	Return
+	------
+	GameResult: the final scores and winner of the game
+	"""
+	if seed is None:
+		seed = random.getrandbits(64)
+	players = generate_seated_players(seats)
+	counter = MoonShotCounter(players)
+	presenter = counter if writer is None else RecordingPresenter(writer, seed, target_score, counter)
+	game = Hearts(target_score, players=players, presenter=presenter, seed=seed)
+	return GameResult(seed, [type(player).__name__ for player in players], [player.total_score for player in players], game.winner_idx, game.round_count, counter.moon_shots)
+
+
+def play_games(seats: list[type[Player]], num_of_games: int, target_score: int = 100, master_seed: int = None, writer: RecordWriter = None) -> list[GameResult]:
+	"""Plays several headless games of Hearts with the same seating
+
+	Parameters
+	----------
+	seats: list[type[Player]]
+		the AI player class for each seat, in playing order
+	num_of_games: int
+		number of games to play
+	target_score: int
+		the score that ends each game
+	master_seed: int
+		seed of the whole run, game k is seeded with derive_seed(master_seed, k)
+	writer: RecordWriter
+		where every game is recorded, not recorded when None
+
+	Return
+	------
+	list[GameResult]: the result of every game in order
+	"""
+	if master_seed is None:
+		master_seed = random.getrandbits(64)
+	return [play_game(seats, target_score, derive_seed(master_seed, game_idx), writer) for game_idx in range(num_of_games)]
+
+
+def measure_throughput(seats: list[type[Player]], num_of_games: int, target_score: int = 100) -> float:
+	"""Measures how many headless games can be played per second
+
+	Parameters
+	----------
+	seats: list[type[Player]]
+		the AI player class for each seat, in playing order
+	num_of_games: int
+		number of games to time
+	target_score: int
+		the score that ends each game
+
+	Return
+	------
+	float: games played per second
+	"""
+	start = time.perf_counter()
+	play_games(seats, num_of_games, target_score)
+	return num_of_games / (time.perf_counter() - start)
+
+
+
+if __name__ == "__main__":
+	for num_of_player in range(3, 6):
+		seats = [BasicAIPlayer, BetterAIPlayer] + [BetterAIPlayer]*(num_of_player-2)
+		print(f"{num_of_player} players: {measure_throughput(seats, 20):.1f} games/sec")
@@ -6,12 +6,16 @@ Author:Ekramul Islam
 
 import random   
 from copy import copy
-from cards import Card, Rank, Suit
+from bitboard import Hand, POINTS_MASK, mask_of
+from cards import INTERNED_CARDS, Card, Rank, Suit
+from deals import DealGenerator
 from basic_ai import BasicAIPlayer
 from better_ai import BetterAIPlayer
 from human import Human
+from observation import RoundObservation
+from player import Player
+from presenter import NullPresenter, TerminalPresenter
 from round import Round
-import time 
 
 
 class Hearts:
@@ -31,6 +35,9 @@ class Hearts:
 	pass_cards(self, players, round_num) -> None:
 		Simulates the passing cards procedure in the round
 	
+	generate_human(self) -> Player:
+		Creates the human player sitting in the first seat
+
 	generate_players(self, num_of_players) -> None:
 		Generates the player objects based on the number of players
 	
@@ -47,15 +54,40 @@ class Hearts:
 		Prompts and gets the target score limit
 		
 	Methods defined here:
-	__init__(self) -> None
+	__init__(self, target_score: int = None, num_of_player: int = None, players: list[Player] = None, presenter: NullPresenter = None, seed: int = None) -> None
 		Constructs the necessary attributes of a Hearts game.
 	"""
-	def __init__(self) -> None:
-		"""Constructs all the necessary attributes for a Round and executes a Hearts round"""
-		print("Welcome to ♥ HEARTS ♥")
-		self.target_score = self.input_target_score()
-		self.num_of_player = self.input_num_of_player()
-		self.players = []
+	def __init__(self, target_score: int = None, num_of_player: int = None, players: list[Player] = None, presenter: NullPresenter = None, seed: int = None) -> None:
+		"""Constructs all the necessary attributes for a Hearts game and executes it
+		
+		Parameters
+		----------
+		target_score: int
+			the score that ends the game, prompted for when None
+		num_of_player: int
+			number of players, prompted for when None
+		players: list[Player]
+			the players seated at the table, generated from num_of_player when None
+		presenter: NullPresenter
+			shows the game and reads input, the terminal with pacing when None
+		seed: int
+			seed of the game's own random number generator, so the game can be replayed
+		
+		Return
+		------
+		None
+		"""
+		self.presenter = presenter if presenter is not None else TerminalPresenter()
+		self.presenter.welcome()
+		self.seed = seed
+		self.rng = random.Random(seed)
+		self.target_score = target_score if target_score is not None else self.input_target_score()
+		if players is not None:
+			num_of_player = len(players)
+		self.num_of_player = num_of_player if num_of_player is not None else self.input_num_of_player()
+		self.players = [] if players is None else players
+		self.round_count = 0
+		self.winner_idx = None
 		#start the game
 		self.execute_hearts()
 		
@@ -74,9 +106,9 @@ class Hearts:
 		"""
 		new_deck = []
 		
-		for rank_val in range(2,15):
+		for rank in Rank:
 			for suit_val in range(1,5):
-				new_deck.append(Card( Rank(rank_val), Suit(suit_val) ))
+				new_deck.append(INTERNED_CARDS[rank][Suit(suit_val)])
 
 		if num_of_player == 3 or num_of_player == 5:
 			new_deck.remove(Card(Rank.Two, Suit.Diamonds))
@@ -100,7 +132,7 @@ class Hearts:
 		None
 		"""
 		new_deck = copy(deck_list)
-		random.shuffle(new_deck)
+		self.rng.shuffle(new_deck)
 		cards_per_player = len(new_deck)//len(players)
 		counter = 0
 		while len(new_deck) > 0:
@@ -125,19 +157,12 @@ class Hearts:
 		bool: True if the deal is valid
 		"""
 		for player in players:
-			flag = False
-			if Card(Rank.Queen, Suit.Spades) in player.hand:
-				flag = True		
-			else:
-				for card in player.hand:
-					if card.suit is Suit.Hearts:
-						flag = True
-			if flag == False:
+			if not mask_of(player.hand) & POINTS_MASK:
 				return False
 		return True
 	
 	
-	def pass_cards(self, players, round_num) -> None:
+	def pass_cards(self, players, round_num) -> list[int]:
 		"""Simulates the passing cards procedure in the round
 
 		Parameters
@@ -149,7 +174,7 @@ class Hearts:
 
 		Return
 		------
-		None
+		list[int]: the mask of the cards each player passed
 		"""
 		passing_idx_list = [None]*len(players)
 		passed_cards_list = [None]*len(players)
@@ -166,8 +191,23 @@ class Hearts:
 		for idx in range(len(players)):
 			players[idx].hand.extend(passed_cards_list[idx])
 			players[idx].hand.sort()
+		return [mask_of(passed_cards_list[passing_idx]) for passing_idx in passing_idx_list]
 			
 	
+	def generate_human(self) -> Player:
+		"""Creates the human player sitting in the first seat
+
+		Parameters
+		----------
+		None
+
+		Return
+		------
+		Player: the human player, named by the user
+		"""
+		return Human()
+		
+		
 	def generate_players(self, num_of_players) -> None:
 		"""Generates the player objects based on the number of players
 
@@ -180,7 +220,7 @@ class Hearts:
 		------
 		None
 		"""
-		self.players.append(Human())
+		self.players.append(self.generate_human())
 		self.players.append(BasicAIPlayer("Player 2"))
 		for num in range(3,int(num_of_players)+1):
 			self.players.append(BetterAIPlayer(f"Player {num}"))
@@ -229,32 +269,28 @@ class Hearts:
 		"""Executes a game of hearts"""
 		round_count = 1
 		game_end = False
-		self.generate_players(self.num_of_player)
+		if len(self.players) == 0:
+			self.generate_players(self.num_of_player)
+		for player in self.players:
+			player.presenter = self.presenter
+		dealer = DealGenerator(self.generate_deck(self.num_of_player), self.num_of_player)
 		
 		while not game_end:
-			time.sleep(0.25)
-			print(f"========= Starting round {round_count} =========")
-			deck_list = self.generate_deck(self.num_of_player)
-			
-			while True:
-				self.deal_card(self.players, deck_list)
-				if self.check_deal_valid(self.players)==True:
-					for player in self.players:
-						player.hand.sort()
-					break
-			self.pass_cards(self.players, round_count)
-			time.sleep(0.25)
-			print("Cards have been passed")
-			Round(self.players)
-			time.sleep(0.25)
-			print(f"========= End of round {round_count} =========")
-			for player in self.players:
-				print(f"{player}'s total score: {player.total_score}")
+			self.presenter.round_started(round_count)
+			for player, hand_mask in zip(self.players, dealer.deal(self.rng)):
+				player.hand = Hand.from_mask(hand_mask)
+			self.presenter.cards_dealt(self.players)
+			passes = self.pass_cards(self.players, round_count)
+			self.presenter.cards_passed()
+			Round(self.players, self.presenter, RoundObservation(len(self.players), passes, round_count))
+			self.presenter.round_ended(round_count, self.players)
 			
-			if self.game_end(self.players)[0]:
+			is_game_end, winner_idx = self.game_end(self.players)
+			if is_game_end:
 				game_end = True
-				winner_idx = self.game_end(self.players)[1]
-				print(f"{self.players[winner_idx]} is the winner!")
+				self.round_count = round_count
+				self.winner_idx = winner_idx
+				self.presenter.game_won(self.players[winner_idx])
 			else:
 				round_count += 1
 	
@@ -272,7 +308,7 @@ class Hearts:
 		"""
 		input_invalid = True
 		while input_invalid:
-			num_of_player = input("Please enter the number of players (3-5): ")
+			num_of_player = self.presenter.ask("Please enter the number of players (3-5): ")
 			
 			if not num_of_player.isdigit():
 				continue
@@ -294,7 +330,7 @@ class Hearts:
 		"""
 		input_invalid = True
 		while input_invalid:
-			target_score = input("Please enter a target score to end the game(at least 10): ")
+			target_score = self.presenter.ask("Please enter a target score to end the game(at least 10): ")
 			
 			if not target_score.isdigit():
 				continue
@@ -305,8 +341,10 @@ class Hearts:
 			
 			
 if __name__ == "__main__":
+	# imported here, since instrumentation imports this module
+	from instrumentation import instrument_from_env
+	instrument_from_env((Hearts,))
 	Hearts()
-	pass
 	
 	
 	
@@ -1,21 +1,22 @@
 from __future__ import annotations
-from cards import Card, Rank, Suit
+from cards import Card, Rank, Suit, card_list_art
+from observation import SeatObservation
 from player import Player
-import time
+from rules import is_first_trick, legal_moves_with_reason
 
 class Human(Player):
 	"""A class to represent the human players.
 
 	Methods
 	-------
-	play_card(self, trick: list[Card], broken_hearts: bool) -> Card
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
 		returns the Card that will be played for the turn 
 
 	pass_cards(self) -> list[Card]
 		returns the list of Cards that will be passed
 	
 	Methods defined here:
-	__init__(self) -> None
+	__init__(self, name: str = None) -> None
 		gets the player name from user and inherits the attributes of Player class
 	
 	
@@ -46,12 +47,13 @@ class Human(Player):
 	"""
 	
 	
-	def __init__(self) -> None: 
+	def __init__(self, name: str = None) -> None: 
 		"""Constructs all the necessary attributes for the human player object.
 		
 		Parameters
 		----------
-		None
+		name: str
+			name of the player, prompted for from the user when None
 
 		Attributes:
 		name: str
@@ -69,10 +71,10 @@ class Human(Player):
 		------
 		None
 		"""
-		self.name = input("Please enter your player name: ")
+		self.name = name if name is not None else input("Please enter your player name: ")
 		super().__init__(self.name)
 		
-	def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
 		"""Returns the card based on the player's decision
 
 		Parameters
@@ -81,38 +83,36 @@ class Human(Player):
 			list of Cards in played order from trick
 		broken_hearts: bool
 			indicates whether Hearts have been broken before
+		observation: SeatObservation
+			the round seen from the player's seat, left to the human to remember
 
 		Return
 		------
 		A Card that will be played
 		"""
 		
-		time.sleep(0.5)
-		print("Current trick:\n" + self.get_card_list_art(trick, False))
-		time.sleep(0.5)
+		self.presenter.show_cards("Current trick", trick, False)
 		self.hand.sort()
-		print("Current hand:\n" + self.get_card_list_art(self.hand, True))
+		self.presenter.show_cards("Current hand", self.hand, True)
+		valid_cards, invalid_reason = legal_moves_with_reason(self.hand, trick, broken_hearts, is_first_trick(self.hand, trick))
 			
 		while True:
-			time.sleep(0.25)
-			card_idx = input('Select a card to play: ')
+			card_idx = self.presenter.ask('Select a card to play: ')
 				
 			if card_idx.isdigit():
 				if int(card_idx)>=0 and int(card_idx)<len(self.hand):
 					card_to_check = self.hand[int(card_idx)]
 					
-					if self.check_valid_play(card_to_check, trick, broken_hearts)[0]:
+					if card_to_check in valid_cards:
 						self.hand.remove(card_to_check)
 						return card_to_check
 					else:
-						time.sleep(0.25)
-						print(self.check_valid_play(card_to_check, trick, broken_hearts)[1])
+						self.presenter.show_error(invalid_reason)
 						continue
 				else:
 					continue
 			else:
-				time.sleep(0.25)
-				print(f"You can only input one integer between 0 and {len(self.hand)-1}")
+				self.presenter.show_error(f"You can only input one integer between 0 and {len(self.hand)-1}")
 	
 	def check_no_duplicate_int(self, any_list: list) -> bool:
 		"""Checks if there exists a duplicate the input recieved or an unwanted input type
@@ -148,13 +148,11 @@ class Human(Player):
 		------
 		A list Card that will be passed
 		"""
-		time.sleep(0.5)
-		print("Current hand:\n" + self.get_card_list_art(self.hand, True))
+		self.presenter.show_cards("Current hand", self.hand, True)
 		
 		input_valid = False
 		while not input_valid:
-			time.sleep(0.25)
-			card_idx_input = input(f"Select three cards to pass off (e.g. '0, 4, 5') : ")
+			card_idx_input = self.presenter.ask(f"Select three cards to pass off (e.g. '0, 4, 5') : ")
 			card_idx_list = card_idx_input.replace(" ","").split(",")
 			
 			if len(card_idx_list)==3 and self.check_no_duplicate_int(card_idx_list):
@@ -163,8 +161,7 @@ class Human(Player):
 					if int(idx)<0 or int(idx)>=len(self.hand):
 						input_valid = False
 			if input_valid == False:
-				time.sleep(0.25)
-				print(f"You can only input three unique integers between 0 and {len(self.hand)-1}")
+				self.presenter.show_error(f"You can only input three unique integers between 0 and {len(self.hand)-1}")
 		out = []
 		for idx in card_idx_list:
 			out.append(self.hand[int(idx)])
@@ -188,32 +185,7 @@ class Human(Player):
 		------
 		A list Card that will be passed
 		"""
-		if len(card_list)>0:
-			temp = []
-			out = ""
-			
-			for card in card_list:
-				temp.append(card.get_card_art()[0])
-				
-			if add_idx == True:
-				for row in range(len(temp[0])+1):
-					for card_i in range(len(card_list)):
-						if row == len(temp[0]):
-							if card_i >= 10:
-								out+= f"   {card_i}  "
-							else:
-								out+= f"   {card_i}   "
-						else:
-							out += (temp[card_i][row])
-					out += "\n"
-			else:
-				for row in range(len(temp[0])):
-					for card_i in range(len(card_list)):
-						out += (temp[card_i][row])
-					out += "\n"
-			return out
-		else:
-			return "You are leading, please choose a leading card."
+		return card_list_art(card_list, add_idx)
 		
 			
 
@@ -0,0 +1,356 @@
+"""
+Optional timing and counting of the phases of a game.
+
+Nothing in the game calls into this module. Instruments.install wraps the
+methods of each phase with a timer, and Instruments.uninstall puts the
+original methods back. While it is not installed the game runs its own code
+untouched, so the cost is nil.
+
+Each phase records its number of calls, its wall and CPU time, and a
+histogram of wall times with four buckets per doubling, from which the
+p50/p95/p99 latencies are read. Times are inclusive: a human play_card that
+renders its hand also counts towards rendering. Statistics are plain counters,
+so those of several processes can be merged. They can be dumped as JSON or as
+Prometheus text.
+
+Set the HEARTS_INSTRUMENT environment variable to a file name to instrument
+hearts.py or curses_ui.py and dump the statistics when the game exits.
+"""
+
+from __future__ import annotations
+from deals import DealGenerator
+from hearts import Hearts
+from player import Player
+from presenter import NullPresenter
+from round import Round
+import atexit
+import functools
+import json
+import math
+import os
+import time
+
+BUCKETS_PER_DOUBLING = 4
+PRESENTER_EVENTS = ("welcome", "round_started", "cards_dealt", "cards_passed", "card_played", "hearts_broken", "trick_taken", "moon_shot", "round_ended", "game_won", "show_cards", "show_error", "ask", "show_hand", "select_cards")
+SCORING_STEPS = ("highest_player", "update_score", "check_shooting_the_moon")
+
+
+def label_text(labels: list[tuple[str, str]]) -> str:
+	"""Formats (label, value) pairs as Prometheus labels, e.g. {phase="deal"}"""
+	pairs = []
+	for label, value in labels:
+		escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+		pairs.append(f'{label}="{escaped}"')
+	return "{" + ",".join(pairs) + "}"
+
+
+def all_subclasses(cls: type) -> list[type]:
+	"""Lists a class and every class derived from it that has been imported"""
+	out = [cls]
+	for subclass in cls.__subclasses__():
+		out.extend(all_subclasses(subclass))
+	return out
+
+
+
+class PhaseStats:
+	"""A class to represent the timings of one phase.
+
+	Attributes
+	----------
+	count: int
+		number of calls
+	wall_ns: int
+		total wall time, in nanoseconds
+	cpu_ns: int
+		total CPU time of the calling thread, in nanoseconds
+	buckets: dict[int, int]
+		number of calls in each bucket of wall time, bucket b holding times up to 2**(b/BUCKETS_PER_DOUBLING) ns
+
+	Methods
+	-------
+	add(self, wall_ns: int, cpu_ns: int) -> None
+		Counts one call
+
+	merge(self, other: PhaseStats) -> None
+		Adds the counts of another PhaseStats
+
+	percentile(self, fraction: float) -> float
+		Returns a percentile of the wall time, in seconds
+
+	Methods defined here:
+	__init__(self) -> None
+		Constructs empty timings.
+	"""
+	def __init__(self) -> None:
+		self.count = 0
+		self.wall_ns = 0
+		self.cpu_ns = 0
+		self.buckets = {}
+
+
+	def add(self, wall_ns: int, cpu_ns: int) -> None:
+		"""Counts one call taking wall_ns of wall time and cpu_ns of CPU time"""
+		self.count += 1
+		self.wall_ns += wall_ns
+		self.cpu_ns += cpu_ns
+		bucket = math.ceil(math.log2(max(wall_ns, 1)) * BUCKETS_PER_DOUBLING)
+		self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+
+	def merge(self, other: PhaseStats) -> None:
+		"""Adds the counts of another PhaseStats"""
+		self.count += other.count
+		self.wall_ns += other.wall_ns
+		self.cpu_ns += other.cpu_ns
+		for bucket, count in other.buckets.items():
+			self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+
+	def percentile(self, fraction: float) -> float:
+		"""Returns the upper bound of the bucket holding the given fraction of calls, in seconds"""
+		seen = 0
+		for bucket in sorted(self.buckets):
+			seen += self.buckets[bucket]
+			if seen >= fraction*self.count:
+				return 2 ** (bucket / BUCKETS_PER_DOUBLING) / 1e9
+		return 0.0
+
+
+
+class Instruments:
+	"""A class to represent the phase timings of games, and the wrappers that collect them.
+
+	Attributes
+	----------
+	phases: dict[tuple[str, tuple], PhaseStats]
+		the timings of each phase, keyed by the phase name and its (label, value) pairs
+	originals: list[tuple[type, str, Callable]]
+		the methods replaced by install, to put back on uninstall
+
+	Methods
+	-------
+	record(self, phase: str, labels: tuple, wall_ns: int, cpu_ns: int) -> None
+		Counts one call of a phase
+
+	timed(self, func, phase: str, labels) -> Callable
+		Wraps a method so every call of it is recorded
+
+	install(self, game_classes: tuple = ()) -> None
+		Wraps the methods of every phase of the game
+
+	uninstall(self) -> None
+		Puts the original methods back
+
+	take(self) -> Instruments
+		Returns the timings so far and starts counting afresh
+
+	merge(self, other: Instruments) -> None
+		Adds the timings of another Instruments, e.g. from a worker process
+
+	to_json(self) -> str
+		Returns every phase as JSON
+
+	to_prometheus(self) -> str
+		Returns every phase in the Prometheus text format
+
+	dump(self, path: str) -> None
+		Writes Prometheus text if path ends in .prom, JSON otherwise
+
+	Methods defined here:
+	__init__(self) -> None
+		Constructs empty timings, not installed.
+	"""
+	def __init__(self) -> None:
+		self.phases = {}
+		self.originals = []
+
+
+	def __getstate__(self) -> dict:
+		# only the timings are sent between processes
+		return {"phases": self.phases, "originals": []}
+
+
+	def record(self, phase: str, labels: tuple, wall_ns: int, cpu_ns: int) -> None:
+		"""Counts one call of a phase
+
+		Parameters
+		----------
+		phase: str
+			name of the phase
+		labels: tuple
+			(label, value) pairs telling apart calls of the same phase
+		wall_ns: int
+			wall time of the call, in nanoseconds
+		cpu_ns: int
+			CPU time of the call, in nanoseconds
+
+		Return
+		------
+		None
+		"""
+		key = (phase, labels)
+		stats = self.phases.get(key)
+		if stats is None:
+			stats = self.phases[key] = PhaseStats()
+		stats.add(wall_ns, cpu_ns)
+
+
+	def timed(self, func, phase: str, labels):
+		"""Wraps a method so every call of it is recorded
+
+		Parameters
+		----------
+		func: Callable
+			the method to wrap
+		phase: str
+			name of the phase
+		labels: tuple | Callable
+			the (label, value) pairs of the phase, or a function of the instance returning them
+
+		Return
+		------
+		Callable: the wrapper
+		"""
+		record = self.record
+		perf_counter_ns = time.perf_counter_ns
+		thread_time_ns = time.thread_time_ns
+
+		@functools.wraps(func)
+		def wrapper(instance, *args, **kwargs):
+			wall = perf_counter_ns()
+			cpu = thread_time_ns()
+			try:
+				return func(instance, *args, **kwargs)
+			finally:
+				record(phase, labels(instance) if callable(labels) else labels, perf_counter_ns()-wall, thread_time_ns()-cpu)
+		return wrapper
+
+
+	def wrap(self, cls: type, name: str, phase: str, labels) -> None:
+		"""Replaces a method defined by cls itself with a timed wrapper"""
+		func = cls.__dict__.get(name)
+		if func is None:
+			return
+		self.originals.append((cls, name, func))
+		setattr(cls, name, self.timed(func, phase, labels))
+
+
+	def install(self, game_classes: tuple = ()) -> None:
+		"""Wraps the methods of every phase of the game
+
+		The phases are dealing, passing, the play_card of every AI or human
+		by seat and strategy, check_valid_play, scoring, rendering and
+		sleeping. Only classes imported before install are instrumented.
+
+		Parameters
+		----------
+		game_classes: tuple
+			other classes defining the methods of Hearts, such as the Hearts of a script run as __main__
+
+		Return
+		------
+		None
+		"""
+		if self.originals:
+			return
+		self.wrap(DealGenerator, "deal", "deal", ())
+		for game_cls in (Hearts,) + tuple(game_classes):
+			self.wrap(game_cls, "deal_card", "deal_card", ())
+			self.wrap(game_cls, "check_deal_valid", "check_deal_valid", ())
+			self.wrap(game_cls, "pass_cards", "pass_cards", ())
+		for step in SCORING_STEPS:
+			self.wrap(Round, step, "scoring", (("step", step),))
+		for cls in all_subclasses(Player):
+			self.wrap(cls, "play_card", "play_card", lambda player: (("seat", player.name), ("strategy", type(player).__name__)))
+			self.wrap(cls, "check_valid_play", "check_valid_play", ())
+		for cls in all_subclasses(NullPresenter):
+			if cls is NullPresenter:
+				continue
+			for event in PRESENTER_EVENTS:
+				self.wrap(cls, event, "render", (("event", event), ("presenter", cls.__name__)))
+			self.wrap(cls, "pause", "sleep", (("presenter", cls.__name__),))
+
+
+	def uninstall(self) -> None:
+		"""Puts the original methods back"""
+		for cls, name, func in reversed(self.originals):
+			setattr(cls, name, func)
+		self.originals = []
+
+
+	def take(self) -> Instruments:
+		"""Returns the timings so far in a new Instruments and starts counting afresh"""
+		taken = Instruments()
+		taken.phases = self.phases
+		self.phases = {}
+		return taken
+
+
+	def merge(self, other: Instruments) -> None:
+		"""Adds the timings of another Instruments, e.g. from a worker process"""
+		for key, stats in other.phases.items():
+			self.phases.setdefault(key, PhaseStats()).merge(stats)
+
+
+	def summary(self) -> list[dict]:
+		"""Returns the count, times and percentiles of every phase, slowest total first"""
+		out = []
+		for (phase, labels), stats in sorted(self.phases.items(), key=lambda item: -item[1].wall_ns):
+			out.append({
+				"phase": phase,
+				"labels": dict(labels),
+				"count": stats.count,
+				"wall_seconds": stats.wall_ns / 1e9,
+				"cpu_seconds": stats.cpu_ns / 1e9,
+				"p50_seconds": stats.percentile(0.50),
+				"p95_seconds": stats.percentile(0.95),
+				"p99_seconds": stats.percentile(0.99),
+			})
+		return out
+
+
+	def to_json(self) -> str:
+		"""Returns every phase as JSON"""
+		return json.dumps({"phases": self.summary()}, indent=2)
+
+
+	def to_prometheus(self) -> str:
+		"""Returns every phase in the Prometheus text format, as a summary of wall seconds and a CPU seconds counter"""
+		lines = ["# TYPE hearts_phase_seconds summary", "# HELP hearts_phase_seconds Wall time of each phase of the game"]
+		cpu_lines = ["# TYPE hearts_phase_cpu_seconds_total counter", "# HELP hearts_phase_cpu_seconds_total CPU time of each phase of the game"]
+		for entry in self.summary():
+			labels = [("phase", entry["phase"])] + list(entry["labels"].items())
+			for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("0.99", "p99_seconds")):
+				lines.append(f"hearts_phase_seconds{label_text(labels + [('quantile', quantile)])} {entry[key]:.9g}")
+			lines.append(f"hearts_phase_seconds_sum{label_text(labels)} {entry['wall_seconds']:.9g}")
+			lines.append(f"hearts_phase_seconds_count{label_text(labels)} {entry['count']}")
+			cpu_lines.append(f"hearts_phase_cpu_seconds_total{label_text(labels)} {entry['cpu_seconds']:.9g}")
+		return "\n".join(lines + cpu_lines) + "\n"
+
+
+	def dump(self, path: str) -> None:
+		"""Writes the timings to path, as Prometheus text if it ends in .prom and as JSON otherwise"""
+		with open(path, "w") as file:
+			file.write(self.to_prometheus() if path.endswith(".prom") else self.to_json() + "\n")
+
+
+def instrument_from_env(game_classes: tuple = ()) -> Instruments:
+	"""Installs instruments if HEARTS_INSTRUMENT names a file, dumping them there when the program exits
+
+	Parameters
+	----------
+	game_classes: tuple
+		other classes defining the methods of Hearts, see Instruments.install
+
+	Return
+	------
+	Instruments: the installed instruments, None if the variable is not set
+	"""
+	path = os.environ.get("HEARTS_INSTRUMENT")
+	if not path:
+		return None
+	instruments = Instruments()
+	instruments.install(game_classes)
+	atexit.register(instruments.dump, path)
+	return instruments
@@ -0,0 +1,367 @@
+"""
+Perfect-information Monte Carlo (determinization) AI player.
+
+For every decision the player samples layouts of the cards it has not seen,
+consistent with what it knows: how many cards each seat holds, which
+suits each seat has shown to be void in and where the cards it passed went. Each legal card is tried in every
+sampled layout and the rest of the round is played out by the rollout
+engine. The card with the best average result is played.
+
+Samples are evaluated in chunks, in this process or on a worker pool, until
+the sample count is reached or the time budget runs out.
+"""
+
+from __future__ import annotations
+from bitboard import SUIT_MASKS, cards_of, deck_mask, mask_of, penalty, trick_winner
+from cards import Card
+from multiprocessing import Pool
+from observation import SeatObservation
+from player import Player
+from rollout import play_out
+from solver import DoubleDummySolver
+from rules import is_first_trick, legal_mask
+import random
+import time
+
+CHUNK_SIZE = 4
+MAX_SAMPLE_ATTEMPTS = 20
+
+# each process keeps one solver, so its transposition table is shared by every decision
+_endgame_solver = None
+
+
+def sample_layout(rng: random.Random, unseen: int, counts: list[int], voids: list[int]) -> list[int]:
+	"""Deals the unseen cards to the other seats at random, respecting known voids
+
+	Cards that fit the fewest seats are dealt first, and each card goes to a
+	seat with probability proportional to the room left in that seat's hand.
+	If the voids cannot be respected after a few attempts they are ignored.
+
+	Parameters
+	----------
+	rng: random.Random
+		random number generator to draw from
+	unseen: int
+		mask of the cards not seen by the player
+	counts: list[int]
+		number of unseen cards each seat holds, 0 for the player's own seat
+	voids: list[int]
+		mask of the suits each seat is known to be void in
+
+	Return
+	------
+	list[int]: the sampled hand mask of each seat, 0 for the player's own seat
+	"""
+	bits = [card.bit for card in cards_of(unseen)]
+	for attempt in range(MAX_SAMPLE_ATTEMPTS+1):
+		if attempt == MAX_SAMPLE_ATTEMPTS:
+			voids = [0]*len(counts)
+		rng.shuffle(bits)
+		bits.sort(key=lambda bit: sum(1 for seat_idx in range(len(counts)) if counts[seat_idx] and not voids[seat_idx] & bit))
+		room = counts[:]
+		hands = [0]*len(counts)
+		for bit in bits:
+			seats = [seat_idx for seat_idx in range(len(room)) if room[seat_idx] and not voids[seat_idx] & bit]
+			if len(seats) == 0:
+				break
+			seat_idx = rng.choices(seats, [room[seat_idx] for seat_idx in seats])[0]
+			hands[seat_idx] |= bit
+			room[seat_idx] -= 1
+		else:
+			return hands
+	raise ValueError("The unseen cards do not fit the hand sizes")
+
+
+def evaluate_layouts(position: tuple, moves: list[int], num_of_samples: int, seed: int, solve_endgame: bool = False) -> list[float]:
+	"""Samples layouts and plays out, or solves, every move in each of them
+
+	Parameters
+	----------
+	position: tuple
+		(seat_idx, hand, unseen, counts, voids, known, leader_idx, trick, points, broken_hearts, first_trick), as built by MonteCarloAIPlayer.position
+	moves: list[int]
+		bits of the legal cards to try
+	num_of_samples: int
+		number of layouts to sample
+	seed: int
+		seed of the sampling
+	solve_endgame: bool
+		score each move with the double-dummy solver instead of a play-out
+
+	Return
+	------
+	list[float]: for every move, the sum over the layouts of the player's score minus the average score of the
+	others, or of the player's score against best play when solving
+	"""
+	global _endgame_solver
+	seat_idx, hand, unseen, counts, voids, known, leader_idx, trick, points, broken_hearts, first_trick = position
+	rng = random.Random(seed)
+	num_of_player = len(counts)
+	sums = [0.0]*len(moves)
+	if solve_endgame and _endgame_solver is None:
+		_endgame_solver = DoubleDummySolver(16)
+	for _ in range(num_of_samples):
+		hands = sample_layout(rng, unseen, counts, voids)
+		for other_idx, known_mask in enumerate(known):
+			hands[other_idx] |= known_mask
+		for move_idx, bit in enumerate(moves):
+			hands[seat_idx] = hand ^ bit
+			if solve_endgame:
+				sums[move_idx] += _endgame_solver.solve(hands, leader_idx, trick + [bit], points, broken_hearts, first_trick, seat_idx)[0]
+				continue
+			scores = play_out(hands, leader_idx, trick + [bit], points, broken_hearts, first_trick)
+			sums[move_idx] += scores[seat_idx] - (sum(scores) - scores[seat_idx]) / (num_of_player-1)
+	return sums
+
+
+def evaluate_layouts_task(task: tuple) -> list[float]:
+	"""Unpacks a (position, moves, num_of_samples, seed, solve_endgame) task for evaluate_layouts"""
+	return evaluate_layouts(*task)
+
+
+
+class MonteCarloAIPlayer(Player):
+	"""A class to represent the Monte Carlo ai players.
+
+	It reads the cards played, the points taken, the voids shown and the
+	cards it passed from the observation handed to play_card. Played without
+	one, it tracks all but the passed cards itself through the
+	observe_round_start and observe_trick hooks.
+
+	Attributes
+	----------
+	num_of_samples: int
+		number of layouts sampled for each decision
+	time_budget: float
+		seconds allowed for each decision, at least one chunk of samples is always evaluated
+	workers: int
+		number of worker processes evaluating samples, 0 to evaluate in this process
+	rng: random.Random
+		random number generator for the sampling
+	endgame_tricks: int
+		number of last tricks scored with the double-dummy solver instead of play-outs
+	rollouts: int
+		number of play-outs or solves run so far
+
+	Methods
+	-------
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
+		returns the Card with the best average result over the sampled layouts
+
+	pass_cards(self) -> list[Card]
+		returns the list of Cards that will be passed
+
+	position(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> tuple
+		returns what the player knows of the round, for evaluate_layouts
+
+	evaluate(self, position: tuple, moves: list[int]) -> list[float]
+		returns the average result of every move
+
+	close(self) -> None
+		Stops the worker pool
+
+	Methods defined here:
+	__init__(self, name: str, num_of_samples: int = 64, time_budget: float = 1.0, workers: int = 0, seed: int = None, endgame_tricks: int = 0) -> None
+		Constructs the necessary attributes of a MonteCarloAIPlayer object.
+	"""
+	def __init__(self, name: str, num_of_samples: int = 64, time_budget: float = 1.0, workers: int = 0, seed: int = None, endgame_tricks: int = 0) -> None:
+		"""Constructs all the necessary attributes for the MonteCarloAIPlayer object.
+
+		Parameters
+		----------
+		name: str
+			name of player
+		num_of_samples: int
+			number of layouts sampled for each decision, at least 1
+		time_budget: float
+			seconds allowed for each decision
+		workers: int
+			number of worker processes evaluating samples, 0 to evaluate in this process
+		seed: int
+			seed of the sampling, the player's name when None so headless games can be replayed
+		endgame_tricks: int
+			once the hand is down to this many cards, every layout is solved exactly instead of played out
+
+		Return
+		------
+		None
+		"""
+		if num_of_samples < 1:
+			raise ValueError("A Monte Carlo player samples at least one layout")
+		super().__init__(name)
+		self.num_of_samples = num_of_samples
+		self.time_budget = time_budget
+		self.workers = workers
+		self.endgame_tricks = endgame_tricks
+		self.rng = random.Random(name if seed is None else seed)
+		self.rollouts = 0
+		self.pool = None
+		self.players = []
+		self.seat_idx = 0
+		self.played = 0
+		self.points = []
+		self.voids = []
+
+
+	def observe_round_start(self, players: list[Player]) -> None:
+		"""Forgets the previous round and finds the player's seat"""
+		self.players = players
+		self.seat_idx = players.index(self)
+		self.played = 0
+		self.points = [0]*len(players)
+		self.voids = [0]*len(players)
+
+
+	def observe_trick(self, leader_idx: int, trick: list[Card]) -> None:
+		"""Records the cards played, the points taken and any suit a player failed to follow"""
+		lead_suit_mask = SUIT_MASKS[trick[0].suit]
+		trick_mask = mask_of(trick)
+		for offset, card in enumerate(trick):
+			if not card.bit & lead_suit_mask:
+				self.voids[(leader_idx+offset) % len(self.players)] |= lead_suit_mask
+		self.points[(leader_idx + trick_winner(trick)) % len(self.players)] += penalty(trick_mask)
+		self.played |= trick_mask
+
+
+	def position(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> tuple:
+		"""Returns what the player knows of the round, for evaluate_layouts
+
+		Parameters
+		----------
+		trick: list[Card]
+			list of Cards in played order from trick
+		broken_hearts: bool
+			indicates whether Hearts have been broken before
+		observation: SeatObservation
+			the round seen from the player's seat, what the hooks tracked when None
+
+		Return
+		------
+		tuple: (seat_idx, hand, unseen, counts, voids, known, leader_idx, trick, points, broken_hearts, first_trick),
+		known being the cards each other seat is known to hold, which are not in unseen nor in counts
+		"""
+		num_of_player = len(self.players)
+		hand = mask_of(self.hand)
+		trick_mask = mask_of(trick)
+		leader_idx = (self.seat_idx - len(trick)) % num_of_player
+		if observation is None:
+			played, voids, points = self.played, self.voids[:], self.points[:]
+			known = [0]*num_of_player
+		else:
+			played, voids, points = observation.played, list(observation.voids), list(observation.points)
+			known = [observation.known_cards(seat_idx) for seat_idx in range(num_of_player)]
+		unseen = deck_mask(num_of_player) & ~(played | hand | trick_mask)
+		counts = []
+		for seat_idx in range(num_of_player):
+			if seat_idx == self.seat_idx:
+				counts.append(0)
+				continue
+			unseen &= ~known[seat_idx]
+			if (seat_idx - leader_idx) % num_of_player < len(trick):
+				counts.append(len(self.hand)-1 - known[seat_idx].bit_count())
+			else:
+				counts.append(len(self.hand) - known[seat_idx].bit_count())
+		return (self.seat_idx, hand, unseen, counts, voids, known, leader_idx, [card.bit for card in trick], points, broken_hearts, is_first_trick(self.hand, trick))
+
+
+	def evaluate(self, position: tuple, moves: list[int]) -> list[float]:
+		"""Returns the average result of every move over as many samples as the budget allows
+
+		Parameters
+		----------
+		position: tuple
+			what the player knows of the round, from position
+		moves: list[int]
+			bits of the legal cards to try
+
+		Return
+		------
+		list[float]: for every move, the average of the player's score minus the average score of the others
+		"""
+		deadline = time.perf_counter() + self.time_budget
+		solve_endgame = len(self.hand) <= self.endgame_tricks
+		chunks = [min(CHUNK_SIZE, self.num_of_samples-done) for done in range(0, self.num_of_samples, CHUNK_SIZE)]
+		sums = [0.0]*len(moves)
+		num_of_samples = 0
+
+		if self.workers == 0:
+			for chunk in chunks:
+				for move_idx, move_sum in enumerate(evaluate_layouts(position, moves, chunk, self.rng.getrandbits(64), solve_endgame)):
+					sums[move_idx] += move_sum
+				num_of_samples += chunk
+				if time.perf_counter() >= deadline:
+					break
+		else:
+			if self.pool is None:
+				self.pool = Pool(self.workers)
+			# keep every worker busy, but stop handing out chunks once the time is up
+			pending = []
+			chunk_sizes = []
+			chunk_idx = 0
+			while chunk_idx < len(chunks) or pending:
+				while chunk_idx < len(chunks) and len(pending) < 2*self.workers and (chunk_idx == 0 or time.perf_counter() < deadline):
+					pending.append(self.pool.apply_async(evaluate_layouts_task, ((position, moves, chunks[chunk_idx], self.rng.getrandbits(64), solve_endgame),)))
+					chunk_sizes.append(chunks[chunk_idx])
+					chunk_idx += 1
+				if time.perf_counter() >= deadline:
+					chunk_idx = len(chunks)
+				result = pending.pop(0)
+				chunk = chunk_sizes.pop(0)
+				for move_idx, move_sum in enumerate(result.get()):
+					sums[move_idx] += move_sum
+				num_of_samples += chunk
+
+		self.rollouts += num_of_samples*len(moves)
+		return [move_sum/num_of_samples for move_sum in sums]
+
+
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
+		"""Makes the decision for the card that the ai will choose to play
+
+		Parameters
+		----------
+		trick: list[Card]
+			list of Cards in played order from trick
+		broken_hearts: bool
+			indicates whether Hearts have been broken before
+		observation: SeatObservation
+			the round seen from the player's seat, tracked by the player itself when None
+
+		Return
+		------
+		A Card that will be played
+		"""
+		legal = legal_mask(mask_of(self.hand), trick, broken_hearts, is_first_trick(self.hand, trick))[0]
+		valid_cards = cards_of(legal)
+		if len(valid_cards) == 1 or len(self.players) == 0:
+			final = valid_cards[0]
+		else:
+			results = self.evaluate(self.position(trick, broken_hearts, observation), [card.bit for card in valid_cards])
+			final = valid_cards[results.index(min(results))]
+		self.hand.remove(final)
+		return final
+
+
+	def pass_cards(self) -> list[Card]:
+		"""Makes the decision for the cards that the ai will choose to pass
+
+		Parameters
+		----------
+		None
+
+		Return
+		------
+		A list Card that will be passed
+		"""
+		pass_list = []
+		for _ in range(3):
+			pass_list.append(max(self.hand))
+			self.hand.remove(max(self.hand))
+		return pass_list
+
+
+	def close(self) -> None:
+		"""Stops the worker pool, if one was started"""
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool = None
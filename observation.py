@@ -0,0 +1,191 @@
+"""
+What each seat can know about a round, kept up to date by the engine.
+
+A RoundObservation follows one round from the first card: every card played,
+the suits each seat has shown to be void in by not following the lead, the
+points each seat has taken and the cards each seat passed. Round and Table
+record every card and trick as it happens, in constant time, and hand the
+player to play a SeatObservation, a read-only view of the round from its
+seat, as the observation argument of play_card. A player gets the whole
+history of the round without keeping or recomputing it.
+"""
+
+from __future__ import annotations
+from bitboard import INDEX_SUIT_MASK, deck_mask
+
+
+class RoundObservation:
+	"""A class to represent the public history of a round, updated by the engine.
+
+	Attributes
+	----------
+	num_of_player: int
+		number of seats
+	deck: int
+		mask of the cards dealt this round
+	played: int
+		mask of every card played this round, including the current trick
+	voids: list[int]
+		mask of the suits each seat has failed to follow
+	points: list[int]
+		penalty points each seat has taken this round, before shooting the moon
+	passes: list[int]
+		mask of the cards each seat passed, 0 if unknown
+	passed_to: list[int]
+		the seat each seat passed to
+	views: list[SeatObservation]
+		the view of each seat
+
+	Methods
+	-------
+	record_card(self, seat_idx: int, bit: int, lead_bit: int) -> None
+		Records a card played to the current trick
+
+	record_trick(self, winner_idx: int, penalty_sum: int) -> None
+		Records the points of a finished trick
+
+	Methods defined here:
+	__init__(self, num_of_player: int, passes: list[int] = None, round_count: int = 0) -> None
+		Constructs the observation of a round before its first card.
+	"""
+	__slots__ = ("num_of_player", "deck", "played", "voids", "points", "passes", "passed_to", "views")
+
+	def __init__(self, num_of_player: int, passes: list[int] = None, round_count: int = 0) -> None:
+		"""Constructs all the necessary attributes for the RoundObservation object.
+
+		Parameters
+		----------
+		num_of_player: int
+			number of seats
+		passes: list[int]
+			mask of the cards each seat passed, none when None
+		round_count: int
+			the round being played, from 1, as seat i passes to seat (i+round_count) % num_of_player
+
+		Return
+		------
+		None
+		"""
+		self.num_of_player = num_of_player
+		self.deck = deck_mask(num_of_player)
+		self.played = 0
+		self.voids = [0]*num_of_player
+		self.points = [0]*num_of_player
+		self.passes = [0]*num_of_player if passes is None else list(passes)
+		self.passed_to = [(seat_idx+round_count) % num_of_player for seat_idx in range(num_of_player)]
+		self.views = [SeatObservation(self, seat_idx) for seat_idx in range(num_of_player)]
+
+
+	def record_card(self, seat_idx: int, bit: int, lead_bit: int) -> None:
+		"""Records a card played to the current trick
+
+		Parameters
+		----------
+		seat_idx: int
+			the seat that played the card
+		bit: int
+			the bit of the card
+		lead_bit: int
+			the bit of the card that led the trick, the card itself when it leads
+
+		Return
+		------
+		None
+		"""
+		self.played |= bit
+		lead_suit_mask = INDEX_SUIT_MASK[lead_bit.bit_length()-1]
+		if not bit & lead_suit_mask:
+			self.voids[seat_idx] |= lead_suit_mask
+
+
+	def record_trick(self, winner_idx: int, penalty_sum: int) -> None:
+		"""Records the points of a finished trick"""
+		self.points[winner_idx] += penalty_sum
+
+
+
+class SeatObservation:
+	"""A class to represent the read-only view of a round from one seat.
+
+	Attributes
+	----------
+	seat_idx: int
+		the seat the round is seen from
+	num_of_player: int
+		number of seats
+	played: int
+		mask of every card played this round, including the current trick
+	voids: tuple[int, ...]
+		mask of the suits each seat has failed to follow
+	points: tuple[int, ...]
+		penalty points each seat has taken this round, before shooting the moon
+	passed: int
+		mask of the cards this seat passed
+	passed_to: int
+		the seat this seat passed to
+
+	Methods
+	-------
+	known_cards(self, seat_idx: int) -> int
+		Returns the cards this seat knows another seat still holds
+
+	unseen(self, hand_mask: int) -> int
+		Returns the cards this seat has not seen
+
+	Methods defined here:
+	__init__(self, observation: RoundObservation, seat_idx: int) -> None
+		Constructs the view of a seat.
+	"""
+	__slots__ = ("_observation", "_seat_idx")
+
+	def __init__(self, observation: RoundObservation, seat_idx: int) -> None:
+		self._observation = observation
+		self._seat_idx = seat_idx
+
+
+	@property
+	def seat_idx(self) -> int:
+		return self._seat_idx
+
+
+	@property
+	def num_of_player(self) -> int:
+		return self._observation.num_of_player
+
+
+	@property
+	def played(self) -> int:
+		return self._observation.played
+
+
+	@property
+	def voids(self) -> tuple[int, ...]:
+		return tuple(self._observation.voids)
+
+
+	@property
+	def points(self) -> tuple[int, ...]:
+		return tuple(self._observation.points)
+
+
+	@property
+	def passed(self) -> int:
+		return self._observation.passes[self._seat_idx]
+
+
+	@property
+	def passed_to(self) -> int:
+		return self._observation.passed_to[self._seat_idx]
+
+
+	def known_cards(self, seat_idx: int) -> int:
+		"""Returns the cards this seat passed to another seat that have not been played since"""
+		observation = self._observation
+		if seat_idx == self._seat_idx or seat_idx != observation.passed_to[self._seat_idx]:
+			return 0
+		return observation.passes[self._seat_idx] & ~observation.played
+
+
+	def unseen(self, hand_mask: int) -> int:
+		"""Returns the cards of the deck that are neither in the hand nor played"""
+		return self._observation.deck & ~(self._observation.played | hand_mask)
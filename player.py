@@ -1,6 +1,8 @@
 from __future__ import annotations
-from cards import Card, Rank, Suit
-import time
+from bitboard import Hand, HEARTS_MASK, SUIT_MASKS, mask_of, trick_winner
+from cards import Card
+from presenter import TerminalPresenter
+from rules import is_first_trick, legal_mask
 
 
 class Player:
@@ -19,6 +21,12 @@ class Player:
 
 	highest_trick_card(self, trick: list[Card]) -> Card
 		returns the highest card in the trick with the same suit as the lead
+
+	observe_round_start(self, players: list[Player]) -> None
+		Called by the Round before the first trick, does nothing by default
+
+	observe_trick(self, leader_idx: int, trick: list[Card]) -> None
+		Called by the Round after every trick, does nothing by default
 	
 	Methods defined here:
 	__init__(self, name: str) -> None
@@ -37,17 +45,20 @@ class Player:
 		----------
 		name: str
 			name of player
-		hand: list[Card]
-			the current list of cards in hand
+		hand: Hand
+			the cards currently in hand, kept as a bitboard
+		presenter: NullPresenter
+			where a human player shows the game and reads their choices
 		
 		Return
 		------
 		None
 		"""
 		self.name = name
-		self.hand = []
+		self.hand = Hand()
 		self.round_score = 0
 		self.total_score = 0
+		self.presenter = TerminalPresenter()
 		
 		
 	def __repr__(self):
@@ -74,11 +85,7 @@ class Player:
 		False:
 			if there is not
 		"""
-		leading_suit = trick[0].suit
-		for card in self.hand:
-			if card.suit is leading_suit:
-				return True
-		return False
+		return bool(mask_of(self.hand) & SUIT_MASKS[trick[0].suit])
 	
 	
 	def check_all_hearts(self, hand_list) -> bool:
@@ -96,12 +103,7 @@ class Player:
 		False:
 			if there are none or at least 1 that is not
 		"""
-		is_all_hearts = True
-		
-		for card in hand_list:
-			if card.suit is not Suit.Hearts:
-				is_all_hearts = False
-		return is_all_hearts
+		return (mask_of(hand_list) & ~HEARTS_MASK) == 0
 	
 	
 	def check_valid_play(self, card: Card, trick: list[Card], broken_hearts: bool) -> tuple[bool, str]:
@@ -122,42 +124,10 @@ class Player:
 			bool: True if the card is allowed
 			str: an error message depending on the validation result
 		"""
-		Two_of_Clubs_in_hand = Card(Rank.Two, Suit.Clubs) in self.hand
-		play_Hearts = card.suit is Suit.Hearts
-		play_Queen_of_Spades = ( card == Card(Rank.Queen, Suit.Spades) )
-		play_Hearts_or_Queen_of_Spades 	= play_Hearts or play_Queen_of_Spades
-		
-		# leading
-		if len(trick) == 0:		
-			play_Two_Of_Clubs = (card == Card(Rank.Two, Suit.Clubs))
-		
-			invalid_play_1 = (Two_of_Clubs_in_hand, not play_Two_Of_Clubs)
-			invalid_play_2 = (not Two_of_Clubs_in_hand, not broken_hearts, play_Hearts) 
-		
-			if all(invalid_play_1):
-				time.sleep(0.25)
-				return (False, "Player MUST lead with the two of Clubs in the first hand, You can't use other cards.")
-			elif all(invalid_play_2):
-				time.sleep(0.25)
-				return (False, "Player cannot lead with a heart until hearts have been broken")
-			
-		# not leading
-		else:
-			is_first_round = Card(Rank.Two, Suit.Clubs) in trick
-			play_follow_suit = card.suit is trick[0].suit
-			suit_in_hand = self.check_suit_in_hand(trick)
-		
-			invalid_play_1 = (suit_in_hand, not play_follow_suit)
-			invalid_play_2 = (not suit_in_hand, is_first_round, play_Hearts_or_Queen_of_Spades)
-		
-			if all(invalid_play_1):
-				time.sleep(0.25)
-				return (False, "Player still has cards from the suit of the current trick.")
-			elif all(invalid_play_2):
-				time.sleep(0.25)
-				return (False, "Player cannot play hearts or spades on the first round.")
-		time.sleep(0.25)
-		return (True, "card valid")
+		legal, reason = legal_mask(mask_of(self.hand), trick, broken_hearts, is_first_trick(self.hand, trick))
+		if legal & card.bit:
+			return (True, "card valid")
+		return (False, reason)
 	
 	
 	def highest_trick_card(self, trick: list[Card]) -> Card:
@@ -173,14 +143,40 @@ class Player:
 		A card that is the highest while having the same suit as the lead suit
 		"""
 		if len(trick)>0:
-			highest_card = trick[0]
-			leading_suit = trick[0].suit
-			
-			for card in trick:
-				if (card.suit is leading_suit) and (card > highest_card):
-					highest_card = card
-			return highest_card
+			return trick[trick_winner(trick)]
 		else:
 			raise NotImplementedError
 	
-	
\ No newline at end of file
+	
+
+
+	def observe_round_start(self, players: list[Player]) -> None:
+		"""Called by the Round before the first trick, so AI players can track the round
+
+		Parameters
+		----------
+		players: list[Player]
+			the players in playing order, their hands already passed
+
+		Return
+		------
+		None
+		"""
+		pass
+
+
+	def observe_trick(self, leader_idx: int, trick: list[Card]) -> None:
+		"""Called by the Round after every trick, so AI players can track the cards played
+
+		Parameters
+		----------
+		leader_idx: int
+			index in the players of the player who led the trick
+		trick: list[Card]
+			list of Cards in played order from trick
+
+		Return
+		------
+		None
+		"""
+		pass
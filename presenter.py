@@ -0,0 +1,177 @@
+"""
+Presentation and pacing for a game of Hearts.
+
+The game logic never prints, prompts or sleeps itself: it reports what
+happened to a presenter, passing the players and cards involved. Only the
+presenter turns them into text, so a NullPresenter costs nothing at all.
+"""
+
+from __future__ import annotations
+from cards import Card, card_list_art
+import time
+
+
+class NullPresenter:
+	"""A class to represent a presenter that shows nothing and never pauses.
+
+	It is used for headless simulation. It is also the base class of the
+	other presenters, so it lists every event a presenter receives.
+
+	Methods
+	-------
+	welcome(self) -> None
+		The game is starting
+	round_started(self, round_count: int) -> None
+		A new round is starting
+	cards_dealt(self, players: list) -> None
+		Every player has been dealt their hand, before passing
+	cards_passed(self) -> None
+		Every player has passed their cards
+	card_played(self, player, card: Card, leading: bool) -> None
+		A player has played a card to the trick
+	hearts_broken(self) -> None
+		The first heart of the round has been played
+	trick_taken(self, player, penalty_sum: int) -> None
+		A player has taken the trick
+	moon_shot(self, player) -> None
+		A player has taken every point card of the round
+	round_ended(self, round_count: int, players: list) -> None
+		The round is over and total scores are updated
+	game_won(self, player) -> None
+		The game is over
+	show_cards(self, title: str, cards: list[Card], add_idx: bool) -> None
+		Shows a trick or a hand to the human player
+	show_error(self, message: str) -> None
+		Tells the human player why their input was refused
+	ask(self, prompt: str) -> str
+		Prompts the human player and returns their answer
+	"""
+	def welcome(self) -> None:
+		pass
+
+	def round_started(self, round_count: int) -> None:
+		pass
+
+	def cards_dealt(self, players: list) -> None:
+		pass
+
+	def cards_passed(self) -> None:
+		pass
+
+	def card_played(self, player, card: Card, leading: bool) -> None:
+		pass
+
+	def hearts_broken(self) -> None:
+		pass
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		pass
+
+	def moon_shot(self, player) -> None:
+		pass
+
+	def round_ended(self, round_count: int, players: list) -> None:
+		pass
+
+	def game_won(self, player) -> None:
+		pass
+
+	def show_cards(self, title: str, cards: list[Card], add_idx: bool) -> None:
+		pass
+
+	def show_error(self, message: str) -> None:
+		pass
+
+	def ask(self, prompt: str) -> str:
+		"""A headless game has nobody to ask, so prompting is an error"""
+		raise RuntimeError(f"Cannot prompt '{prompt}' without a human presenter")
+
+
+
+class TerminalPresenter(NullPresenter):
+	"""A class to represent the terminal presenter, printing the game with the usual pacing.
+
+	Methods
+	-------
+	pause(self, seconds: float) -> None
+		Waits between two messages so the game can be followed
+
+	Methods defined here:
+	All of the events of NullPresenter, printed to the terminal.
+	"""
+	def pause(self, seconds: float) -> None:
+		"""Waits between two messages so the game can be followed
+
+		Parameters
+		----------
+		seconds: float
+			how long to wait
+
+		Return
+		------
+		None
+		"""
+		time.sleep(seconds)
+
+	def welcome(self) -> None:
+		print("Welcome to ♥ HEARTS ♥")
+
+	def round_started(self, round_count: int) -> None:
+		self.pause(0.25)
+		print(f"========= Starting round {round_count} =========")
+
+	def cards_passed(self) -> None:
+		self.pause(0.25)
+		print("Cards have been passed")
+
+	def card_played(self, player, card: Card, leading: bool) -> None:
+		self.pause(0.25)
+		if leading:
+			print(f"{player} leads with \n{card}")
+		else:
+			print(f"{player} plays \n{card}")
+
+	def hearts_broken(self) -> None:
+		self.pause(0.25)
+		print("Hearts have been broken!")
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		self.pause(0.25)
+		print(f"{player} takes the trick. Points received: {penalty_sum}")
+
+	def moon_shot(self, player) -> None:
+		self.pause(0.5)
+		print(f"{player} has shot the moon! Everyone else receives 26 points")
+
+	def round_ended(self, round_count: int, players: list) -> None:
+		self.pause(0.25)
+		print(f"========= End of round {round_count} =========")
+		for player in players:
+			print(f"{player}'s total score: {player.total_score}")
+
+	def game_won(self, player) -> None:
+		print(f"{player} is the winner!")
+
+	def show_cards(self, title: str, cards: list[Card], add_idx: bool) -> None:
+		self.pause(0.5)
+		print(f"{title}:\n" + card_list_art(cards, add_idx))
+
+	def show_error(self, message: str) -> None:
+		self.pause(0.25)
+		print(message)
+
+	def ask(self, prompt: str) -> str:
+		self.pause(0.25)
+		return input(prompt)
+
+
+
+class FastPresenter(TerminalPresenter):
+	"""A class to represent a terminal presenter that never pauses.
+
+	Methods defined here:
+	pause(self, seconds: float) -> None
+		Returns straight away
+	"""
+	def pause(self, seconds: float) -> None:
+		pass
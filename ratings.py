@@ -0,0 +1,336 @@
+"""
+Incremental skill ratings of agents from streaming game results.
+
+Every agent, an AI strategy, a configuration or a human, is rated by a
+Gaussian belief of its skill: a mean mu and an uncertainty sigma, as in
+TrueSkill. Each finished game places its seats by final total score, the
+lowest first as in Hearts.game_end, and updates the agents at once with the
+closed-form Bradley-Terry update of Weng and Lin (2011), which compares
+every pair of seats. An agent holds a constant handful of numbers however
+many games it plays, and the leaderboard is sorted from them at any time.
+
+Games rated apart, e.g. by a worker, can be rated on a fork of the table,
+which records what every agent's games taught it since it was forked: the
+precision (one over the variance) gained, and the precision-weighted mean
+gained. merge adds both back, as independent evidence about the same skill,
+so forks can be merged in any order. Each fork rates its games from the
+ratings it forked from, so the merged ratings only approach rating the games
+one by one when forks are short. tournament.py does not fork: it rates every
+game in the parent, in game order, so its ratings do not depend on sharding.
+
+Run from the command line to show a saved leaderboard, e.g.
+	python ratings.py ratings.json --top 20
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import math
+
+MU = 25.0
+SIGMA = MU / 3
+BETA = SIGMA / 2
+KAPPA = 1e-4
+
+
+def placements(total_scores: list[int]) -> list[int]:
+	"""Returns the place of each seat from the final total scores, 0 for the lowest, tied scores sharing a place"""
+	return [sum(1 for other in total_scores if other < total_score) for total_score in total_scores]
+
+
+
+class Rating:
+	"""A class to represent the skill rating of one agent.
+
+	Attributes
+	----------
+	mu: float
+		the estimated skill
+	sigma: float
+		the uncertainty of the estimate
+	games: int
+		number of games rated
+	wins: int
+		number of games won
+	precision_added: float
+		precision, one over sigma squared, gained since the table was forked
+	weighted_added: float
+		precision times mu gained since the table was forked
+	games_added: int
+		number of games rated since the table was forked
+	wins_added: int
+		number of games won since the table was forked
+
+	Methods
+	-------
+	precision(self) -> float
+		Returns one over sigma squared
+
+	update(self, mu: float, sigma: float) -> None
+		Moves the rating to a new estimate
+
+	conservative(self) -> float
+		Returns the skill the agent is very likely to have at least
+
+	Methods defined here:
+	__init__(self, mu: float = MU, sigma: float = SIGMA, games: int = 0, wins: int = 0) -> None
+		Constructs a rating with nothing changed since the fork.
+
+	__repr__(self) -> str
+		Return a string representation of the Rating object.
+	"""
+	__slots__ = ("mu", "sigma", "games", "wins", "precision_added", "weighted_added", "games_added", "wins_added")
+
+	def __init__(self, mu: float = MU, sigma: float = SIGMA, games: int = 0, wins: int = 0) -> None:
+		self.mu = mu
+		self.sigma = sigma
+		self.games = games
+		self.wins = wins
+		self.precision_added = 0.0
+		self.weighted_added = 0.0
+		self.games_added = 0
+		self.wins_added = 0
+
+
+	def __repr__(self) -> str:
+		return f"Rating(mu={self.mu:.2f}, sigma={self.sigma:.2f}, games={self.games}, wins={self.wins})"
+
+
+	def precision(self) -> float:
+		"""Returns one over sigma squared"""
+		return 1.0 / (self.sigma*self.sigma)
+
+
+	def update(self, mu: float, sigma: float) -> None:
+		"""Moves the rating to a new estimate, keeping what it gained since the fork"""
+		precision = self.precision()
+		self.precision_added -= precision
+		self.weighted_added -= precision*self.mu
+		self.mu = mu
+		self.sigma = sigma
+		precision = self.precision()
+		self.precision_added += precision
+		self.weighted_added += precision*mu
+
+
+	def conservative(self) -> float:
+		"""Returns mu less three sigmas, the skill the agent is very likely to have at least"""
+		return self.mu - 3*self.sigma
+
+
+
+class RatingTable:
+	"""A class to represent the ratings of every agent, updated one game at a time.
+
+	Attributes
+	----------
+	ratings: dict[str, Rating]
+		the rating of each agent, by name
+	games: int
+		number of games rated
+	games_added: int
+		number of games rated since the table was forked
+
+	Methods
+	-------
+	rating(self, agent: str) -> Rating
+		Returns the rating of an agent, a new one for an unknown agent
+
+	add_game(self, agents: list[str], total_scores: list[int]) -> None
+		Updates the ratings from the result of one game
+
+	fork(self) -> RatingTable
+		Returns a copy to rate a shard of games on
+
+	merge(self, other: RatingTable) -> None
+		Adds the changes made on a fork
+
+	leaderboard(self, limit: int = None) -> list[tuple[str, Rating]]
+		Returns the agents from the best
+
+	report(self, limit: int = None) -> str
+		Returns the leaderboard as a table
+
+	save(self, path: str) -> None
+		Writes the ratings to a JSON file
+
+	load(path: str) -> RatingTable
+		Reads ratings written by save
+
+	Methods defined here:
+	__init__(self) -> None
+		Constructs a table without any agent.
+	"""
+	def __init__(self) -> None:
+		self.ratings = {}
+		self.games = 0
+		self.games_added = 0
+
+
+	def rating(self, agent: str) -> Rating:
+		"""Returns the rating of an agent, starting an unknown agent at the prior"""
+		rating = self.ratings.get(agent)
+		if rating is None:
+			rating = self.ratings[agent] = Rating()
+		return rating
+
+
+	def add_game(self, agents: list[str], total_scores: list[int]) -> None:
+		"""Updates the ratings from the result of one game
+
+		Every seat is compared with every other seat: it is expected to beat
+		a seat by how far apart their mus are, relative to their sigmas, and
+		its mu moves by how much better or worse it actually placed. The
+		seats of one agent are not compared with each other, so an agent
+		playing itself learns nothing from it.
+
+		Parameters
+		----------
+		agents: list[str]
+			the agent in each seat, the same agent may sit in several seats
+		total_scores: list[int]
+			the final total score of each seat
+
+		Return
+		------
+		None
+		"""
+		places = placements(total_scores)
+		ratings = [self.rating(agent) for agent in agents]
+		# every update is worked out from the ratings before the game
+		mus = [rating.mu for rating in ratings]
+		variances = [rating.sigma*rating.sigma for rating in ratings]
+		mu_changes = [0.0]*len(agents)
+		variance_scales = [1.0]*len(agents)
+		for seat_idx in range(len(agents)):
+			variance = variances[seat_idx]
+			omega = 0.0
+			delta = 0.0
+			for other_idx in range(len(agents)):
+				if agents[other_idx] == agents[seat_idx]:
+					continue
+				c = math.sqrt(variance + variances[other_idx] + 2*BETA*BETA)
+				expected = 1.0 / (1.0 + math.exp((mus[other_idx] - mus[seat_idx]) / c))
+				if places[seat_idx] < places[other_idx]:
+					actual = 1.0
+				elif places[seat_idx] == places[other_idx]:
+					actual = 0.5
+				else:
+					actual = 0.0
+				omega += variance / c * (actual - expected)
+				delta += math.sqrt(variance) / c * variance / (c*c) * expected * (1.0 - expected)
+			mu_changes[seat_idx] = omega
+			variance_scales[seat_idx] = max(1.0 - delta, KAPPA)
+
+		winner_place = min(places)
+		winner_idx = places.index(winner_place) if places.count(winner_place) == 1 else None
+		counted = set()
+		for seat_idx, rating in enumerate(ratings):
+			rating.update(rating.mu + mu_changes[seat_idx], rating.sigma * math.sqrt(variance_scales[seat_idx]))
+			if seat_idx == winner_idx:
+				rating.wins += 1
+				rating.wins_added += 1
+			if agents[seat_idx] not in counted:
+				counted.add(agents[seat_idx])
+				rating.games += 1
+				rating.games_added += 1
+		self.games += 1
+		self.games_added += 1
+
+
+	def fork(self) -> RatingTable:
+		"""Returns a copy of the ratings with nothing changed yet, for a worker to rate a shard of games on"""
+		other = RatingTable()
+		for agent, rating in self.ratings.items():
+			other.ratings[agent] = Rating(rating.mu, rating.sigma, rating.games, rating.wins)
+		other.games = self.games
+		return other
+
+
+	def merge(self, other: RatingTable) -> None:
+		"""Adds the changes made on a fork, keeping them as changes of this table too
+
+		Parameters
+		----------
+		other: RatingTable
+			a fork of this table, or of the table this one was forked from
+
+		Return
+		------
+		None
+		"""
+		for agent, theirs in other.ratings.items():
+			mine = self.rating(agent)
+			precision = mine.precision() + theirs.precision_added
+			weighted = mine.precision()*mine.mu + theirs.weighted_added
+			mine.update(weighted / precision, 1.0 / math.sqrt(precision))
+			mine.games += theirs.games_added
+			mine.wins += theirs.wins_added
+			mine.games_added += theirs.games_added
+			mine.wins_added += theirs.wins_added
+		self.games += other.games_added
+		self.games_added += other.games_added
+
+
+	def leaderboard(self, limit: int = None) -> list[tuple[str, Rating]]:
+		"""Returns the agents from the best, by the skill they are very likely to have at least
+
+		Parameters
+		----------
+		limit: int
+			number of agents to return, all of them when None
+
+		Return
+		------
+		list[tuple[str, Rating]]: (agent, rating) from the highest conservative skill
+		"""
+		ranked = sorted(self.ratings.items(), key=lambda item: (-item[1].conservative(), item[0]))
+		return ranked if limit is None else ranked[:limit]
+
+
+	def report(self, limit: int = None) -> str:
+		"""Returns the leaderboard as a table of rank, agent, skill, mu, sigma, games and win rate"""
+		lines = [f"{'rank':<6}{'agent':<16}{'skill':>8}{'mu':>8}{'sigma':>8}{'games':>8}{'win rate':>10}"]
+		for rank, (agent, rating) in enumerate(self.leaderboard(limit), start=1):
+			win_rate = rating.wins / max(rating.games, 1)
+			lines.append(f"{rank:<6}{agent:<16}{rating.conservative():>8.2f}{rating.mu:>8.2f}{rating.sigma:>8.2f}{rating.games:>8}{win_rate:>10.1%}")
+		return "\n".join(lines)
+
+
+	def save(self, path: str) -> None:
+		"""Writes the ratings to a JSON file, to carry them over to later runs"""
+		data = {
+			"games": self.games,
+			"ratings": {agent: [rating.mu, rating.sigma, rating.games, rating.wins] for agent, rating in self.ratings.items()},
+		}
+		with open(path, "w") as file:
+			json.dump(data, file, indent=1)
+
+
+	@staticmethod
+	def load(path: str) -> RatingTable:
+		"""Reads ratings written by save, with nothing changed since"""
+		with open(path) as file:
+			data = json.load(file)
+		table = RatingTable()
+		table.games = data["games"]
+		for agent, (mu, sigma, games, wins) in data["ratings"].items():
+			table.ratings[agent] = Rating(mu, sigma, games, wins)
+		return table
+
+
+
+def main() -> None:
+	"""Shows the leaderboard of a ratings file from the command line"""
+	parser = argparse.ArgumentParser(description="Show the leaderboard of a file written by tournament.py --ratings.")
+	parser.add_argument("path", help="the ratings file")
+	parser.add_argument("--top", type=int, default=None, help="only show the best agents")
+	args = parser.parse_args()
+	table = RatingTable.load(args.path)
+	print(table.report(args.top))
+	print(f"{table.games} games rated")
+
+
+
+if __name__ == "__main__":
+	main()
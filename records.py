@@ -0,0 +1,902 @@
+"""
+Compact binary records of played games.
+
+A record file is a stream of frames, each a type byte and a payload length
+followed by the payload, so it can be appended to while games are played and
+read back one frame at a time:
+
+* a game frame: the target score, the seed, of any size, and the strategy of
+  each seat;
+* a round frame for every round: the deal, the passes, every card played and
+  the round scores, packed into a bit stream;
+* an end frame: the winner and the number of rounds.
+
+The deal stores the seat holding each card of the deck, and a pass or a play
+stores the position of the card in the current hand of its seat, so a card
+costs a few bits. The seat of each play is not stored, since the rules give
+it from the cards played before.
+
+Next to the record file, an index file holds the 8-byte offset of every game
+frame, so game k is found with a single seek, its rounds by skipping frames,
+and a trick by replaying at most one round.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, INDEX_SUIT_MASK, TWO_OF_CLUBS_BIT, deck_mask, penalty
+from presenter import NullPresenter
+import os
+import struct
+
+MAGIC = b"HRC2"
+FRAME = struct.Struct("<BI")
+GAME = struct.Struct("<IBB")
+ROUND = struct.Struct("<H")
+END = struct.Struct("<BH")
+OFFSET = struct.Struct("<Q")
+GAME_FRAME = 1
+ROUND_FRAME = 2
+END_FRAME = 3
+NUM_OF_PASSED = 3
+SCORE_BITS = 5
+DECK_BITS = {num_of_player: [1 << idx for idx in range(52) if deck_mask(num_of_player) >> idx & 1] for num_of_player in range(3, 6)}
+WIDTHS = [max(count-1, 0).bit_length() for count in range(53)]
+
+
+def encode_game(seats: list[str], seed: int, target_score: int) -> bytes:
+	"""Packs the payload of a game frame, raising ValueError before anything is written if it does not fit
+
+	Parameters
+	----------
+	seats: list[str]
+		the strategy of the player in each seat
+	seed: int
+		the seed of the game, None if it is not known
+	target_score: int
+		the score that ends the game, 0 if it is not known
+
+	Return
+	------
+	bytes: the target score, the number of seats and the length of the seed, then the seed and the seats
+	"""
+	if not 0 <= target_score < 1 << 32:
+		raise ValueError(f"A target score of {target_score} cannot be recorded")
+	# a signed seed of any size, as Hearts takes, in as few bytes as it needs
+	seed_bytes = b"" if seed is None else seed.to_bytes(seed.bit_length()//8 + 1, "little", signed=True)
+	if len(seed_bytes) > 255:
+		raise ValueError("A seed of more than 255 bytes cannot be recorded")
+	return GAME.pack(target_score, len(seats), len(seed_bytes)) + seed_bytes + "\n".join(seats).encode()
+
+
+def decode_game(payload: bytes) -> tuple:
+	"""Unpacks the payload of a game frame into (seed, seats, target_score), the seed None if it is not known"""
+	target_score, _, seed_length = GAME.unpack_from(payload, 0)
+	seed = int.from_bytes(payload[GAME.size:GAME.size+seed_length], "little", signed=True) if seed_length else None
+	seats = payload[GAME.size+seed_length:].decode().split("\n")
+	return (seed, seats, target_score)
+
+
+def index_path(path: str) -> str:
+	"""Returns the index file of a record file"""
+	return path + ".idx"
+
+
+def hand_bits(hand: int) -> list[int]:
+	"""Lists the bits of a mask from the lowest"""
+	out = []
+	while hand:
+		bit = hand & -hand
+		out.append(bit)
+		hand ^= bit
+	return out
+
+
+def width_for(count: int) -> int:
+	"""Returns the number of bits needed to tell apart count choices"""
+	return (count-1).bit_length()
+
+
+def first_leader(hands: list[int]) -> int:
+	"""Returns the seat holding the two of clubs"""
+	for seat_idx, hand in enumerate(hands):
+		if hand & TWO_OF_CLUBS_BIT:
+			return seat_idx
+	raise ValueError("Nobody holds the two of clubs")
+
+
+def next_leader(leader_idx: int, trick: list[int], num_of_player: int) -> int:
+	"""Returns the seat taking a trick, who leads the next one"""
+	lead_suit_mask = INDEX_SUIT_MASK[trick[0].bit_length()-1]
+	trick_mask = 0
+	for bit in trick:
+		trick_mask |= bit
+	winning_bit = 1 << ((trick_mask & lead_suit_mask).bit_length()-1)
+	return (leader_idx + trick.index(winning_bit)) % num_of_player
+
+
+
+class BitWriter:
+	"""A class to represent a stream of bit fields being packed.
+
+	Attributes
+	----------
+	value: int
+		the bits written so far, the first field in the lowest bits
+	length: int
+		number of bits written so far
+
+	Methods
+	-------
+	write(self, field: int, width: int) -> None
+		Appends a field of width bits
+
+	to_bytes(self) -> bytes
+		Returns the packed bits, padded to whole bytes
+	"""
+	def __init__(self) -> None:
+		self.value = 0
+		self.length = 0
+
+	def write(self, field: int, width: int) -> None:
+		self.value |= field << self.length
+		self.length += width
+
+	def to_bytes(self) -> bytes:
+		return self.value.to_bytes((self.length+7)//8, "little")
+
+
+
+class RoundRecord:
+	"""A class to represent the record of one round.
+
+	Attributes
+	----------
+	round_num: int
+		the round count, which also gives the passing direction
+	deal: list[int]
+		hand mask dealt to each seat, before passing
+	passes: list[int]
+		mask of the cards passed by each seat, all 0 in rounds where every seat passes to itself
+	plays: list[int]
+		bit of every card played, in played order
+	scores: list[int]
+		round score of each seat, after shooting the moon
+
+	Methods
+	-------
+	hands_after_passing(self) -> list[int]
+		Returns the hand mask of each seat once cards have been passed
+
+	tricks(self) -> list[tuple[int, list[int]]]
+		Splits the plays into tricks, with the seat leading each one
+
+	position(self, trick_idx: int) -> tuple[list[int], int, list[int], bool]
+		Returns the state of the round at the start of a trick
+
+	Methods defined here:
+	__init__(self, round_num: int, deal: list[int], passes: list[int], plays: list[int], scores: list[int]) -> None
+		Constructs the attributes of a RoundRecord object.
+	"""
+	def __init__(self, round_num: int, deal: list[int], passes: list[int], plays: list[int], scores: list[int]) -> None:
+		"""Constructs all the necessary attributes for the RoundRecord object.
+
+		Parameters
+		----------
+		round_num: int
+			the round count, which also gives the passing direction
+		deal: list[int]
+			hand mask dealt to each seat, before passing
+		passes: list[int]
+			mask of the cards passed by each seat, all 0 in rounds where every seat passes to itself
+		plays: list[int]
+			bit of every card played, in played order
+		scores: list[int]
+			round score of each seat, after shooting the moon
+
+		Return
+		------
+		None
+		"""
+		self.round_num = round_num
+		self.deal = deal
+		self.passes = passes
+		self.plays = plays
+		self.scores = scores
+
+
+	def hands_after_passing(self) -> list[int]:
+		"""Returns the hand mask of each seat once cards have been passed, as in Hearts.pass_cards"""
+		num_of_player = len(self.deal)
+		hands = [hand ^ passed for hand, passed in zip(self.deal, self.passes)]
+		for seat_idx, passed in enumerate(self.passes):
+			hands[(seat_idx+self.round_num) % num_of_player] |= passed
+		return hands
+
+
+	def tricks(self) -> list[tuple[int, list[int]]]:
+		"""Splits the plays into tricks
+
+		Return
+		------
+		list[tuple[int, list[int]]]: the seat leading each trick and the bits played to it, in played order
+		"""
+		num_of_player = len(self.deal)
+		leader_idx = first_leader(self.hands_after_passing())
+		out = []
+		for start in range(0, len(self.plays), num_of_player):
+			trick = self.plays[start:start+num_of_player]
+			out.append((leader_idx, trick))
+			leader_idx = next_leader(leader_idx, trick, num_of_player)
+		return out
+
+
+	def position(self, trick_idx: int) -> tuple[list[int], int, list[int], bool]:
+		"""Returns the state of the round at the start of a trick
+
+		Parameters
+		----------
+		trick_idx: int
+			index of the trick, from 0
+
+		Return
+		------
+		a tuple with the following types in order:
+			list[int]: hand mask of each seat
+			int: seat leading the trick
+			list[int]: penalty points taken by each seat so far
+			bool: True if hearts have been broken
+		"""
+		hands = self.hands_after_passing()
+		points = [0]*len(hands)
+		broken_hearts = False
+		tricks = self.tricks()
+		for leader_idx, trick in tricks[:trick_idx]:
+			trick_mask = 0
+			for pos, bit in enumerate(trick):
+				hands[(leader_idx+pos) % len(hands)] ^= bit
+				trick_mask |= bit
+			winner_idx = next_leader(leader_idx, trick, len(hands))
+			points[winner_idx] += penalty(trick_mask)
+			broken_hearts = broken_hearts or bool(trick_mask & HEARTS_MASK)
+		leader_idx = tricks[trick_idx][0] if trick_idx < len(tricks) else next_leader(*tricks[-1], len(hands))
+		return (hands, leader_idx, points, broken_hearts)
+
+
+
+class GameRecord:
+	"""A class to represent the record of a whole game.
+
+	Attributes
+	----------
+	seed: int
+		the seed of the game, None if it is not known
+	seats: list[str]
+		the strategy (class name) of the player in each seat
+	target_score: int
+		the score that ends the game, 0 if it is not known
+	rounds: list[RoundRecord]
+		the record of every round
+	winner_idx: int
+		the index of the winning seat, None if the game was not finished
+	round_count: int
+		the number of rounds played, None if the game was not finished
+
+	Methods
+	-------
+	total_scores(self) -> list[int]
+		Returns the total score of each seat after the recorded rounds
+
+	Methods defined here:
+	__init__(self, seed: int, seats: list[str], target_score: int) -> None
+		Constructs a game record with no rounds yet.
+	"""
+	def __init__(self, seed: int, seats: list[str], target_score: int) -> None:
+		"""Constructs all the necessary attributes for the GameRecord object.
+
+		Parameters
+		----------
+		seed: int
+			the seed of the game, None if it is not known
+		seats: list[str]
+			the strategy of the player in each seat
+		target_score: int
+			the score that ends the game, 0 if it is not known
+
+		Return
+		------
+		None
+		"""
+		self.seed = seed
+		self.seats = seats
+		self.target_score = target_score
+		self.rounds = []
+		self.winner_idx = None
+		self.round_count = None
+
+
+	def total_scores(self) -> list[int]:
+		"""Returns the total score of each seat after the recorded rounds"""
+		totals = [0]*len(self.seats)
+		for round_record in self.rounds:
+			for seat_idx, score in enumerate(round_record.scores):
+				totals[seat_idx] += score
+		return totals
+
+
+def encode_round(round_record: RoundRecord) -> bytes:
+	"""Packs a round into the payload of a round frame
+
+	Parameters
+	----------
+	round_record: RoundRecord
+		the round to pack
+
+	Return
+	------
+	bytes: the payload
+	"""
+	num_of_player = len(round_record.deal)
+	seat_width = width_for(num_of_player)
+	hand_size = round_record.deal[0].bit_count()
+	writer = BitWriter()
+
+	# the seat holding each card of the deck
+	for bit in DECK_BITS[num_of_player]:
+		seat_idx = 0
+		while not round_record.deal[seat_idx] & bit:
+			seat_idx += 1
+		writer.write(seat_idx, seat_width)
+
+	# each passed card by its position in the dealt hand, unless every seat passes to itself
+	passes = round_record.passes if round_record.round_num % num_of_player else []
+	for hand, passed in zip(round_record.deal, passes):
+		if passed.bit_count() != NUM_OF_PASSED:
+			raise ValueError(f"Every seat passes {NUM_OF_PASSED} cards")
+		for bit in hand_bits(passed):
+			writer.write((hand & (bit-1)).bit_count(), width_for(hand_size))
+
+	# each played card by its position in the current hand of its seat
+	hands = round_record.hands_after_passing()
+	for leader_idx, trick in round_record.tricks():
+		for pos, bit in enumerate(trick):
+			seat_idx = (leader_idx+pos) % num_of_player
+			hand = hands[seat_idx]
+			writer.write((hand & (bit-1)).bit_count(), width_for(hand.bit_count()))
+			hands[seat_idx] = hand ^ bit
+
+	for score in round_record.scores:
+		writer.write(score, SCORE_BITS)
+	return ROUND.pack(round_record.round_num) + writer.to_bytes()
+
+
+def decode_round(payload: bytes, num_of_player: int) -> RoundRecord:
+	"""Unpacks the payload of a round frame
+
+	Parameters
+	----------
+	payload: bytes
+		the payload written by encode_round
+	num_of_player: int
+		number of players of the game
+
+	Return
+	------
+	RoundRecord: the round
+	"""
+	round_num = ROUND.unpack_from(payload, 0)[0]
+	# the fields are read from the low end of one integer, inline since this is the hot loop of analytics
+	value = int.from_bytes(payload[ROUND.size:], "little")
+	seat_width = width_for(num_of_player)
+
+	deal = [0]*num_of_player
+	seat_field = (1 << seat_width)-1
+	for bit in DECK_BITS[num_of_player]:
+		deal[value & seat_field] |= bit
+		value >>= seat_width
+	hand_size = deal[0].bit_count()
+
+	passes = [0]*num_of_player
+	pass_width = width_for(hand_size)
+	for seat_idx, hand in enumerate(deal if round_num % num_of_player else []):
+		cards = hand_bits(hand)
+		for _ in range(NUM_OF_PASSED):
+			passes[seat_idx] |= cards[value & ((1 << pass_width)-1)]
+			value >>= pass_width
+
+	round_record = RoundRecord(round_num, deal, passes, [], [])
+	hands = round_record.hands_after_passing()
+	leader_idx = first_leader(hands)
+	# each hand as a sorted list, so a played card is popped by its position
+	card_lists = [hand_bits(hand) for hand in hands]
+	plays = round_record.plays
+	for _ in range(hand_size):
+		winning_bit = 0
+		winner_idx = leader_idx
+		lead_suit_mask = 0
+		for pos in range(num_of_player):
+			seat_idx = (leader_idx+pos) % num_of_player
+			cards = card_lists[seat_idx]
+			width = WIDTHS[len(cards)]
+			bit = cards.pop(value & ((1 << width)-1))
+			value >>= width
+			plays.append(bit)
+			if pos == 0:
+				lead_suit_mask = INDEX_SUIT_MASK[bit.bit_length()-1]
+			if bit & lead_suit_mask and bit > winning_bit:
+				winning_bit = bit
+				winner_idx = seat_idx
+		leader_idx = winner_idx
+
+	scores = []
+	for _ in range(num_of_player):
+		scores.append(value & ((1 << SCORE_BITS)-1))
+		value >>= SCORE_BITS
+	round_record.scores = scores
+	return round_record
+
+
+
+class RecordWriter:
+	"""A class to represent an append-only writer of game records.
+
+	Attributes
+	----------
+	path: str
+		the record file, created if it does not exist
+	file: BinaryIO
+		the record file, opened for appending
+	index_file: BinaryIO
+		the index file, opened for appending
+	num_of_games: int
+		number of games in the file, including those written before it was opened
+	num_of_player: int
+		number of players of the game being written, 0 between games
+
+	Methods
+	-------
+	start_game(self, seats: list[str], seed: int = None, target_score: int = 0) -> int
+		Writes the frame starting a game
+
+	write_round(self, round_record: RoundRecord) -> None
+		Writes the frame of a round
+
+	end_game(self, winner_idx: int, round_count: int) -> None
+		Writes the frame ending a game
+
+	write_game(self, game_record: GameRecord) -> int
+		Writes a whole game
+
+	flush(self) -> None
+		Flushes both files
+
+	close(self) -> None
+		Closes both files
+
+	Methods defined here:
+	__init__(self, path: str) -> None
+		Opens the record file and its index for appending.
+	"""
+	def __init__(self, path: str) -> None:
+		"""Constructs all the necessary attributes for the RecordWriter object.
+
+		Parameters
+		----------
+		path: str
+			the record file, created if it does not exist
+
+		Return
+		------
+		None
+		"""
+		self.path = path
+		if not os.path.exists(path) or os.path.getsize(path) == 0:
+			with open(path, "wb") as file:
+				file.write(MAGIC)
+			with open(index_path(path), "wb"):
+				pass
+		elif not os.path.exists(index_path(path)):
+			build_index(path)
+		self.file = open(path, "ab")
+		self.index_file = open(index_path(path), "ab")
+		self.num_of_games = os.path.getsize(index_path(path)) // OFFSET.size
+		self.num_of_player = 0
+
+
+	def write_frame(self, frame_type: int, payload: bytes) -> None:
+		"""Appends a frame to the record file"""
+		self.file.write(FRAME.pack(frame_type, len(payload)))
+		self.file.write(payload)
+
+
+	def start_game(self, seats: list[str], seed: int = None, target_score: int = 0) -> int:
+		"""Writes the frame starting a game
+
+		Parameters
+		----------
+		seats: list[str]
+			the strategy of the player in each seat
+		seed: int
+			the seed of the game, None if it is not known
+		target_score: int
+			the score that ends the game, 0 if it is not known
+
+		Return
+		------
+		int: the index of the game in the file
+		"""
+		payload = encode_game(seats, seed, target_score)
+		offset = self.file.tell()
+		self.write_frame(GAME_FRAME, payload)
+		# indexed once its frame is written, so the index never points past the file
+		self.index_file.write(OFFSET.pack(offset))
+		self.num_of_player = len(seats)
+		self.num_of_games += 1
+		return self.num_of_games-1
+
+
+	def write_round(self, round_record: RoundRecord) -> None:
+		"""Writes the frame of a round of the game started last"""
+		if len(round_record.deal) != self.num_of_player:
+			raise ValueError("A round must belong to the game started last")
+		self.write_frame(ROUND_FRAME, encode_round(round_record))
+
+
+	def end_game(self, winner_idx: int, round_count: int) -> None:
+		"""Writes the frame ending the game started last"""
+		self.write_frame(END_FRAME, END.pack(winner_idx, round_count))
+		self.num_of_player = 0
+
+
+	def write_game(self, game_record: GameRecord) -> int:
+		"""Writes a whole game, returning its index in the file"""
+		game_idx = self.start_game(game_record.seats, game_record.seed, game_record.target_score)
+		for round_record in game_record.rounds:
+			self.write_round(round_record)
+		if game_record.winner_idx is not None:
+			self.end_game(game_record.winner_idx, game_record.round_count)
+		return game_idx
+
+
+	def flush(self) -> None:
+		"""Flushes both files"""
+		self.file.flush()
+		self.index_file.flush()
+
+
+	def close(self) -> None:
+		"""Closes both files"""
+		self.file.close()
+		self.index_file.close()
+
+
+
+def read_frames(file, stop: int = None):
+	"""Reads frames from the current position of an open record file
+
+	Parameters
+	----------
+	file: BinaryIO
+		the record file, positioned at the start of a frame
+	stop: int
+		offset to stop at, the end of the file when None
+
+	Return
+	------
+	Generator[tuple[int, int, bytes]]: the offset, type and payload of each frame
+	"""
+	while stop is None or file.tell() < stop:
+		offset = file.tell()
+		header = file.read(FRAME.size)
+		if len(header) < FRAME.size:
+			return
+		frame_type, length = FRAME.unpack(header)
+		payload = file.read(length)
+		if len(payload) < length:
+			# a frame still being written
+			return
+		yield (offset, frame_type, payload)
+
+
+def parse_games(frames):
+	"""Assembles frames into games
+
+	Parameters
+	----------
+	frames: Iterator[tuple[int, int, bytes]]
+		frames as yielded by read_frames
+
+	Return
+	------
+	Generator[GameRecord]: every game, unfinished games included
+	"""
+	game_record = None
+	for _, frame_type, payload in frames:
+		if frame_type == GAME_FRAME:
+			if game_record is not None:
+				yield game_record
+			game_record = GameRecord(*decode_game(payload))
+		elif frame_type == ROUND_FRAME:
+			game_record.rounds.append(decode_round(payload, len(game_record.seats)))
+		elif frame_type == END_FRAME:
+			game_record.winner_idx, game_record.round_count = END.unpack(payload)
+			yield game_record
+			game_record = None
+	if game_record is not None:
+		yield game_record
+
+
+def read_games(path: str):
+	"""Reads every game of a record file, one at a time, without the index
+
+	Parameters
+	----------
+	path: str
+		the record file
+
+	Return
+	------
+	Generator[GameRecord]: every game in the file, in order
+	"""
+	with open(path, "rb") as file:
+		if file.read(len(MAGIC)) != MAGIC:
+			raise ValueError(f"{path} is not a Hearts record file")
+		yield from parse_games(read_frames(file))
+
+
+def build_index(path: str) -> int:
+	"""Rebuilds the index file of a record file by skipping through its frames
+
+	Parameters
+	----------
+	path: str
+		the record file
+
+	Return
+	------
+	int: number of games indexed
+	"""
+	num_of_games = 0
+	with open(path, "rb") as file, open(index_path(path), "wb") as index_file:
+		if file.read(len(MAGIC)) != MAGIC:
+			raise ValueError(f"{path} is not a Hearts record file")
+		while True:
+			offset = file.tell()
+			header = file.read(FRAME.size)
+			if len(header) < FRAME.size:
+				break
+			frame_type, length = FRAME.unpack(header)
+			if frame_type == GAME_FRAME:
+				index_file.write(OFFSET.pack(offset))
+				num_of_games += 1
+			file.seek(length, os.SEEK_CUR)
+	return num_of_games
+
+
+
+class RecordReader:
+	"""A class to represent random access to a record file through its index.
+
+	Attributes
+	----------
+	path: str
+		the record file
+	file: BinaryIO
+		the record file, opened for reading
+	index_file: BinaryIO
+		the index file, opened for reading
+
+	Methods
+	-------
+	num_of_games(self) -> int
+		Returns the number of games in the file
+
+	games(self, start: int = 0, stop: int = None) -> Generator[GameRecord]
+		Reads a range of games, one at a time
+
+	game(self, game_idx: int) -> GameRecord
+		Reads one game
+
+	round(self, game_idx: int, round_num: int) -> RoundRecord
+		Reads one round of a game, decoding only its frame
+
+	position(self, game_idx: int, round_num: int, trick_idx: int) -> tuple[list[int], int, list[int], bool]
+		Returns the state at the start of a trick
+
+	close(self) -> None
+		Closes both files
+
+	Methods defined here:
+	__init__(self, path: str) -> None
+		Opens the record file, building its index if it is missing.
+	"""
+	def __init__(self, path: str) -> None:
+		"""Constructs all the necessary attributes for the RecordReader object.
+
+		Parameters
+		----------
+		path: str
+			the record file
+
+		Return
+		------
+		None
+		"""
+		self.path = path
+		if not os.path.exists(index_path(path)):
+			build_index(path)
+		self.file = open(path, "rb")
+		if self.file.read(len(MAGIC)) != MAGIC:
+			raise ValueError(f"{path} is not a Hearts record file")
+		self.index_file = open(index_path(path), "rb")
+
+
+	def num_of_games(self) -> int:
+		"""Returns the number of games in the file"""
+		return os.path.getsize(index_path(self.path)) // OFFSET.size
+
+
+	def game_offset(self, game_idx: int) -> int:
+		"""Returns the offset of the frame starting a game"""
+		if game_idx < 0 or game_idx >= self.num_of_games():
+			raise IndexError(f"No game {game_idx} in {self.path}")
+		self.index_file.seek(game_idx*OFFSET.size)
+		return OFFSET.unpack(self.index_file.read(OFFSET.size))[0]
+
+
+	def games(self, start: int = 0, stop: int = None):
+		"""Reads a range of games, one at a time
+
+		Parameters
+		----------
+		start: int
+			index of the first game
+		stop: int
+			index after the last game, the end of the file when None
+
+		Return
+		------
+		Generator[GameRecord]: the games, in order
+		"""
+		num_of_games = self.num_of_games()
+		stop = num_of_games if stop is None else min(stop, num_of_games)
+		if start >= stop:
+			return
+		end = self.game_offset(stop) if stop < num_of_games else None
+		self.file.seek(self.game_offset(start))
+		yield from parse_games(read_frames(self.file, end))
+
+
+	def game(self, game_idx: int) -> GameRecord:
+		"""Reads one game"""
+		return next(self.games(game_idx, game_idx+1))
+
+
+	def round(self, game_idx: int, round_num: int) -> RoundRecord:
+		"""Reads one round of a game, skipping the frames of the rounds before it
+
+		Parameters
+		----------
+		game_idx: int
+			index of the game
+		round_num: int
+			the round count, from 1
+
+		Return
+		------
+		RoundRecord: the round
+		"""
+		file = self.file
+		file.seek(self.game_offset(game_idx))
+		length = FRAME.unpack(file.read(FRAME.size))[1]
+		num_of_player = GAME.unpack_from(file.read(length), 0)[1]
+		for round_idx in range(1, round_num+1):
+			header = file.read(FRAME.size)
+			if len(header) < FRAME.size or FRAME.unpack(header)[0] != ROUND_FRAME:
+				raise IndexError(f"Game {game_idx} has no round {round_num}")
+			length = FRAME.unpack(header)[1]
+			if round_idx < round_num:
+				file.seek(length, os.SEEK_CUR)
+		return decode_round(file.read(length), num_of_player)
+
+
+	def position(self, game_idx: int, round_num: int, trick_idx: int) -> tuple[list[int], int, list[int], bool]:
+		"""Returns the state at the start of a trick, see RoundRecord.position"""
+		return self.round(game_idx, round_num).position(trick_idx)
+
+
+	def close(self) -> None:
+		"""Closes both files"""
+		self.file.close()
+		self.index_file.close()
+
+
+
+class RecordingPresenter(NullPresenter):
+	"""A class to represent a presenter that records the game it is shown.
+
+	Every event is passed on to another presenter, so a live game can be
+	recorded while it is shown as usual.
+
+	Attributes
+	----------
+	writer: RecordWriter
+		where the game is written
+	seed: int
+		the seed of the game, None if it is not known
+	target_score: int
+		the score that ends the game, 0 if it is not known
+	inner: NullPresenter
+		the presenter every event is passed on to
+	players: list[Player]
+		the players seated at the table, known from the first deal
+	round_record: RoundRecord
+		the round being recorded
+	totals: list[int]
+		the total score of each seat before the current round
+
+	Methods defined here:
+	All of the events of NullPresenter, recorded and passed on; any other
+	attribute is looked up on the inner presenter.
+	"""
+	def __init__(self, writer: RecordWriter, seed: int = None, target_score: int = 0, inner: NullPresenter = None) -> None:
+		self.writer = writer
+		self.seed = seed
+		self.target_score = target_score
+		self.inner = inner if inner is not None else NullPresenter()
+		self.players = None
+		self.round_record = None
+		self.totals = None
+
+	def __getattr__(self, name: str):
+		# presenter specific methods, such as those of the curses presenter
+		return getattr(self.inner, name)
+
+	def welcome(self) -> None:
+		self.inner.welcome()
+
+	def round_started(self, round_count: int) -> None:
+		self.round_record = RoundRecord(round_count, [], [], [], [])
+		self.inner.round_started(round_count)
+
+	def cards_dealt(self, players: list) -> None:
+		if self.players is None:
+			self.players = players
+			self.totals = [player.total_score for player in players]
+			self.writer.start_game([type(player).__name__ for player in players], self.seed, self.target_score)
+		self.round_record.deal = [player.hand.mask for player in players]
+		self.inner.cards_dealt(players)
+
+	def cards_passed(self) -> None:
+		self.round_record.passes = [dealt & ~player.hand.mask for dealt, player in zip(self.round_record.deal, self.players)]
+		self.inner.cards_passed()
+
+	def card_played(self, player, card, leading: bool) -> None:
+		self.round_record.plays.append(card.bit)
+		self.inner.card_played(player, card, leading)
+
+	def hearts_broken(self) -> None:
+		self.inner.hearts_broken()
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		self.inner.trick_taken(player, penalty_sum)
+
+	def moon_shot(self, player) -> None:
+		self.inner.moon_shot(player)
+
+	def round_ended(self, round_count: int, players: list) -> None:
+		self.round_record.scores = [player.total_score - total for player, total in zip(players, self.totals)]
+		self.totals = [player.total_score for player in players]
+		self.writer.write_round(self.round_record)
+		self.inner.round_ended(round_count, players)
+
+	def game_won(self, player) -> None:
+		self.writer.end_game(self.players.index(player), self.round_record.round_num)
+		self.inner.game_won(player)
+
+	def show_cards(self, title: str, cards: list, add_idx: bool) -> None:
+		self.inner.show_cards(title, cards, add_idx)
+
+	def show_error(self, message: str) -> None:
+		self.inner.show_error(message)
+
+	def ask(self, prompt: str) -> str:
+		return self.inner.ask(prompt)
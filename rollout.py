@@ -0,0 +1,150 @@
+"""
+Fast play-out of the rest of a round on bitmasks.
+
+A position is given by the hand mask of every seat, the seat leading the
+current trick and the bits already played to it. The round is then finished
+with a quick heuristic policy, without creating any Card, Player or Round,
+and the final round scores are returned. Search and sampling AIs call this
+thousands of times per decision.
+
+A play-out can be handed an endgame tablebase (see tablebase.py), and then
+the last tricks are not played out: it stops at the start of the first
+stored trick and returns the scores every seat can guarantee from there.
+These are exact scores, not the policy's, so a caller averaging play-outs
+should not mix the two and leaves the tablebase out.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, INDEX_SUIT_MASK, QUEEN_OF_SPADES_BIT, penalty
+from rules import legal_mask_for_suit
+from tablebase import Tablebase
+
+
+def playout_policy(legal: int, lead_suit_mask: int, trick_mask: int, last_to_play: bool) -> int:
+	"""Picks the card to play during a play-out
+
+	The policy leads its lowest card, follows with the highest card that
+	still loses the trick (or its lowest card when it cannot lose it), and
+	when void throws the queen of spades, then its highest heart, then its
+	highest card.
+
+	Parameters
+	----------
+	legal: int
+		mask of the legal cards, never empty
+	lead_suit_mask: int
+		mask of the suit that was led, 0 when leading
+	trick_mask: int
+		mask of the cards already in the trick
+	last_to_play: bool
+		True if this is the last card of the trick
+
+	Return
+	------
+	int: the bit of the card to play
+	"""
+	# leading
+	if lead_suit_mask == 0:
+		return legal & -legal
+
+	# following suit
+	if legal & lead_suit_mask:
+		winning_bit = 1 << ((trick_mask & lead_suit_mask).bit_length()-1)
+		below = legal & (winning_bit-1)
+		if below:
+			return 1 << (below.bit_length()-1)
+		if last_to_play:
+			# the trick is taken anyway, so take it with the highest card but keep the queen
+			no_queen = legal & ~QUEEN_OF_SPADES_BIT
+			if no_queen:
+				return 1 << (no_queen.bit_length()-1)
+			return legal
+		return legal & -legal
+
+	# void in the led suit
+	if legal & QUEEN_OF_SPADES_BIT:
+		return QUEEN_OF_SPADES_BIT
+	hearts = legal & HEARTS_MASK
+	if hearts:
+		return 1 << (hearts.bit_length()-1)
+	return 1 << (legal.bit_length()-1)
+
+
+def apply_moon_shot(points: list[int]) -> list[int]:
+	"""Applies shooting the moon to the round scores, as in Round.check_shooting_the_moon
+
+	Parameters
+	----------
+	points: list[int]
+		penalty points taken by each seat over the whole round
+
+	Return
+	------
+	list[int]: the round score of each seat
+	"""
+	for seat_idx, seat_points in enumerate(points):
+		if seat_points == 26:
+			return [0 if idx == seat_idx else 26 for idx in range(len(points))]
+	return points
+
+
+def play_out(hands: list[int], leader_idx: int, trick: list[int], points: list[int], broken_hearts: bool, first_trick: bool, tablebase: Tablebase = None) -> list[int]:
+	"""Plays the rest of a round with the play-out policy
+
+	Parameters
+	----------
+	hands: list[int]
+		hand mask of every seat, in playing order, not modified
+	leader_idx: int
+		seat that led the current trick
+	trick: list[int]
+		bits already played to the current trick, in played order, not modified
+	points: list[int]
+		penalty points already taken by each seat this round, not modified
+	broken_hearts: bool
+		indicates whether Hearts have been broken before the current trick
+	first_trick: bool
+		indicates whether the current trick is the first of the round
+	tablebase: Tablebase
+		looks the last tricks up instead of playing them out, every trick is played out when None
+
+	Return
+	------
+	list[int]: the round score of each seat, after shooting the moon
+	"""
+	num_of_player = len(hands)
+	hands = hands[:]
+	points = points[:]
+	trick = trick[:]
+	table_tricks = tablebase.tricks(num_of_player) if tablebase is not None else 0
+
+	while True:
+		if not trick and not first_trick and hands[leader_idx].bit_count() <= table_tricks:
+			scores = tablebase.final_scores(hands, leader_idx, broken_hearts, points)
+			if scores is not None:
+				return scores
+		trick_mask = 0
+		for bit in trick:
+			trick_mask |= bit
+		lead_suit_mask = INDEX_SUIT_MASK[trick[0].bit_length()-1] if trick else 0
+		seat_idx = (leader_idx + len(trick)) % num_of_player
+
+		while len(trick) < num_of_player:
+			legal = legal_mask_for_suit(hands[seat_idx], lead_suit_mask, broken_hearts, first_trick)[0]
+			bit = playout_policy(legal, lead_suit_mask, trick_mask, len(trick) == num_of_player-1)
+			hands[seat_idx] ^= bit
+			if lead_suit_mask == 0:
+				lead_suit_mask = INDEX_SUIT_MASK[bit.bit_length()-1]
+			trick.append(bit)
+			trick_mask |= bit
+			seat_idx = (seat_idx+1) % num_of_player
+
+		winning_bit = 1 << ((trick_mask & lead_suit_mask).bit_length()-1)
+		leader_idx = (leader_idx + trick.index(winning_bit)) % num_of_player
+		points[leader_idx] += penalty(trick_mask)
+		if trick_mask & HEARTS_MASK:
+			broken_hearts = True
+		first_trick = False
+		trick = []
+		if hands[leader_idx] == 0:
+			return apply_moon_shot(points)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 from basic_ai import BasicAIPlayer
-from cards import Card, Rank, Suit
+from bitboard import HEARTS_MASK, TWO_OF_CLUBS_BIT, card_bit, mask_of, penalty, trick_winner
+from cards import Card
+from observation import RoundObservation
 from player import Player
-import time
+from presenter import NullPresenter, TerminalPresenter
 
 
 class Round:
@@ -32,25 +34,34 @@ class Round:
 		executes a round
 	
 	Methods defined here:
-	__init__(self, name: str) -> None
+	__init__(self, players: list[Player], presenter: NullPresenter = None, observation: RoundObservation = None) -> None
 		Constructs the necessary attributes of a round.
 	"""
-	def __init__(self, players: list[Player]) -> None:
+	def __init__(self, players: list[Player], presenter: NullPresenter = None, observation: RoundObservation = None) -> None:
 		"""Constructs all the necessary attributes for a Round and executes a Hearts round.
 		
 		Parameters
 		----------
 		Players: list[Player]
 			the  list of all the players
+		presenter: NullPresenter
+			shows the round as it is played, the terminal with pacing when None
+		observation: RoundObservation
+			kept up to date as cards are played and handed to the players, one without passes when None
 		
 		Return
 		------
 		None
 		"""
 		self.players = players
+		self.presenter = presenter if presenter is not None else TerminalPresenter()
 		self.trick = []
+		self.played = 0
 		self.broken_hearts = False
+		self.observation = observation if observation is not None else RoundObservation(len(players))
 		self.starting_player_idx = self.check_first_player_idx(self.players)
+		for player in self.players:
+			player.observe_round_start(self.players)
 		# start execution
 		self.execute_round(players)
 		
@@ -67,9 +78,9 @@ class Round:
 		------
 		int: the index of the first leading player
 		"""
-		for player in players:
-			if Card(Rank.Two, Suit.Clubs) in player.hand:
-				return players.index(player)
+		for player_idx, player in enumerate(players):
+			if mask_of(player.hand) & TWO_OF_CLUBS_BIT:
+				return player_idx
 		
 		
 	def highest_player(self, players: list[Player], trick: list[Card]) -> Player: 
@@ -86,17 +97,7 @@ class Round:
 		------
 		Player: player that will be recieving the trick and leading the next round
 		"""
-		lead_suit = trick[0].suit
-		highest_card = trick[0]
-		highest_player_idx = self.starting_player_idx
-		
-		for trick_idx in range(0,len(trick)):
-			curr_player_idx = (self.starting_player_idx + trick_idx) % len(players)
-			curr_card = trick[trick_idx]
-			
-			if(curr_card.suit is lead_suit) and (curr_card > highest_card):
-				highest_card = curr_card
-				highest_player_idx = curr_player_idx
+		highest_player_idx = (self.starting_player_idx + trick_winner(trick)) % len(players)
 		self.starting_player_idx = highest_player_idx
 		return players[highest_player_idx]
 	
@@ -115,12 +116,7 @@ class Round:
 		------
 		int: penalty sum of the round
 		"""
-		penalty_sum = 0
-		for card in trick:
-			if card.suit is Suit.Hearts:
-				penalty_sum += 1
-			elif card == Card(Rank.Queen, Suit.Spades):
-				penalty_sum += 13
+		penalty_sum = penalty(mask_of(trick))
 		player.round_score += penalty_sum	
 		return penalty_sum
 	
@@ -139,8 +135,7 @@ class Round:
 		"""
 		for player in players:
 			if player.round_score == 26:
-				time.sleep(0.5)
-				print(f"{player} has shot the moon! Everyone else receives 26 points")
+				self.presenter.moon_shot(player)
 				for each_player in players:
 					if each_player == player:
 						player.round_score = 0
@@ -155,15 +150,16 @@ class Round:
 		Parameters
 		----------
 		card: Card
+			card that has just been played, added to the played cards
 
 		Return
 		------
 		None
 		"""
-		if (self.broken_hearts==False) and (card.suit is Suit.Hearts):
+		self.played |= card_bit(card)
+		if (self.broken_hearts==False) and (self.played & HEARTS_MASK):
 			self.broken_hearts = True
-			time.sleep(0.25)
-			print("Hearts have been broken!") 	
+			self.presenter.hearts_broken()
 			
 			
 	def execute_turns(self, players: list, broken_hearts: bool) -> None:
@@ -181,24 +177,25 @@ class Round:
 		None
 		"""
 		trick = []
+		leader_idx = self.starting_player_idx
 		
 		for i in range(len(players)):
 			curr_player_idx = (self.starting_player_idx + i) % len(players)
 			curr_player = players[curr_player_idx]
 			
-			card_played = curr_player.play_card(trick, broken_hearts)
-			if i ==0:
-				print(f"{curr_player} leads with \n{card_played}")
-			else:
-				print(f"{curr_player} plays \n{card_played}")
+			card_played = curr_player.play_card(trick, broken_hearts, self.observation.views[curr_player_idx])
+			self.presenter.card_played(curr_player, card_played, i == 0)
 			trick.append(card_played)
+			self.observation.record_card(curr_player_idx, card_played.bit, trick[0].bit)
 			
 			self.check_break_heart(card_played)			
 		highest_player = self.highest_player(players, trick)
 		
 		penalty_sum = self.update_score(highest_player, trick)
-		time.sleep(0.25)
-		print(f"{highest_player} takes the trick. Points received: {penalty_sum}")
+		self.observation.record_trick(players.index(highest_player), penalty_sum)
+		self.presenter.trick_taken(highest_player, penalty_sum)
+		for player in players:
+			player.observe_trick(leader_idx, trick)
 
 		
 	def execute_round(self, players: list) -> None:
@@ -226,25 +223,5 @@ class Round:
 			
 			
 if __name__ == "__main__":
-#	players = [BasicAIPlayer("Player 1"), BasicAIPlayer("Player 2"), BasicAIPlayer("Player 3"), BasicAIPlayer("Player 4")]
-#	players[0].hand = [Card(Rank.Four, Suit.Diamonds), Card(Rank.King, Suit.Clubs), Card(Rank.Nine, Suit.Clubs), Card(Rank.Ace, Suit.Hearts)]
-#	players[1].hand = [Card(Rank.Two, Suit.Clubs), Card(Rank.Four, Suit.Spades), Card(Rank.Nine, Suit.Spades), Card(Rank.Six, Suit.Diamonds)]
-#	players[2].hand = [Card(Rank.Seven, Suit.Diamonds), Card(Rank.Ace, Suit.Spades), Card(Rank.Jack, Suit.Diamonds), Card(Rank.Queen, Suit.Spades)]
-#	players[3].hand = [Card(Rank.Queen, Suit.Hearts), Card(Rank.Jack, Suit.Clubs), Card(Rank.Queen, Suit.Diamonds), Card(Rank.King, Suit.Hearts)]
-#	
-#	Round(players)
-
-	
-#	print(players[0].hand)
-
-#	for player in players:
-#		print(f"{player}'s score: {player.round_score}")
-#	for player in players:
-#		print(f"{player}'s total score: {player.total_score}")
-	
-	pass
-	
-	
-		
-		
-		
\ No newline at end of file
+	from benchmarks import main
+	main(["--filter", "round"])
@@ -0,0 +1,146 @@
+"""
+Legal-move generation for Hearts.
+
+The whole legal set of a position is worked out in one pass over the hand
+mask. At most one rule restricts any position, so the same evaluation also
+gives the message explaining why every other card is not allowed.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, QUEEN_OF_SPADES_BIT, SUIT_MASKS, TWO_OF_CLUBS_BIT, cards_of, mask_of
+from cards import Card
+
+MUST_LEAD_TWO_OF_CLUBS = "Player MUST lead with the two of Clubs in the first hand, You can't use other cards."
+HEARTS_NOT_BROKEN = "Player cannot lead with a heart until hearts have been broken"
+MUST_FOLLOW_SUIT = "Player still has cards from the suit of the current trick."
+NO_POINTS_FIRST_TRICK = "Player cannot play hearts or spades on the first round."
+
+
+def is_first_trick(hand, trick: list[Card]) -> bool:
+	"""Checks if the trick being played is the first trick of the round
+
+	Parameters
+	----------
+	hand: Hand or list[Card]
+		the cards in the player's hand
+	trick: list[Card]
+		list of Cards in played order from trick
+
+	Return
+	------
+	bool: True if the two of clubs is in the hand (to lead) or in the trick
+	"""
+	return bool((mask_of(hand) | mask_of(trick)) & TWO_OF_CLUBS_BIT)
+
+
+def legal_mask(hand_mask: int, trick: list[Card], broken_hearts: bool, first_trick: bool) -> tuple[int, str]:
+	"""Works out the mask of every card that may be played
+
+	Parameters
+	----------
+	hand_mask: int
+		mask of the cards in the player's hand
+	trick: list[Card]
+		list of Cards in played order from trick
+	broken_hearts: bool
+		indicates whether Hearts have been broken before
+	first_trick: bool
+		indicates whether this is the first trick of the round
+
+	Return
+	------
+	a tuple with the following types in order:
+		int: mask of the legal cards
+		str: why the cards outside the mask are not allowed, empty if all are
+	"""
+	lead_suit_mask = SUIT_MASKS[trick[0].suit] if len(trick) > 0 else 0
+	return legal_mask_for_suit(hand_mask, lead_suit_mask, broken_hearts, first_trick)
+
+
+def legal_mask_for_suit(hand_mask: int, lead_suit_mask: int, broken_hearts: bool, first_trick: bool) -> tuple[int, str]:
+	"""Works out the mask of every card that may be played, from masks only
+
+	This is legal_mask for callers that keep the trick as masks, such as the
+	rollout engine.
+
+	Parameters
+	----------
+	hand_mask: int
+		mask of the cards in the player's hand
+	lead_suit_mask: int
+		mask of the suit that was led, 0 when leading
+	broken_hearts: bool
+		indicates whether Hearts have been broken before
+	first_trick: bool
+		indicates whether this is the first trick of the round
+
+	Return
+	------
+	a tuple with the following types in order:
+		int: mask of the legal cards
+		str: why the cards outside the mask are not allowed, empty if all are
+	"""
+	# leading
+	if lead_suit_mask == 0:
+		if first_trick and hand_mask & TWO_OF_CLUBS_BIT:
+			return (TWO_OF_CLUBS_BIT, MUST_LEAD_TWO_OF_CLUBS)
+		if not broken_hearts:
+			non_hearts = hand_mask & ~HEARTS_MASK
+			if non_hearts:
+				return (non_hearts, HEARTS_NOT_BROKEN)
+		return (hand_mask, "")
+
+	# not leading
+	following = hand_mask & lead_suit_mask
+	if following:
+		return (following, MUST_FOLLOW_SUIT)
+	if first_trick:
+		no_points = hand_mask & ~(HEARTS_MASK | QUEEN_OF_SPADES_BIT)
+		if no_points:
+			return (no_points, NO_POINTS_FIRST_TRICK)
+	return (hand_mask, "")
+
+
+def legal_moves_with_reason(hand, trick: list[Card], broken_hearts: bool, first_trick: bool) -> tuple[list[Card], str]:
+	"""Returns every card that may be played, with the message for the others
+
+	Parameters
+	----------
+	hand: Hand or list[Card]
+		the cards in the player's hand
+	trick: list[Card]
+		list of Cards in played order from trick
+	broken_hearts: bool
+		indicates whether Hearts have been broken before
+	first_trick: bool
+		indicates whether this is the first trick of the round
+
+	Return
+	------
+	a tuple with the following types in order:
+		list[Card]: the legal cards, lowest first
+		str: why the cards not in the list are not allowed, empty if all are
+	"""
+	mask, reason = legal_mask(mask_of(hand), trick, broken_hearts, first_trick)
+	return (cards_of(mask), reason)
+
+
+def legal_moves(hand, trick: list[Card], broken_hearts: bool, first_trick: bool) -> list[Card]:
+	"""Returns every card that may be played
+
+	Parameters
+	----------
+	hand: Hand or list[Card]
+		the cards in the player's hand
+	trick: list[Card]
+		list of Cards in played order from trick
+	broken_hearts: bool
+		indicates whether Hearts have been broken before
+	first_trick: bool
+		indicates whether this is the first trick of the round
+
+	Return
+	------
+	list[Card]: the legal cards, lowest first
+	"""
+	return cards_of(legal_mask(mask_of(hand), trick, broken_hearts, first_trick)[0])
@@ -0,0 +1,555 @@
+"""
+Asyncio server hosting many tables of Hearts for networked players.
+
+Every table is a table.Table driven by one coroutine, so a single process
+holds thousands of them. Humans connect over TCP or a Unix socket and speak a
+line protocol; the seats left empty are filled with AI players, whose moves
+are computed in an executor so they never stall the event loop.
+
+The protocol is one line per message, words separated by spaces, cards
+written as rank and suit, e.g. QS, TH, 2C.
+
+Client to server:
+	JOIN <name> [<num_of_player> [<target_score>]]
+		asks for a seat at a table of 3 to 5 players (default 4, 100 points)
+	PASS <card> <card> <card>
+		the cards to pass, when asked
+	PLAY <card>
+		the card to play, when asked
+	QUIT
+		leaves, an AI takes over the seat
+	TOP [<count>]
+		asks for the leaderboard of the games finished on the server, before joining
+
+Server to client:
+	WELCOME <version>
+	SEATED <table_id> <seat_idx> <name>,<name>,...   the names may hold spaces, not commas
+	ROUND <round_count>
+	HAND <card> ...                     the hand, after dealing and after passing
+	ASK PASS <count> <card> ...         choose count cards from the legal ones
+	ASK PLAY <count> <card> ...
+	PLAYED <seat_idx> <card>
+	BROKEN
+	TRICK <seat_idx> <points>
+	MOON <seat_idx>
+	SCORES <total_score> ...
+	WON <seat_idx>
+	ERROR <message>                     e.g. a line sent when no ASK is pending, which is dropped
+	RATINGS <count>                     followed by count RATING lines, the best first
+	RATING <rank> <skill> <games> <agent>  human:<name> or ai:<strategy>
+
+Run from the command line, e.g.
+	python server.py --port 7777
+	python server.py --unix /tmp/hearts.sock --ai-workers 4
+"""
+
+from __future__ import annotations
+from cards import INTERNED_CARDS, Card, Rank, Suit
+from concurrent.futures import ProcessPoolExecutor
+from observation import SeatObservation
+from player import Player
+from presenter import NullPresenter
+from ratings import RatingTable
+from table import PASS, PLAY, Decision, Table
+from tournament import STRATEGIES
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import os
+
+PROTOCOL_VERSION = 1
+RANK_CODES = "23456789TJQKA"
+SUIT_CODES = {Suit.Clubs: "C", Suit.Diamonds: "D", Suit.Spades: "S", Suit.Hearts: "H"}
+CODE_SUITS = {code: suit for suit, code in SUIT_CODES.items()}
+
+
+def card_code(card: Card) -> str:
+	"""Returns the two letter code of a card, e.g. QS for the queen of spades"""
+	return RANK_CODES[card.rank.value-2] + SUIT_CODES[card.suit]
+
+
+def parse_card(code: str) -> Card:
+	"""Returns the card of a two letter code, raising ValueError if it is not one"""
+	code = code.upper()
+	if len(code) != 2 or code[0] not in RANK_CODES or code[1] not in CODE_SUITS:
+		raise ValueError(f"'{code}' is not a card, write e.g. QS or TH")
+	return INTERNED_CARDS[Rank(RANK_CODES.index(code[0])+2)][CODE_SUITS[code[1]]]
+
+
+def codes(cards: list[Card]) -> str:
+	"""Returns the codes of cards, separated by spaces"""
+	return " ".join(card_code(card) for card in cards)
+
+
+def ai_action(player: Player, kind: str, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> tuple:
+	"""Asks an AI player for its decision, in an executor thread or process
+
+	Parameters
+	----------
+	player: Player
+		the AI player, a copy of it when run in another process
+	kind: str
+		PASS or PLAY
+	trick: list[Card]
+		the cards of the current trick
+	broken_hearts: bool
+		True if hearts have been broken
+	observation: SeatObservation
+		the round seen from the player's seat, a copy of it when run in another process
+
+	Return
+	------
+	a tuple with the following types in order:
+		Card | list[Card]: the card to play or the cards to pass
+		Player: the player after deciding, so state it keeps survives a process pool
+	"""
+	if kind == PASS:
+		return (player.pass_cards(), player)
+	return (player.play_card(trick, broken_hearts, observation), player)
+
+
+
+class RemotePlayer(Player):
+	"""A class to represent a player seated over the network.
+
+	The server asks the connection for every decision, so the player
+	itself never chooses.
+
+	Attributes
+	----------
+	connection: Connection
+		the client playing this seat, None once it has left
+
+	Methods defined here:
+	play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card
+		Raises RuntimeError, decisions come from the connection
+	pass_cards(self) -> list[Card]
+		Raises RuntimeError, decisions come from the connection
+	"""
+	def __init__(self, name: str, connection: Connection) -> None:
+		super().__init__(name)
+		self.connection = connection
+
+	def play_card(self, trick: list[Card], broken_hearts: bool, observation: SeatObservation = None) -> Card:
+		raise RuntimeError(f"{self.name} plays over the network")
+
+	def pass_cards(self) -> list[Card]:
+		raise RuntimeError(f"{self.name} plays over the network")
+
+
+
+class Connection:
+	"""A class to represent a client connected to the server.
+
+	Attributes
+	----------
+	reader: asyncio.StreamReader
+		the stream the client's lines are read from
+	writer: asyncio.StreamWriter
+		the stream lines are written to the client on
+	name: str
+		the name the client joined with
+	inbox: asyncio.Queue
+		lines received once seated, None when the client has left
+
+	Methods
+	-------
+	send(self, line: str) -> None
+		Writes a line to the client, without waiting
+
+	Methods defined here:
+	__init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None
+		Constructs a connection not yet seated.
+	"""
+	def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		self.reader = reader
+		self.writer = writer
+		self.name = None
+		self.inbox = asyncio.Queue()
+
+	def send(self, line: str) -> None:
+		"""Writes a line to the client, dropping it if the client has left"""
+		if not self.writer.is_closing():
+			self.writer.write(line.encode() + b"\n")
+
+
+
+class BroadcastPresenter(NullPresenter):
+	"""A class to represent a presenter sending the events of a table to its human players.
+
+	Attributes
+	----------
+	players: list[Player]
+		the players seated at the table, the human ones are RemotePlayer
+
+	Methods
+	-------
+	broadcast(self, line: str) -> None
+		Sends a line to every human still at the table
+
+	Methods defined here:
+	All of the events of NullPresenter, sent as protocol lines.
+	"""
+	def __init__(self, players: list[Player]) -> None:
+		self.players = players
+
+	def broadcast(self, line: str) -> None:
+		"""Sends a line to every human still at the table"""
+		for player in self.players:
+			if isinstance(player, RemotePlayer) and player.connection is not None:
+				player.connection.send(line)
+
+	def seat_of(self, player: Player) -> int:
+		return next(seat_idx for seat_idx, seated in enumerate(self.players) if seated is player)
+
+	def send_hands(self) -> None:
+		for player in self.players:
+			if isinstance(player, RemotePlayer) and player.connection is not None:
+				player.connection.send(f"HAND {codes(player.hand)}")
+
+	def round_started(self, round_count: int) -> None:
+		self.broadcast(f"ROUND {round_count}")
+
+	def cards_dealt(self, players: list) -> None:
+		self.send_hands()
+
+	def cards_passed(self) -> None:
+		self.send_hands()
+
+	def card_played(self, player, card: Card, leading: bool) -> None:
+		self.broadcast(f"PLAYED {self.seat_of(player)} {card_code(card)}")
+
+	def hearts_broken(self) -> None:
+		self.broadcast("BROKEN")
+
+	def trick_taken(self, player, penalty_sum: int) -> None:
+		self.broadcast(f"TRICK {self.seat_of(player)} {penalty_sum}")
+
+	def moon_shot(self, player) -> None:
+		self.broadcast(f"MOON {self.seat_of(player)}")
+
+	def round_ended(self, round_count: int, players: list) -> None:
+		self.broadcast("SCORES " + " ".join(str(player.total_score) for player in players))
+
+	def game_won(self, player) -> None:
+		self.broadcast(f"WON {self.seat_of(player)}")
+
+
+
+class GameServer:
+	"""A class to represent a server running many tables of Hearts in one event loop.
+
+	Attributes
+	----------
+	ai_strategy: str
+		the strategy of the AI players filling empty seats, a key of tournament.STRATEGIES
+	wait_time: float
+		seconds a table waits for more humans before AI players fill it
+	executor: Executor
+		where AI decisions are computed, the loop's default thread pool when None
+	tables: dict[int, Table]
+		the tables being played, by id
+	lobby: dict[tuple[int, int], list[Connection]]
+		the humans waiting for a table, by number of players and target score
+	games_played: int
+		number of games finished
+	ratings: RatingTable
+		the rating of every human and AI strategy, as human:<name> and ai:<strategy>, updated as each game finishes
+	move_timeout: float
+		seconds a human has to answer an ASK before a move is made for it, no limit when None
+
+	Methods
+	-------
+	handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None
+		Serves one client, from joining until it leaves
+
+	join(self, connection: Connection, num_of_player: int, target_score: int) -> None
+		Puts a human in the lobby, starting the table once it is full
+
+	run_table(self, connections: list[Connection], num_of_player: int, target_score: int) -> None
+		Seats the humans and AI players and plays the game to the end
+
+	decide(self, table: Table, decision: Decision)
+		Gets the decision of one seat from its human or AI player
+
+	serve(self, host: str, port: int, unix_path: str) -> None
+		Accepts connections until cancelled
+
+	Methods defined here:
+	__init__(self, ai_strategy: str = "better", wait_time: float = 5.0, executor = None, ratings: RatingTable = None, move_timeout: float = 60.0) -> None
+		Constructs a server with no tables.
+	"""
+	def __init__(self, ai_strategy: str = "better", wait_time: float = 5.0, executor = None, ratings: RatingTable = None, move_timeout: float = 60.0) -> None:
+		if ai_strategy not in STRATEGIES:
+			raise ValueError(f"Unknown strategy '{ai_strategy}', choose from {', '.join(STRATEGIES)}")
+		self.ai_strategy = ai_strategy
+		self.wait_time = wait_time
+		self.executor = executor
+		self.tables = {}
+		self.lobby = {}
+		self.table_ids = itertools.count(1)
+		self.games_played = 0
+		self.ratings = ratings if ratings is not None else RatingTable()
+		self.move_timeout = move_timeout
+
+
+	async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		"""Serves one client: reads its JOIN, then passes its lines to the table it is seated at
+
+		Parameters
+		----------
+		reader: asyncio.StreamReader
+			the stream the client's lines are read from
+		writer: asyncio.StreamWriter
+			the stream lines are written to the client on
+
+		Return
+		------
+		None
+		"""
+		connection = Connection(reader, writer)
+		connection.send(f"WELCOME {PROTOCOL_VERSION}")
+		try:
+			async for raw_line in reader:
+				words = raw_line.decode(errors="replace").split()
+				if not words:
+					continue
+				command = words[0].upper()
+				if command == "QUIT":
+					break
+				if connection.name is not None:
+					connection.inbox.put_nowait(words)
+				elif command == "TOP":
+					limit = int(words[1]) if len(words) > 1 and words[1].isdigit() else None
+					leaderboard = self.ratings.leaderboard(limit)
+					connection.send(f"RATINGS {len(leaderboard)}")
+					for rank, (agent, rating) in enumerate(leaderboard, start=1):
+						connection.send(f"RATING {rank} {rating.conservative():.2f} {rating.games} {agent}")
+				elif command == "JOIN" and len(words) >= 2:
+					try:
+						num_of_player = int(words[2]) if len(words) > 2 else 4
+						target_score = int(words[3]) if len(words) > 3 else 100
+					except ValueError:
+						connection.send("ERROR JOIN <name> [<num_of_player> [<target_score>]]")
+						continue
+					if num_of_player < 3 or num_of_player > 5 or target_score < 10:
+						connection.send("ERROR Tables have 3 to 5 players and a target score of at least 10")
+						continue
+					# names are sent joined by commas
+					name = words[1].replace(",", "_")
+					# seats of one name would share a rating and never be compared
+					if any(waiting.name == name for waiting in self.lobby.get((num_of_player, target_score), [])):
+						connection.send(f"ERROR {name} is already waiting for this table, choose another name")
+						continue
+					connection.name = name
+					self.join(connection, num_of_player, target_score)
+				else:
+					connection.send("ERROR Send JOIN <name> [<num_of_player> [<target_score>]] or TOP [<count>] first")
+		except ConnectionError:
+			pass
+		finally:
+			connection.inbox.put_nowait(None)
+			for waiting in self.lobby.values():
+				if connection in waiting:
+					waiting.remove(connection)
+			writer.close()
+
+
+	def join(self, connection: Connection, num_of_player: int, target_score: int) -> None:
+		"""Puts a human in the lobby, starting the table once it is full or has waited wait_time
+
+		Parameters
+		----------
+		connection: Connection
+			the human joining
+		num_of_player: int
+			number of players at the table
+		target_score: int
+			the score that ends the game
+
+		Return
+		------
+		None
+		"""
+		key = (num_of_player, target_score)
+		waiting = self.lobby.get(key)
+		if waiting is None:
+			waiting = self.lobby[key] = []
+			asyncio.get_running_loop().call_later(self.wait_time, self.start_waiting, key, waiting)
+		waiting.append(connection)
+		if len(waiting) == num_of_player:
+			self.start_waiting(key, waiting)
+
+
+	def start_waiting(self, key: tuple[int, int], waiting: list[Connection]) -> None:
+		"""Starts a table for the humans waiting in the lobby, unless it has already started"""
+		if self.lobby.get(key) is not waiting:
+			return
+		del self.lobby[key]
+		if waiting:
+			asyncio.create_task(self.run_table(waiting, *key))
+
+
+	async def run_table(self, connections: list[Connection], num_of_player: int, target_score: int) -> None:
+		"""Seats the humans and AI players and plays the game to the end
+
+		Parameters
+		----------
+		connections: list[Connection]
+			the humans, seated first
+		num_of_player: int
+			number of players at the table
+		target_score: int
+			the score that ends the game
+
+		Return
+		------
+		None
+		"""
+		table_id = next(self.table_ids)
+		players = [RemotePlayer(connection.name, connection) for connection in connections]
+		for num in range(len(players)+1, num_of_player+1):
+			players.append(STRATEGIES[self.ai_strategy](f"Player {num}"))
+		names = ",".join(player.name for player in players)
+		for seat_idx, connection in enumerate(connections):
+			connection.send(f"SEATED {table_id} {seat_idx} {names}")
+
+		table = Table(players, target_score, presenter=BroadcastPresenter(players))
+		# only humans are shown the game, and AI players are sent to the executor without it
+		for player in players:
+			if not isinstance(player, RemotePlayer):
+				player.presenter = NullPresenter()
+		self.tables[table_id] = table
+		try:
+			while not table.is_over():
+				decisions = table.pending()
+				actions = await asyncio.gather(*(self.decide(table, decision) for decision in decisions))
+				for decision, action in zip(decisions, actions):
+					table.apply(decision.seat_idx, action)
+			self.games_played += 1
+			# prefixed, so a human cannot take the rating of an AI strategy by its name
+			agents = [f"human:{player.name}" if isinstance(player, RemotePlayer) else f"ai:{self.ai_strategy}" for player in table.players]
+			self.ratings.add_game(agents, [player.total_score for player in table.players])
+		finally:
+			del self.tables[table_id]
+			for connection in connections:
+				connection.writer.close()
+
+
+	async def decide(self, table: Table, decision: Decision):
+		"""Gets the decision of one seat, from its connection or from its AI player in the executor
+
+		A human is asked until it sends a legal choice. Lines it sent
+		before the ASK are dropped, so they never answer it. A human who
+		has left, or does not answer within move_timeout, is played for by
+		taking the lowest legal card, or passing the highest cards, as
+		BasicAIPlayer does.
+
+		Parameters
+		----------
+		table: Table
+			the table waiting for the decision
+		decision: Decision
+			the decision to make
+
+		Return
+		------
+		Card | list[Card]: the card to play or the cards to pass
+		"""
+		player = table.players[decision.seat_idx]
+		if not isinstance(player, RemotePlayer):
+			loop = asyncio.get_running_loop()
+			if decision.kind == PLAY:
+				args = (table.trick[:], table.broken_hearts, table.observation.views[decision.seat_idx])
+			else:
+				args = ([], False, None)
+			action, decided = await loop.run_in_executor(self.executor, ai_action, player, decision.kind, *args)
+			# a process pool decides on a copy, keep the state the player updated
+			decided.presenter = player.presenter
+			table.players[decision.seat_idx] = decided
+			return action
+
+		connection = player.connection
+		deadline = None if self.move_timeout is None else asyncio.get_running_loop().time() + self.move_timeout
+		while connection is not None:
+			# lines sent while no ASK was pending answer nothing
+			while not connection.inbox.empty():
+				if connection.inbox.get_nowait() is None:
+					player.connection = connection = None
+					break
+				connection.send("ERROR Not your turn")
+			if connection is None:
+				break
+			connection.send(f"ASK {decision.kind.upper()} {decision.count} {codes(decision.legal)}")
+			try:
+				await connection.writer.drain()
+			except ConnectionError:
+				pass
+			try:
+				timeout = None if deadline is None else max(deadline - asyncio.get_running_loop().time(), 0.0)
+				words = await asyncio.wait_for(connection.inbox.get(), timeout)
+			except asyncio.TimeoutError:
+				connection.send("ERROR Too slow, a move was made for you")
+				break
+			if words is None:
+				player.connection = connection = None
+				break
+			try:
+				if words[0].upper() != decision.kind.upper():
+					raise ValueError(f"Expected {decision.kind.upper()}")
+				cards = [parse_card(code) for code in words[1:]]
+				if len(cards) != decision.count or len(set(cards)) != decision.count:
+					raise ValueError(f"Choose {decision.count} different cards")
+				for card in cards:
+					if card not in decision.legal:
+						raise ValueError(decision.reason or f"{card_code(card)} is not in your hand")
+			except ValueError as error:
+				connection.send(f"ERROR {error}")
+				continue
+			return cards if decision.kind == PASS else cards[0]
+		return decision.legal[-decision.count:] if decision.kind == PASS else decision.legal[0]
+
+
+	async def serve(self, host: str = "127.0.0.1", port: int = 7777, unix_path: str = None) -> None:
+		"""Accepts connections until cancelled, on a Unix socket if unix_path is given, on TCP otherwise"""
+		if unix_path is not None:
+			server = await asyncio.start_unix_server(self.handle_connection, unix_path)
+		else:
+			server = await asyncio.start_server(self.handle_connection, host, port)
+		async with server:
+			await server.serve_forever()
+
+
+
+def main() -> None:
+	"""Runs the server from the command line"""
+	parser = argparse.ArgumentParser(description="Host tables of Hearts for networked players.")
+	parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+	parser.add_argument("--port", type=int, default=7777, help="TCP port to listen on")
+	parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+	parser.add_argument("--ai", default="better", choices=sorted(STRATEGIES), help="strategy of the AI players filling empty seats")
+	parser.add_argument("--wait", type=float, default=5.0, help="seconds a table waits for more humans")
+	parser.add_argument("--move-timeout", type=float, default=60.0, help="seconds a human has to answer before a move is made for it")
+	parser.add_argument("--ai-workers", type=int, default=0, help="processes computing AI moves (default: a thread pool)")
+	parser.add_argument("--ratings", default=None, metavar="PATH", help="carry the ratings over from PATH if it exists, and save them back to it on exit")
+	args = parser.parse_args()
+
+	# workers start on the first AI move, forking then would hand them copies of the open client sockets
+	executor = ProcessPoolExecutor(args.ai_workers, mp_context=multiprocessing.get_context("forkserver")) if args.ai_workers > 0 else None
+	ratings = RatingTable.load(args.ratings) if args.ratings is not None and os.path.exists(args.ratings) else None
+	server = GameServer(args.ai, args.wait, executor, ratings, args.move_timeout)
+	try:
+		asyncio.run(server.serve(args.host, args.port, args.unix))
+	except KeyboardInterrupt:
+		pass
+	finally:
+		if executor is not None:
+			executor.shutdown()
+		if args.ratings is not None:
+			server.ratings.save(args.ratings)
+
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,407 @@
+"""
+Double-dummy solver for Hearts endgames.
+
+Given every remaining hand, the current trick and whether hearts are broken,
+the solver finds the best round score a seat can guarantee, together with
+the best card for the seat to move. Scores follow Round.update_score and
+Round.check_shooting_the_moon.
+
+The search is paranoid: the seat being solved for minimises its own final
+round score and every other seat is assumed to play against it, which turns
+the game into a two-sided one that alpha-beta can prune. On top of that:
+
+* positions are keyed with Zobrist hashes into a fixed-size transposition
+  table, where deeper results are kept and older or shallower ones evicted;
+* cards of one suit in the same hand with no live card of another hand
+  between them (touching ranks) are equivalent, so only one is searched,
+  except for the queen of spades whose points set it apart;
+* the table's best move, then the rollout policy's card, are tried first;
+* the root position is canonicalized (see canonical.py) first, so positions
+  differing only in the ranks of played cards share the table;
+* once every point card is taken the result is known without searching,
+  and once the position is in the endgame tablebase it is looked up.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, INDEX_SUIT_MASK, QUEEN_OF_SPADES_BIT, penalty
+from canonical import canonical_position, unmap_bit
+from rollout import apply_moon_shot, playout_policy
+from rules import legal_mask_for_suit
+from tablebase import default_tablebase
+import random
+
+MAX_PLAYERS = 5
+
+_zobrist_rng = random.Random(0x4EA27)
+ZOBRIST_HAND = [[_zobrist_rng.getrandbits(64) for _ in range(52)] for _ in range(MAX_PLAYERS)]
+ZOBRIST_TRICK = [[_zobrist_rng.getrandbits(64) for _ in range(52)] for _ in range(MAX_PLAYERS)]
+ZOBRIST_LEADER = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+ZOBRIST_SEAT = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+ZOBRIST_POINTS = [_zobrist_rng.getrandbits(64) for _ in range(27)]
+ZOBRIST_MOON = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PLAYERS+2)]
+ZOBRIST_BROKEN_HEARTS = _zobrist_rng.getrandbits(64)
+ZOBRIST_FIRST_TRICK = _zobrist_rng.getrandbits(64)
+
+
+def equivalent_moves(legal: int, live: int) -> int:
+	"""Keeps one card of every group of touching legal cards
+
+	Two cards of the same suit are equivalent when every card ranked between
+	them is either in the same set of legal cards or already out of play. The
+	queen of spades carries points, so it is never merged with its neighbours.
+
+	Parameters
+	----------
+	legal: int
+		mask of the legal cards of the seat to move
+	live: int
+		mask of every card still in a hand or in the current trick
+
+	Return
+	------
+	int: mask holding the lowest card of every group
+	"""
+	others = live & ~legal
+	out = 0
+	prev_bit = 0
+	remaining = legal
+	while remaining:
+		bit = remaining & -remaining
+		remaining ^= bit
+		if prev_bit == 0 or INDEX_SUIT_MASK[bit.bit_length()-1] != INDEX_SUIT_MASK[prev_bit.bit_length()-1] or (bit | prev_bit) & QUEEN_OF_SPADES_BIT or others & (bit-1) & ~((prev_bit << 1)-1):
+			out |= bit
+		prev_bit = bit
+	return out
+
+
+
+class DoubleDummySolver:
+	"""A class to represent an exact solver of Hearts positions where every hand is known.
+
+	Attributes
+	----------
+	table_size: int
+		number of slots of the transposition table, a power of two
+	tablebase: Tablebase
+		the endgame tablebase consulted at the start of the last tricks, None if there is none
+	nodes: int
+		number of positions searched since the solver was created
+
+	Methods
+	-------
+	solve(self, hands: list[int], leader_idx: int, trick: list[int], points: list[int], broken_hearts: bool, first_trick: bool, seat_idx: int = None) -> tuple[int, int]
+		Returns the round score a seat can guarantee and the best card for the seat to move
+
+	solve_all(self, hands: list[int], leader_idx: int, trick: list[int], points: list[int], broken_hearts: bool, first_trick: bool) -> list[int]
+		Returns the round score every seat can guarantee
+
+	clear(self) -> None
+		Empties the transposition table
+
+	Methods defined here:
+	__init__(self, table_bits: int = 18, use_tablebase: bool = True) -> None
+		Constructs the transposition table of the solver.
+	"""
+	def __init__(self, table_bits: int = 18, use_tablebase: bool = True) -> None:
+		"""Constructs all the necessary attributes for the DoubleDummySolver object.
+
+		Parameters
+		----------
+		table_bits: int
+			the transposition table holds 2**table_bits entries, which bounds its memory
+		use_tablebase: bool
+			consult the default endgame tablebase, if there is one
+
+		Return
+		------
+		None
+		"""
+		self.table_size = 1 << table_bits
+		self.table = [None]*self.table_size
+		self.generation = 0
+		self.nodes = 0
+		self.tablebase = default_tablebase() if use_tablebase else None
+
+
+	def clear(self) -> None:
+		"""Empties the transposition table"""
+		self.table = [None]*self.table_size
+
+
+	def solve(self, hands: list[int], leader_idx: int, trick: list[int], points: list[int], broken_hearts: bool, first_trick: bool, seat_idx: int = None) -> tuple[int, int]:
+		"""Returns the round score a seat can guarantee and the best card for the seat to move
+
+		Parameters
+		----------
+		hands: list[int]
+			hand mask of every seat, in playing order, not modified
+		leader_idx: int
+			seat that led the current trick
+		trick: list[int]
+			bits already played to the current trick, in played order, not modified
+		points: list[int]
+			penalty points already taken by each seat this round, not modified
+		broken_hearts: bool
+			indicates whether Hearts have been broken before the current trick
+		first_trick: bool
+			indicates whether the current trick is the first of the round
+		seat_idx: int
+			seat to solve for, the seat to move when None
+
+		Return
+		------
+		a tuple with the following types in order:
+			int: the final round score of the seat, after shooting the moon, when every other seat plays against it
+			int: the bit of the best card for the seat to move, 0 if the round is over
+		"""
+		num_of_player = len(hands)
+		if seat_idx is None:
+			seat_idx = (leader_idx + len(trick)) % num_of_player
+		hands, trick, card_map = canonical_position(hands, trick, first_trick)
+		self.num_of_player = num_of_player
+		self.seat_idx = seat_idx
+		self.hands = hands[:]
+		self.trick = trick[:]
+		self.leader_idx = leader_idx
+		self.points = points[:]
+		self.broken_hearts = broken_hearts
+		self.first_trick = first_trick
+		live = 0
+		for hand in hands:
+			live |= hand
+		for bit in trick:
+			live |= bit
+		self.live = live
+		self.generation += 1
+		self.table_tricks = self.tablebase.tricks(num_of_player) if self.tablebase is not None else 0
+
+		self.hash = ZOBRIST_SEAT[seat_idx] ^ ZOBRIST_LEADER[leader_idx]
+		for hand_seat_idx, hand in enumerate(hands):
+			while hand:
+				bit = hand & -hand
+				hand ^= bit
+				self.hash ^= ZOBRIST_HAND[hand_seat_idx][bit.bit_length()-1]
+		for pos, bit in enumerate(trick):
+			self.hash ^= ZOBRIST_TRICK[pos][bit.bit_length()-1]
+		if broken_hearts:
+			self.hash ^= ZOBRIST_BROKEN_HEARTS
+		if first_trick:
+			self.hash ^= ZOBRIST_FIRST_TRICK
+
+		if len(trick) == num_of_player:
+			self.resolve_trick()
+		# the root is told apart from the rest of its trick by the length of the trick
+		self.root_live = self.live
+		self.root_trick_len = len(self.trick)
+		self.root_move = 0
+		value = self.search(-1, 27)
+		if self.live == 0:
+			return (value, 0)
+		if self.root_move:
+			return (value, unmap_bit(self.root_move, card_map))
+		# the score was bound by the points alone, so every legal card gives the same score
+		mover_idx = (self.leader_idx + len(self.trick)) % num_of_player
+		lead_suit_mask = INDEX_SUIT_MASK[self.trick[0].bit_length()-1] if self.trick else 0
+		legal = legal_mask_for_suit(self.hands[mover_idx], lead_suit_mask, self.broken_hearts, self.first_trick)[0]
+		return (value, unmap_bit(legal & -legal, card_map))
+
+
+	def solve_all(self, hands: list[int], leader_idx: int, trick: list[int], points: list[int], broken_hearts: bool, first_trick: bool) -> list[int]:
+		"""Returns the round score every seat can guarantee, each solved on its own
+
+		Parameters
+		----------
+		hands: list[int]
+			hand mask of every seat, in playing order, not modified
+		leader_idx: int
+			seat that led the current trick
+		trick: list[int]
+			bits already played to the current trick, in played order, not modified
+		points: list[int]
+			penalty points already taken by each seat this round, not modified
+		broken_hearts: bool
+			indicates whether Hearts have been broken before the current trick
+		first_trick: bool
+			indicates whether the current trick is the first of the round
+
+		Return
+		------
+		list[int]: for each seat, its final round score when every other seat plays against it
+		"""
+		return [self.solve(hands, leader_idx, trick, points, broken_hearts, first_trick, seat_idx)[0] for seat_idx in range(len(hands))]
+
+
+	def moon_state(self) -> int:
+		"""Returns the seat that alone took every point so far, MAX_PLAYERS once points are split, or MAX_PLAYERS+1 before any point is taken"""
+		moon_idx = MAX_PLAYERS+1
+		for seat_idx, seat_points in enumerate(self.points):
+			if seat_points:
+				if moon_idx != MAX_PLAYERS+1:
+					return MAX_PLAYERS
+				moon_idx = seat_idx
+		return moon_idx
+
+
+	def key(self, moon_idx: int) -> int:
+		"""Returns the Zobrist key of the position, including the points that decide the score"""
+		return self.hash ^ ZOBRIST_POINTS[self.points[self.seat_idx]] ^ ZOBRIST_MOON[moon_idx]
+
+
+	def resolve_trick(self) -> tuple:
+		"""Gives a complete trick to its winner and returns what is needed to take it back"""
+		trick = self.trick
+		trick_mask = 0
+		for bit in trick:
+			trick_mask |= bit
+		undo = (trick, self.leader_idx, self.broken_hearts, self.first_trick, self.hash, self.live)
+		winning_bit = 1 << ((trick_mask & INDEX_SUIT_MASK[trick[0].bit_length()-1]).bit_length()-1)
+		winner_idx = (self.leader_idx + trick.index(winning_bit)) % self.num_of_player
+
+		for pos, bit in enumerate(trick):
+			self.hash ^= ZOBRIST_TRICK[pos][bit.bit_length()-1]
+		self.hash ^= ZOBRIST_LEADER[self.leader_idx] ^ ZOBRIST_LEADER[winner_idx]
+		if self.first_trick:
+			self.hash ^= ZOBRIST_FIRST_TRICK
+			self.first_trick = False
+		if not self.broken_hearts and trick_mask & HEARTS_MASK:
+			self.hash ^= ZOBRIST_BROKEN_HEARTS
+			self.broken_hearts = True
+		self.points[winner_idx] += penalty(trick_mask)
+		self.live &= ~trick_mask
+		self.leader_idx = winner_idx
+		self.trick = []
+		return undo + (winner_idx, penalty(trick_mask))
+
+
+	def undo_trick(self, undo: tuple) -> None:
+		"""Takes back a trick given by resolve_trick"""
+		self.trick, self.leader_idx, self.broken_hearts, self.first_trick, self.hash, self.live, winner_idx, penalty_sum = undo
+		self.points[winner_idx] -= penalty_sum
+
+
+	def search(self, alpha: int, beta: int) -> int:
+		"""Searches the position with alpha-beta and returns the paranoid score of the seat solved for
+
+		Parameters
+		----------
+		alpha: int
+			score the seat solved for is already sure to get or better
+		beta: int
+			score the other seats are already sure to hold it to
+
+		Return
+		------
+		int: the final round score of the seat solved for
+		"""
+		self.nodes += 1
+		if not self.live & (HEARTS_MASK | QUEEN_OF_SPADES_BIT):
+			return apply_moon_shot(self.points)[self.seat_idx]
+
+		# bounds from the points alone: the seat scores at least 0 while it can still shoot the moon,
+		# and at most 26 while another seat can
+		moon_idx = self.moon_state()
+		seat_points = self.points[self.seat_idx]
+		lower = 0 if moon_idx == MAX_PLAYERS+1 or moon_idx == self.seat_idx else seat_points
+		upper = 26 if moon_idx == MAX_PLAYERS+1 or (moon_idx < MAX_PLAYERS and moon_idx != self.seat_idx) else seat_points + penalty(self.live)
+		if lower >= beta or lower == upper:
+			return lower
+		if upper <= alpha:
+			return upper
+
+		key = self.key(moon_idx)
+		slot = key & (self.table_size-1)
+		entry = self.table[slot]
+		tt_move = 0
+		at_root = self.live == self.root_live and len(self.trick) == self.root_trick_len
+		if entry is not None and entry[0] == key and at_root:
+			# the root is always searched, so that its best card is known
+			tt_move = entry[5]
+		elif entry is not None and entry[0] == key:
+			lower, upper, tt_move = entry[3], entry[4], entry[5]
+			if lower >= beta:
+				return lower
+			if upper <= alpha:
+				return upper
+			if lower > alpha:
+				alpha = lower
+			if upper < beta:
+				beta = upper
+			if lower == upper:
+				return lower
+		elif not self.trick and not self.first_trick and not at_root and self.hands[self.leader_idx].bit_count() <= self.table_tricks:
+			scores = self.tablebase.final_scores(self.hands, self.leader_idx, self.broken_hearts, self.points)
+			if scores is not None:
+				self.table[slot] = (key, self.generation, self.live.bit_count(), scores[self.seat_idx], scores[self.seat_idx], 0)
+				return scores[self.seat_idx]
+
+		num_of_player = self.num_of_player
+		trick = self.trick
+		mover_idx = (self.leader_idx + len(trick)) % num_of_player
+		hand = self.hands[mover_idx]
+		lead_suit_mask = INDEX_SUIT_MASK[trick[0].bit_length()-1] if trick else 0
+		legal = legal_mask_for_suit(hand, lead_suit_mask, self.broken_hearts, self.first_trick)[0]
+		moves_mask = equivalent_moves(legal, self.live)
+
+		# move ordering: the table's move, the play-out policy's card, then the rest from the lowest
+		trick_mask = 0
+		for bit in trick:
+			trick_mask |= bit
+		policy_move = playout_policy(moves_mask, lead_suit_mask, trick_mask, len(trick) == num_of_player-1)
+		moves = []
+		if tt_move & moves_mask:
+			moves.append(tt_move)
+		if policy_move != tt_move:
+			moves.append(policy_move)
+		remaining = moves_mask & ~(tt_move | policy_move)
+		while remaining:
+			bit = remaining & -remaining
+			remaining ^= bit
+			moves.append(bit)
+
+		minimising = mover_idx == self.seat_idx
+		best = 27 if minimising else -1
+		best_move = moves[0]
+		low, high = alpha, beta
+		for bit in moves:
+			idx = bit.bit_length()-1
+			self.hands[mover_idx] ^= bit
+			self.hash ^= ZOBRIST_HAND[mover_idx][idx] ^ ZOBRIST_TRICK[len(trick)][idx]
+			trick.append(bit)
+			if len(trick) == num_of_player:
+				undo = self.resolve_trick()
+				value = self.search(low, high)
+				self.undo_trick(undo)
+			else:
+				value = self.search(low, high)
+			trick.pop()
+			self.hash ^= ZOBRIST_HAND[mover_idx][idx] ^ ZOBRIST_TRICK[len(trick)][idx]
+			self.hands[mover_idx] ^= bit
+
+			if minimising:
+				if value < best:
+					best = value
+					best_move = bit
+					if best < high:
+						high = best
+			else:
+				if value > best:
+					best = value
+					best_move = bit
+					if best > low:
+						low = best
+			if low >= high:
+				break
+
+		if best <= alpha:
+			lower, upper = -1, best
+		elif best >= beta:
+			lower, upper = best, 27
+		else:
+			lower, upper = best, best
+		depth = self.live.bit_count()
+		# keep deeper results, but let results of an older solve be replaced
+		if entry is None or entry[0] == key or entry[1] != self.generation or entry[2] <= depth:
+			self.table[slot] = (key, self.generation, depth, lower, upper, best_move)
+		if at_root:
+			self.root_move = best_move
+		return best
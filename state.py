@@ -0,0 +1,250 @@
+"""
+Compact state of a round for search and play-outs.
+
+A GameState holds a position on bitmasks only: the hand of every seat, the
+cards of the current trick, the seat leading it, the penalty points taken so
+far and whether hearts are broken. make_move plays a card in place and
+finishes the trick when it is complete; unmake_move takes the last card back,
+giving the trick back as well. Everything an unmake needs is kept in lists
+sized once when the state is built, so making and taking back moves creates
+no list or tuple once the state exists. It still creates ints: CPython only
+shares the small ones, so most masks, and every one above 2**30, which
+needs a second digit, are new int objects.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, INDEX_SUIT_MASK, TWO_OF_CLUBS_BIT, penalty
+from rollout import apply_moon_shot
+from rules import legal_mask_for_suit
+
+MAX_TRICKS = 17
+
+
+class GameState:
+	"""A class to represent a round of Hearts as bitmasks that moves can be made on and taken back.
+
+	Attributes
+	----------
+	num_of_player: int
+		number of seats
+	hands: list[int]
+		hand mask of every seat
+	trick: list[int]
+		bits played to the current trick, in played order, only the first trick_len are in the trick
+	trick_len: int
+		number of cards in the current trick
+	leader_idx: int
+		seat leading the current trick
+	points: list[int]
+		penalty points taken by each seat this round
+	broken_hearts: bool
+		True once a heart has been played in a previous trick
+	first_trick: bool
+		True during the first trick of the round
+	played: int
+		mask of every card played since the state was built, including the trick it was built with
+	num_of_moves: int
+		number of moves that can be taken back
+
+	Methods
+	-------
+	to_move(self) -> int
+		Returns the seat to play
+
+	legal_mask(self) -> int
+		Returns the mask of the cards the seat to play may play
+
+	make_move(self, bit: int) -> None
+		Plays a card, finishing the trick when it is complete
+
+	unmake_move(self) -> None
+		Takes back the last card made
+
+	clone(self) -> GameState
+		Returns an independent copy, e.g. to hand to a worker
+
+	is_over(self) -> bool
+		Returns True once every card has been played
+
+	scores(self) -> list[int]
+		Returns the round score of each seat, after shooting the moon
+
+	from_table(table: Table) -> GameState
+		Returns the state of the round being played at a Table
+
+	Methods defined here:
+	__init__(self, hands: list[int], leader_idx: int = None, trick: list[int] = (), points: list[int] = None, broken_hearts: bool = False, first_trick: bool = None) -> None
+		Constructs the state of a position.
+	"""
+	__slots__ = ("num_of_player", "hands", "trick", "trick_len", "leader_idx", "points", "broken_hearts", "first_trick", "played",
+		"num_of_moves", "base", "moves", "num_of_tricks", "leaders", "winners", "penalties", "flags")
+
+	def __init__(self, hands: list[int], leader_idx: int = None, trick: list[int] = (), points: list[int] = None, broken_hearts: bool = False, first_trick: bool = None) -> None:
+		"""Constructs all the necessary attributes for the GameState object.
+
+		Parameters
+		----------
+		hands: list[int]
+			hand mask of every seat, in playing order, copied
+		leader_idx: int
+			seat that led the current trick, the holder of the two of clubs when None
+		trick: list[int]
+			bits already played to the current trick, in played order
+		points: list[int]
+			penalty points already taken by each seat, none when None
+		broken_hearts: bool
+			indicates whether Hearts have been broken before the current trick
+		first_trick: bool
+			indicates whether the current trick is the first of the round, True when the two of clubs is still in play
+
+		Return
+		------
+		None
+		"""
+		num_of_player = len(hands)
+		self.num_of_player = num_of_player
+		self.hands = list(hands)
+		trick_mask = 0
+		for bit in trick:
+			trick_mask |= bit
+		if leader_idx is None:
+			leader_idx = next(seat_idx for seat_idx, hand in enumerate(hands) if hand & TWO_OF_CLUBS_BIT)
+		if first_trick is None:
+			first_trick = bool((trick_mask | sum(hands)) & TWO_OF_CLUBS_BIT)
+		self.trick = list(trick) + [0]*(num_of_player-len(trick))
+		self.trick_len = len(trick)
+		self.leader_idx = leader_idx
+		self.points = [0]*num_of_player if points is None else list(points)
+		self.broken_hearts = broken_hearts
+		self.first_trick = first_trick
+		self.played = trick_mask
+
+		# the cards of the trick the state is built with are kept as moves that cannot be taken back,
+		# so the whole trick can be restored when its last card is
+		self.moves = list(trick) + [0]*(num_of_player*MAX_TRICKS)
+		self.num_of_moves = len(trick)
+		self.base = len(trick)
+		self.num_of_tricks = 0
+		self.leaders = [0]*MAX_TRICKS
+		self.winners = [0]*MAX_TRICKS
+		self.penalties = [0]*MAX_TRICKS
+		self.flags = [0]*MAX_TRICKS
+
+
+	def to_move(self) -> int:
+		"""Returns the seat to play"""
+		return (self.leader_idx + self.trick_len) % self.num_of_player
+
+
+	def legal_mask(self) -> int:
+		"""Returns the mask of the cards the seat to play may play"""
+		lead_suit_mask = INDEX_SUIT_MASK[self.trick[0].bit_length()-1] if self.trick_len else 0
+		return legal_mask_for_suit(self.hands[(self.leader_idx + self.trick_len) % self.num_of_player], lead_suit_mask, self.broken_hearts, self.first_trick)[0]
+
+
+	def make_move(self, bit: int) -> None:
+		"""Plays a card of the seat to play, finishing the trick when it is complete
+
+		The card is not checked against the rules, see legal_mask.
+
+		Parameters
+		----------
+		bit: int
+			the bit of the card
+
+		Return
+		------
+		None
+		"""
+		num_of_player = self.num_of_player
+		trick = self.trick
+		trick_len = self.trick_len
+		self.hands[(self.leader_idx + trick_len) % num_of_player] ^= bit
+		trick[trick_len] = bit
+		self.moves[self.num_of_moves] = bit
+		self.num_of_moves += 1
+		self.played |= bit
+		if trick_len+1 < num_of_player:
+			self.trick_len = trick_len+1
+			return
+
+		trick_mask = 0
+		for card_bit in trick:
+			trick_mask |= card_bit
+		winning_bit = 1 << ((trick_mask & INDEX_SUIT_MASK[trick[0].bit_length()-1]).bit_length()-1)
+		winner_idx = (self.leader_idx + trick.index(winning_bit)) % num_of_player
+		penalty_sum = penalty(trick_mask)
+		trick_idx = self.num_of_tricks
+		self.leaders[trick_idx] = self.leader_idx
+		self.winners[trick_idx] = winner_idx
+		self.penalties[trick_idx] = penalty_sum
+		self.flags[trick_idx] = self.broken_hearts | self.first_trick << 1
+		self.num_of_tricks = trick_idx+1
+		self.points[winner_idx] += penalty_sum
+		self.leader_idx = winner_idx
+		self.trick_len = 0
+		if trick_mask & HEARTS_MASK:
+			self.broken_hearts = True
+		self.first_trick = False
+
+
+	def unmake_move(self) -> None:
+		"""Takes back the last card made, and the trick it finished if it did"""
+		if self.num_of_moves == self.base:
+			raise IndexError("No move to take back")
+		num_of_player = self.num_of_player
+		self.num_of_moves -= 1
+		bit = self.moves[self.num_of_moves]
+		if self.trick_len == 0:
+			trick_idx = self.num_of_tricks-1
+			self.num_of_tricks = trick_idx
+			self.points[self.winners[trick_idx]] -= self.penalties[trick_idx]
+			self.leader_idx = self.leaders[trick_idx]
+			flags = self.flags[trick_idx]
+			self.broken_hearts = bool(flags & 1)
+			self.first_trick = bool(flags & 2)
+			# the cards of the next trick were written over the finished one, so it is restored from the moves
+			first_move = self.num_of_moves - (num_of_player-1)
+			for pos in range(num_of_player-1):
+				self.trick[pos] = self.moves[first_move+pos]
+			self.trick_len = num_of_player
+		self.trick_len -= 1
+		self.trick[self.trick_len] = 0
+		self.hands[(self.leader_idx + self.trick_len) % num_of_player] ^= bit
+		self.played ^= bit
+
+
+	def clone(self) -> GameState:
+		"""Returns an independent copy of the state, including the moves that can be taken back"""
+		other = GameState.__new__(GameState)
+		for name in ("num_of_player", "trick_len", "leader_idx", "broken_hearts", "first_trick", "played", "num_of_moves", "base", "num_of_tricks"):
+			setattr(other, name, getattr(self, name))
+		for name in ("hands", "trick", "points", "moves", "leaders", "winners", "penalties", "flags"):
+			setattr(other, name, getattr(self, name)[:])
+		return other
+
+
+	def is_over(self) -> bool:
+		"""Returns True once every card has been played"""
+		return self.trick_len == 0 and not any(self.hands)
+
+
+	def scores(self) -> list[int]:
+		"""Returns the round score of each seat from the points taken so far, after shooting the moon"""
+		return apply_moon_shot(self.points[:])
+
+
+	@staticmethod
+	def from_table(table) -> GameState:
+		"""Returns the state of the round being played at a Table
+
+		Parameters
+		----------
+		table: Table
+			a table in the middle of playing a round
+
+		Return
+		------
+		GameState: the position, with the points the players have taken this round
+		"""
+		return GameState(table.hands, table.leader_idx, [card.bit for card in table.trick], [player.round_score for player in table.players], table.broken_hearts, table.first_trick)
@@ -0,0 +1,405 @@
+"""
+Step-wise engine for a game of Hearts.
+
+Hearts and Round play a whole game or round inside their constructors, asking
+each Player for its cards. A Table holds the same game as a state that only
+moves when it is told to: pending() lists the decisions it is waiting for,
+legal_actions() the choices of a seat, and apply() makes one. Nothing blocks,
+so one loop can interleave many tables and hand each decision to whatever
+plays that seat, a local AI, a human or a remote bot.
+
+The Table keeps the hand and scores of its Player objects up to date and
+reports to a presenter exactly as Hearts and Round do, so presenters,
+recording and the observe_* hooks of the players work unchanged. Driven by
+play_table with AI players, a Table plays the same game as Hearts with the
+same seed.
+"""
+
+from __future__ import annotations
+from bitboard import HEARTS_MASK, TWO_OF_CLUBS_BIT, Hand, cards_of, deck_mask, mask_of, penalty, trick_winner
+from cards import Card
+from deals import DealGenerator
+from observation import RoundObservation
+from player import Player
+from presenter import NullPresenter
+from rules import legal_mask
+import random
+
+PASS = "pass"
+PLAY = "play"
+NUM_OF_PASSED = 3
+
+
+class Decision:
+	"""A class to represent a choice a Table is waiting for.
+
+	Attributes
+	----------
+	seat_idx: int
+		the seat that has to choose
+	kind: str
+		PASS to choose the cards to pass, PLAY to choose the card to play
+	count: int
+		number of cards to choose
+	legal: list[Card]
+		the cards that may be chosen, lowest first
+	reason: str
+		why the other cards of the hand may not be chosen, empty if all may
+
+	Methods defined here:
+	__init__(self, seat_idx: int, kind: str, count: int, legal: list[Card], reason: str) -> None
+		Constructs the attributes of a Decision object.
+
+	__repr__(self) -> str
+		Return a string representation of the Decision object.
+	"""
+	def __init__(self, seat_idx: int, kind: str, count: int, legal: list[Card], reason: str) -> None:
+		self.seat_idx = seat_idx
+		self.kind = kind
+		self.count = count
+		self.legal = legal
+		self.reason = reason
+
+	def __repr__(self) -> str:
+		return f"Decision(seat_idx={self.seat_idx}, kind={self.kind!r}, count={self.count}, legal={self.legal})"
+
+
+
+class Table:
+	"""A class to represent a game of Hearts played one decision at a time.
+
+	Attributes
+	----------
+	players: list[Player]
+		the player in each seat, whose hand and scores the table keeps up to date
+	target_score: int
+		the score that ends the game
+	seed: int
+		seed of the game's random number generator
+	presenter: NullPresenter
+		shows the game as it is played
+	round_count: int
+		the current round, from 1
+	phase: str
+		PASS while cards are being passed, PLAY while tricks are played, "over" once the game has ended
+	hands: list[int]
+		hand mask of each seat
+	passes: list[int]
+		mask of the cards each seat has chosen to pass, None until it has chosen
+	trick: list[Card]
+		the cards of the current trick, in played order
+	leader_idx: int
+		the seat leading the current trick
+	broken_hearts: bool
+		True once a heart has been played in a previous trick of the round
+	first_trick: bool
+		True during the first trick of the round
+	played: int
+		mask of every card played this round
+	observation: RoundObservation
+		what the seats can know of the round, handed to play_card by play_table, None while passing
+	winner_idx: int
+		the winning seat once the game is over, None before
+
+	Methods
+	-------
+	pending(self) -> list[Decision]
+		Lists the decisions the table is waiting for
+
+	legal_actions(self, seat_idx: int) -> list[Card]
+		Lists the cards a seat may choose
+
+	apply(self, seat_idx: int, action) -> None
+		Makes the decision of a seat
+
+	decisions(self) -> Generator[Decision]
+		Yields every pending decision until the game is over
+
+	is_over(self) -> bool
+		Returns True once the game has ended
+
+	start_round(self) -> None
+		Deals a new round
+
+	start_play(self) -> None
+		Starts the first trick of the round
+
+	end_round(self) -> None
+		Scores the round, then ends the game or deals the next round
+
+	Methods defined here:
+	__init__(self, players: list[Player], target_score: int = 100, seed: int = None, presenter: NullPresenter = None) -> None
+		Seats the players and deals the first round.
+	"""
+	def __init__(self, players: list[Player], target_score: int = 100, seed: int = None, presenter: NullPresenter = None) -> None:
+		"""Constructs all the necessary attributes for the Table object and deals the first round.
+
+		Parameters
+		----------
+		players: list[Player]
+			the player in each seat, 3 to 5 of them
+		target_score: int
+			the score that ends the game
+		seed: int
+			seed of the game's random number generator, as in Hearts
+		presenter: NullPresenter
+			shows the game as it is played, nothing when None
+
+		Return
+		------
+		None
+		"""
+		if len(players) < 3 or len(players) > 5:
+			raise ValueError(f"Hearts needs 3 to 5 players, got {len(players)}")
+		self.players = players
+		self.target_score = target_score
+		self.seed = seed
+		self.rng = random.Random(seed)
+		self.presenter = presenter if presenter is not None else NullPresenter()
+		self.dealer = DealGenerator(cards_of(deck_mask(len(players))), len(players))
+		self.round_count = 0
+		self.winner_idx = None
+		self.presenter.welcome()
+		for player in players:
+			player.presenter = self.presenter
+		self.start_round()
+
+
+	def start_round(self) -> None:
+		"""Deals a new round and waits for every seat to pass, as Hearts.execute_hearts does"""
+		self.round_count += 1
+		self.presenter.round_started(self.round_count)
+		self.hands = self.dealer.deal(self.rng)
+		for player, hand in zip(self.players, self.hands):
+			player.hand = Hand.from_mask(hand)
+		self.presenter.cards_dealt(self.players)
+		self.passes = [None]*len(self.players)
+		self.observation = None
+		self.phase = PASS
+
+
+	def start_play(self) -> None:
+		"""Starts the first trick of the round, led by the two of clubs"""
+		self.presenter.cards_passed()
+		self.phase = PLAY
+		self.trick = []
+		self.played = 0
+		self.broken_hearts = False
+		self.first_trick = True
+		self.leader_idx = next(seat_idx for seat_idx, hand in enumerate(self.hands) if hand & TWO_OF_CLUBS_BIT)
+		self.observation = RoundObservation(len(self.players), self.passes, self.round_count)
+		for player in self.players:
+			player.observe_round_start(self.players)
+
+
+	def is_over(self) -> bool:
+		"""Returns True once the game has ended"""
+		return self.phase == "over"
+
+
+	def to_play(self) -> int:
+		"""Returns the seat to play the next card"""
+		return (self.leader_idx + len(self.trick)) % len(self.players)
+
+
+	def legal_actions(self, seat_idx: int) -> list[Card]:
+		"""Lists the cards a seat may choose now, empty if the table is not waiting for it"""
+		for decision in self.pending():
+			if decision.seat_idx == seat_idx:
+				return decision.legal
+		return []
+
+
+	def pending(self) -> list[Decision]:
+		"""Lists the decisions the table is waiting for
+
+		While passing, every seat that has not chosen yet is waiting, so
+		their decisions can be made in any order or at the same time. While
+		playing, only the seat to play is.
+
+		Return
+		------
+		list[Decision]: the pending decisions, empty once the game is over
+		"""
+		if self.phase == PASS:
+			return [Decision(seat_idx, PASS, NUM_OF_PASSED, cards_of(hand), "") for seat_idx, hand in enumerate(self.hands) if self.passes[seat_idx] is None]
+		if self.phase == PLAY:
+			seat_idx = self.to_play()
+			legal, reason = legal_mask(self.hands[seat_idx], self.trick, self.broken_hearts, self.first_trick)
+			return [Decision(seat_idx, PLAY, 1, cards_of(legal), reason)]
+		return []
+
+
+	def decisions(self):
+		"""Yields every pending decision until the game is over
+
+		The caller applies each decision before asking for the next one; a
+		decision that was not applied is yielded again.
+
+		Return
+		------
+		Generator[Decision]: the decisions, one at a time
+		"""
+		while not self.is_over():
+			for decision in self.pending():
+				yield decision
+
+
+	def apply(self, seat_idx: int, action) -> None:
+		"""Makes the decision of a seat
+
+		Parameters
+		----------
+		seat_idx: int
+			the seat choosing
+		action: Card | list[Card]
+			the card to play, or the cards to pass
+
+		Return
+		------
+		None
+		"""
+		if self.phase == PASS:
+			self.apply_pass(seat_idx, action)
+		elif self.phase == PLAY:
+			self.apply_play(seat_idx, action)
+		else:
+			raise ValueError("The game is over")
+
+
+	def apply_pass(self, seat_idx: int, cards: list[Card]) -> None:
+		"""Stores the cards a seat passes, and exchanges them once every seat has chosen"""
+		if self.passes[seat_idx] is not None:
+			raise ValueError(f"{self.players[seat_idx]} has already passed")
+		passed = mask_of(cards)
+		if len(cards) != NUM_OF_PASSED or passed.bit_count() != NUM_OF_PASSED:
+			raise ValueError(f"{NUM_OF_PASSED} different cards must be passed")
+		if passed & ~self.hands[seat_idx]:
+			raise ValueError("Only cards in hand can be passed")
+		self.passes[seat_idx] = passed
+		if None in self.passes:
+			return
+
+		# as Hearts.pass_cards: seat i passes to seat (i+round_count) % players, so every
+		# seat gets its own cards back when round_count is a multiple of the players
+		num_of_player = len(self.players)
+		hands = [hand & ~passed for hand, passed in zip(self.hands, self.passes)]
+		for idx, passed in enumerate(self.passes):
+			hands[(idx+self.round_count) % num_of_player] |= passed
+		self.hands = hands
+		for player, hand in zip(self.players, hands):
+			player.hand = Hand.from_mask(hand)
+		self.start_play()
+
+
+	def apply_play(self, seat_idx: int, card: Card) -> None:
+		"""Plays a card to the trick, and finishes the trick, the round and the game when they are over"""
+		if seat_idx != self.to_play():
+			raise ValueError(f"It is not {self.players[seat_idx]}'s turn")
+		legal, reason = legal_mask(self.hands[seat_idx], self.trick, self.broken_hearts, self.first_trick)
+		if not card.bit & self.hands[seat_idx]:
+			raise ValueError(f"{card} is not in {self.players[seat_idx]}'s hand")
+		if not card.bit & legal:
+			raise ValueError(reason)
+
+		player = self.players[seat_idx]
+		self.hands[seat_idx] ^= card.bit
+		player.hand = Hand.from_mask(self.hands[seat_idx])
+		self.presenter.card_played(player, card, len(self.trick) == 0)
+		self.trick.append(card)
+		self.observation.record_card(seat_idx, card.bit, self.trick[0].bit)
+		# as Round.check_break_heart, hearts count as broken from the next trick
+		if not self.played & HEARTS_MASK and card.bit & HEARTS_MASK:
+			self.presenter.hearts_broken()
+		self.played |= card.bit
+		if len(self.trick) < len(self.players):
+			return
+
+		trick = self.trick
+		winner_idx = (self.leader_idx + trick_winner(trick)) % len(self.players)
+		penalty_sum = penalty(mask_of(trick))
+		self.players[winner_idx].round_score += penalty_sum
+		self.observation.record_trick(winner_idx, penalty_sum)
+		self.presenter.trick_taken(self.players[winner_idx], penalty_sum)
+		for each_player in self.players:
+			each_player.observe_trick(self.leader_idx, trick)
+		self.broken_hearts = bool(self.played & HEARTS_MASK)
+		self.first_trick = False
+		self.leader_idx = winner_idx
+		self.trick = []
+		if self.hands[winner_idx] == 0:
+			self.end_round()
+
+
+	def end_round(self) -> None:
+		"""Scores the round as Round does, then ends the game or deals the next round"""
+		for player in self.players:
+			if player.round_score == 26:
+				self.presenter.moon_shot(player)
+				for each_player in self.players:
+					each_player.round_score = 0 if each_player is player else 26
+				break
+		for player in self.players:
+			player.total_score += player.round_score
+			player.round_score = 0
+		self.presenter.round_ended(self.round_count, self.players)
+
+		# as Hearts.game_end: someone reached the target and the lowest score is not tied
+		totals = [player.total_score for player in self.players]
+		lowest = min(totals)
+		if max(totals) >= self.target_score and totals.count(lowest) == 1:
+			self.phase = "over"
+			self.winner_idx = totals.index(lowest)
+			self.presenter.game_won(self.players[self.winner_idx])
+		else:
+			self.start_round()
+
+
+def play_table(table: Table) -> Table:
+	"""Plays a table to the end, asking each seat's Player for every decision
+
+	Parameters
+	----------
+	table: Table
+		the table, its players able to choose (AI players, or humans with a presenter)
+
+	Return
+	------
+	Table: the same table, once the game is over
+	"""
+	for decision in table.decisions():
+		player = table.players[decision.seat_idx]
+		if decision.kind == PASS:
+			table.apply(decision.seat_idx, player.pass_cards())
+		else:
+			table.apply(decision.seat_idx, player.play_card(table.trick[:], table.broken_hearts, table.observation.views[decision.seat_idx]))
+	return table
+
+
+def play_tables(tables: list[Table]) -> list[Table]:
+	"""Plays many tables to the end in one loop, one decision of each table in turn
+
+	Parameters
+	----------
+	tables: list[Table]
+		the tables, their players able to choose
+
+	Return
+	------
+	list[Table]: the same tables, once every game is over
+	"""
+	running = [(table, table.decisions()) for table in tables]
+	while running:
+		still_running = []
+		for table, decisions in running:
+			decision = next(decisions, None)
+			if decision is None:
+				continue
+			player = table.players[decision.seat_idx]
+			if decision.kind == PASS:
+				table.apply(decision.seat_idx, player.pass_cards())
+			else:
+				table.apply(decision.seat_idx, player.play_card(table.trick[:], table.broken_hearts, table.observation.views[decision.seat_idx]))
+			still_running.append((table, decisions))
+		running = still_running
+	return tables
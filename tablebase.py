@@ -0,0 +1,324 @@
+"""
+Memory-mapped endgame tablebase.
+
+The last few tricks of a round have few positions once only the order of
+the live cards in each suit is kept, so they can be solved once offline by
+build_tablebase.py and looked up instead of searched.
+
+A position is taken at the start of a trick, seen from the leader. Its
+canonical key lists, for each suit, which seat holds each live card from the
+lowest to the highest, marks the queen of spades, and sorts clubs and
+diamonds since they play the same after the first trick.
+
+For every seat the table stores the paranoid score of the seat (see
+solver.py) under each state of the points already taken:
+
+* points split between several seats: the points the seat still takes, to
+  add to the points it already has;
+* the seat alone took every point so far: its final round score;
+* another seat alone took every point so far: one final round score for
+  each other seat.
+
+File layout, little-endian: a header, then for each number of players an
+open-addressing hash table of fixed-size records, an 8-byte key followed by
+one byte per stored score. The file is memory-mapped, so a lookup is a few
+probes into shared pages, with nothing parsed at startup.
+"""
+
+from __future__ import annotations
+from bitboard import CLUBS_MASK, DIAMONDS_MASK, QUEEN_OF_SPADES_BIT, SPADES_MASK
+import hashlib
+import mmap
+import os
+import struct
+
+MAGIC = b"HTB1"
+HEADER = struct.Struct("<4sI")
+SECTION = struct.Struct("<IIQQ")
+KEY = struct.Struct("<Q")
+NO_SCORE = 255
+DEFAULT_PATH = os.environ.get("HEARTS_TABLEBASE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgames.tb"))
+
+
+def canonical_key(hands: list[int], leader_idx: int, broken_hearts: bool) -> int:
+	"""Returns the tablebase key of a position at the start of a trick
+
+	Parameters
+	----------
+	hands: list[int]
+		hand mask of every seat, in playing order
+	leader_idx: int
+		seat leading the trick
+	broken_hearts: bool
+		indicates whether Hearts have been broken
+
+	Return
+	------
+	int: a non-zero 64-bit key, the same for positions that only differ in ranks no live card separates
+	"""
+	num_of_player = len(hands)
+	rel_hands = hands[leader_idx:] + hands[:leader_idx]
+	live = 0
+	for hand in rel_hands:
+		live |= hand
+
+	# the seat holding each live card from the lowest, suit after suit, the queen of spades marked by adding 16
+	owners = bytearray()
+	remaining = live
+	while remaining:
+		bit = remaining & -remaining
+		remaining ^= bit
+		seat_idx = 0
+		while not rel_hands[seat_idx] & bit:
+			seat_idx += 1
+		owners.append(seat_idx + 16 if bit == QUEEN_OF_SPADES_BIT else seat_idx)
+	num_of_clubs = (live & CLUBS_MASK).bit_count()
+	num_of_diamonds = (live & DIAMONDS_MASK).bit_count()
+	num_of_spades = (live & SPADES_MASK).bit_count()
+	clubs, diamonds = sorted((bytes(owners[:num_of_clubs]), bytes(owners[num_of_clubs:num_of_clubs+num_of_diamonds])))
+	spades = bytes(owners[num_of_clubs+num_of_diamonds:num_of_clubs+num_of_diamonds+num_of_spades])
+	hearts = bytes(owners[num_of_clubs+num_of_diamonds+num_of_spades:])
+
+	# with no heart left it makes no difference whether hearts were broken
+	flags = bytes([num_of_player, 1 if broken_hearts or len(hearts) == 0 else 0])
+	encoded = b"|".join((flags, clubs, diamonds, spades, hearts))
+	return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little") or 1
+
+
+def score_slot(num_of_player: int, seat_offset: int, moon_offset: int) -> int:
+	"""Returns where a score is stored in a record
+
+	Parameters
+	----------
+	num_of_player: int
+		number of players
+	seat_offset: int
+		seat of the score, counted from the leader
+	moon_offset: int
+		seat that alone took every point so far, counted from the leader, or num_of_player once points are split
+
+	Return
+	------
+	int: index of the score among the scores of the record
+	"""
+	return seat_offset*(num_of_player+1) + moon_offset
+
+
+
+class Tablebase:
+	"""A class to represent an endgame tablebase file, memory-mapped for lookups.
+
+	Attributes
+	----------
+	path: str
+		the tablebase file
+	sections: dict[int, tuple[int,int,int,int]]
+		(number of tricks, number of slots, offset, record size) for each number of players
+
+	Methods
+	-------
+	tricks(self, num_of_player: int) -> int
+		Returns the number of last tricks stored for a number of players
+
+	lookup(self, hands: list[int], leader_idx: int, broken_hearts: bool) -> int
+		Returns the offset of the scores of a position, or -1 if it is not stored
+
+	score(self, record: int, num_of_player: int, seat_offset: int, moon_offset: int) -> int
+		Reads one score of a record
+
+	final_scores(self, hands: list[int], leader_idx: int, broken_hearts: bool, points: list[int]) -> list[int]
+		Returns the final round score every seat can guarantee, or None if the position is not stored
+
+	close(self) -> None
+		Unmaps the file
+
+	write(path: str, sections: dict[int, tuple[int, dict[int, bytes]]]) -> None
+		Writes a tablebase file
+
+	Methods defined here:
+	__init__(self, path: str) -> None
+		Maps the file and reads its header.
+	"""
+	def __init__(self, path: str) -> None:
+		"""Constructs all the necessary attributes for the Tablebase object.
+
+		Parameters
+		----------
+		path: str
+			the tablebase file, as written by Tablebase.write
+
+		Return
+		------
+		None
+		"""
+		self.path = path
+		with open(path, "rb") as file:
+			self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, num_of_sections = HEADER.unpack_from(self.data, 0)
+		if magic != MAGIC:
+			raise ValueError(f"{path} is not a Hearts tablebase")
+		self.sections = {}
+		for section_idx in range(num_of_sections):
+			num_of_player, num_of_tricks, num_of_slots, offset = SECTION.unpack_from(self.data, HEADER.size + section_idx*SECTION.size)
+			self.sections[num_of_player] = (num_of_tricks, num_of_slots, offset, KEY.size + num_of_player*(num_of_player+1))
+
+
+	def tricks(self, num_of_player: int) -> int:
+		"""Returns the number of last tricks stored for a number of players, 0 if none"""
+		section = self.sections.get(num_of_player)
+		return section[0] if section is not None else 0
+
+
+	def lookup(self, hands: list[int], leader_idx: int, broken_hearts: bool) -> int:
+		"""Finds the record of a position at the start of a trick
+
+		Parameters
+		----------
+		hands: list[int]
+			hand mask of every seat, in playing order
+		leader_idx: int
+			seat leading the trick
+		broken_hearts: bool
+			indicates whether Hearts have been broken
+
+		Return
+		------
+		int: offset of the scores of the record in the file, -1 if the position is not stored
+		"""
+		section = self.sections.get(len(hands))
+		if section is None:
+			return -1
+		num_of_tricks, num_of_slots, offset, record_size = section
+		key = canonical_key(hands, leader_idx, broken_hearts)
+		slot = key % num_of_slots
+		data = self.data
+		for _ in range(num_of_slots):
+			record = offset + slot*record_size
+			stored = KEY.unpack_from(data, record)[0]
+			if stored == key:
+				return record + KEY.size
+			if stored == 0:
+				return -1
+			slot = slot+1 if slot+1 < num_of_slots else 0
+		return -1
+
+
+	def score(self, record: int, num_of_player: int, seat_offset: int, moon_offset: int) -> int:
+		"""Reads one score of a record found by lookup
+
+		Parameters
+		----------
+		record: int
+			offset returned by lookup
+		num_of_player: int
+			number of players
+		seat_offset: int
+			seat of the score, counted from the leader
+		moon_offset: int
+			seat that alone took every point so far, counted from the leader, or num_of_player once points are split
+
+		Return
+		------
+		int: the score, NO_SCORE if that state of the points cannot happen
+		"""
+		return self.data[record + score_slot(num_of_player, seat_offset, moon_offset)]
+
+
+	def final_scores(self, hands: list[int], leader_idx: int, broken_hearts: bool, points: list[int]) -> list[int]:
+		"""Returns the final round score every seat can guarantee from a position at the start of a trick
+
+		Parameters
+		----------
+		hands: list[int]
+			hand mask of every seat, in playing order
+		leader_idx: int
+			seat leading the trick
+		broken_hearts: bool
+			indicates whether Hearts have been broken
+		points: list[int]
+			penalty points already taken by each seat this round
+
+		Return
+		------
+		list[int]: the paranoid final round score of each seat, None if the position is not stored
+		"""
+		num_of_player = len(hands)
+		if self.tricks(num_of_player) < hands[leader_idx].bit_count():
+			return None
+		moon_idx = -1
+		for seat_idx, seat_points in enumerate(points):
+			if seat_points:
+				moon_idx = seat_idx if moon_idx == -1 else num_of_player
+		if moon_idx == -1:
+			return None
+		record = self.lookup(hands, leader_idx, broken_hearts)
+		if record < 0:
+			return None
+		moon_offset = (moon_idx-leader_idx) % num_of_player if moon_idx < num_of_player else num_of_player
+		scores = []
+		for seat_idx in range(num_of_player):
+			score = self.data[record + score_slot(num_of_player, (seat_idx-leader_idx) % num_of_player, moon_offset)]
+			if score == NO_SCORE:
+				return None
+			scores.append(score + points[seat_idx] if moon_offset == num_of_player else score)
+		return scores
+
+
+	def close(self) -> None:
+		"""Unmaps the file"""
+		self.data.close()
+
+
+	@staticmethod
+	def write(path: str, sections: dict[int, tuple[int, dict[int, bytes]]]) -> None:
+		"""Writes a tablebase file
+
+		Parameters
+		----------
+		path: str
+			file to write
+		sections: dict[int, tuple[int, dict[int, bytes]]]
+			for each number of players, the number of tricks solved and the scores of every key
+
+		Return
+		------
+		None
+		"""
+		offset = HEADER.size + len(sections)*SECTION.size
+		header = [HEADER.pack(MAGIC, len(sections))]
+		tables = []
+		for num_of_player, (num_of_tricks, records) in sorted(sections.items()):
+			# half empty, so probes stay short
+			num_of_slots = max(2*len(records), 1)
+			record_size = KEY.size + num_of_player*(num_of_player+1)
+			table = bytearray(num_of_slots*record_size)
+			for key, scores in records.items():
+				slot = key % num_of_slots
+				while KEY.unpack_from(table, slot*record_size)[0] != 0:
+					slot = (slot+1) % num_of_slots
+				KEY.pack_into(table, slot*record_size, key)
+				table[slot*record_size+KEY.size:(slot+1)*record_size] = scores
+			header.append(SECTION.pack(num_of_player, num_of_tricks, num_of_slots, offset))
+			tables.append(table)
+			offset += len(table)
+		with open(path, "wb") as file:
+			file.write(b"".join(header))
+			for table in tables:
+				file.write(table)
+
+
+_default_tablebase = None
+_default_loaded = False
+
+
+def default_tablebase() -> Tablebase:
+	"""Returns the tablebase at DEFAULT_PATH, mapped on first use, or None if there is no such file
+
+	Set the HEARTS_TABLEBASE environment variable to use another file.
+	"""
+	global _default_tablebase, _default_loaded
+	if not _default_loaded:
+		_default_loaded = True
+		if os.path.exists(DEFAULT_PATH):
+			_default_tablebase = Tablebase(DEFAULT_PATH)
+	return _default_tablebase
@@ -0,0 +1,281 @@
+"""
+Tournament runner for AI-vs-AI matchups.
+
+Games are split into shards and played on a process pool. Each worker sends
+back one small tuple per game, and the runner merges them into per-seat
+statistics and skill ratings. Game k of a run is seeded from the master
+seed and k alone, and results are merged in game order, so they do not depend
+on the sharding and any game can be replayed with --replay k.
+
+Run from the command line, e.g.
+	python tournament.py --seats basic better better better --games 10000
+	python tournament.py --seats basic better montecarlo --ratings ratings.json
+"""
+
+from __future__ import annotations
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from decision_cache import CachedBasicAIPlayer, CachedBetterAIPlayer
+from engine import derive_seed, play_game
+from instrumentation import Instruments
+from monte_carlo_ai import MonteCarloAIPlayer
+from multiprocessing import Pool
+from ratings import RatingTable
+import argparse
+import os
+import random
+import time
+
+STRATEGIES = {
+	"basic": BasicAIPlayer,
+	"better": BetterAIPlayer,
+	"cached-basic": CachedBasicAIPlayer,
+	"cached-better": CachedBetterAIPlayer,
+	"montecarlo": MonteCarloAIPlayer,
+}
+
+
+class TournamentStats:
+	"""A class to represent the merged results of a tournament.
+
+	Attributes
+	----------
+	seats: list[str]
+		the strategy name of each seat
+	master_seed: int
+		seed of the whole tournament
+	games: int
+		number of games merged so far
+	score_sums: list[int]
+		the sum of final total scores of each seat
+	wins: list[int]
+		number of games won by each seat
+	moon_shots: list[int]
+		number of moon shots by each seat
+	ratings: RatingTable
+		the skill rating of each strategy, updated game by game
+
+	Methods
+	-------
+	add_game(self, game: tuple) -> None
+		Merges the compact result of one game
+
+	report(self) -> str
+		Returns a table of the per-seat statistics
+
+	Methods defined here:
+	__init__(self, seats: list[str], master_seed: int, ratings: RatingTable = None) -> None
+		Constructs empty statistics for the seats.
+	"""
+	def __init__(self, seats: list[str], master_seed: int, ratings: RatingTable = None) -> None:
+		"""Constructs all the necessary attributes for the TournamentStats object.
+
+		Parameters
+		----------
+		seats: list[str]
+			the strategy name of each seat
+		master_seed: int
+			seed of the whole tournament
+		ratings: RatingTable
+			ratings carried over from earlier games, updated in place, new ones when None
+
+		Return
+		------
+		None
+		"""
+		self.seats = seats
+		self.master_seed = master_seed
+		self.games = 0
+		self.score_sums = [0]*len(seats)
+		self.wins = [0]*len(seats)
+		self.moon_shots = [0]*len(seats)
+		self.ratings = ratings if ratings is not None else RatingTable()
+
+
+	def add_game(self, game: tuple) -> None:
+		"""Merges the compact result of one game
+
+		Parameters
+		----------
+		game: tuple
+			(total_scores, winner_idx, moon_shots) as sent back by a worker
+
+		Return
+		------
+		None
+		"""
+		total_scores, winner_idx, moon_shots = game
+		self.games += 1
+		self.wins[winner_idx] += 1
+		for seat_idx in range(len(self.seats)):
+			self.score_sums[seat_idx] += total_scores[seat_idx]
+			self.moon_shots[seat_idx] += moon_shots[seat_idx]
+		self.ratings.add_game(self.seats, total_scores)
+
+
+	def report(self) -> str:
+		"""Returns a table of the average score, win rate and moon shots of each seat, then the leaderboard"""
+		lines = [f"{'seat':<6}{'strategy':<10}{'avg score':>12}{'win rate':>10}{'moon shots':>12}"]
+		for seat_idx, seat in enumerate(self.seats):
+			avg_score = self.score_sums[seat_idx] / max(self.games, 1)
+			win_rate = self.wins[seat_idx] / max(self.games, 1)
+			lines.append(f"{seat_idx+1:<6}{seat:<10}{avg_score:>12.2f}{win_rate:>10.1%}{self.moon_shots[seat_idx]:>12}")
+		return "\n".join(lines) + "\n\n" + self.ratings.report()
+
+
+
+def play_shard(seats: list[str], target_score: int, master_seed: int, first_game_idx: int, num_of_games: int) -> list[tuple]:
+	"""Plays a shard of a tournament inside a worker process
+
+	Parameters
+	----------
+	seats: list[str]
+		the strategy name of each seat
+	target_score: int
+		the score that ends each game
+	master_seed: int
+		seed of the whole tournament
+	first_game_idx: int
+		index of the first game of the shard in the tournament
+	num_of_games: int
+		number of games in the shard
+
+	Return
+	------
+	list[tuple]: (total_scores, winner_idx, moon_shots) for every game
+	"""
+	seat_types = [STRATEGIES[seat] for seat in seats]
+	out = []
+	for game_idx in range(first_game_idx, first_game_idx+num_of_games):
+		result = play_game(seat_types, target_score, derive_seed(master_seed, game_idx))
+		out.append((tuple(result.total_scores), result.winner_idx, tuple(result.moon_shots)))
+	return out
+
+
+def play_shard_task(task: tuple) -> list[tuple]:
+	"""Unpacks a (seats, target_score, master_seed, first_game_idx, num_of_games) task for play_shard"""
+	return play_shard(*task)
+
+
+_worker_instruments = None
+
+
+def start_worker_instruments() -> None:
+	"""Installs instruments in a worker process, as the initializer of the pool"""
+	global _worker_instruments
+	_worker_instruments = Instruments()
+	_worker_instruments.install()
+
+
+def play_instrumented_shard_task(task: tuple) -> tuple[list[tuple], Instruments]:
+	"""Plays a shard like play_shard_task, also sending back the phase timings of the shard"""
+	games = play_shard(*task)
+	return (games, _worker_instruments.take())
+
+
+def split_shards(num_of_games: int, shard_size: int) -> list[tuple[int,int]]:
+	"""Splits the games of a tournament into (first_game_idx, num_of_games) shards of at most shard_size games"""
+	return [(first_game_idx, min(shard_size, num_of_games-first_game_idx)) for first_game_idx in range(0, num_of_games, shard_size)]
+
+
+def run_tournament(seats: list[str], num_of_games: int, target_score: int = 100, workers: int = None, shard_size: int = 50, master_seed: int = None, instruments: Instruments = None, ratings: RatingTable = None) -> TournamentStats:
+	"""Plays a tournament across a pool of worker processes
+
+	Parameters
+	----------
+	seats: list[str]
+		the strategy name of each seat, keys of STRATEGIES
+	num_of_games: int
+		number of games to play
+	target_score: int
+		the score that ends each game
+	workers: int
+		number of worker processes, every core when None, no pool when 1
+	shard_size: int
+		number of games each worker plays per task
+	master_seed: int
+		seed of the whole tournament, a fresh one is drawn when None
+	instruments: Instruments
+		merges the phase timings of every game, not timed when None
+	ratings: RatingTable
+		ratings carried over from earlier tournaments, updated in place, new ones when None
+
+	Return
+	------
+	TournamentStats: the merged per-seat statistics
+	"""
+	for seat in seats:
+		if seat not in STRATEGIES:
+			raise ValueError(f"Unknown strategy '{seat}', choose from {', '.join(STRATEGIES)}")
+	if workers is None:
+		workers = os.cpu_count() or 1
+	if master_seed is None:
+		master_seed = random.getrandbits(64)
+	stats = TournamentStats(seats, master_seed, ratings)
+	tasks = [(seats, target_score, master_seed, first_game_idx, shard) for first_game_idx, shard in split_shards(num_of_games, shard_size)]
+
+	if workers == 1:
+		if instruments is not None:
+			instruments.install()
+		try:
+			for task in tasks:
+				for game in play_shard(*task):
+					stats.add_game(game)
+		finally:
+			# a failing game must not leave the timed wrappers on the game classes
+			if instruments is not None:
+				instruments.uninstall()
+	elif instruments is not None:
+		with Pool(workers, initializer=start_worker_instruments) as pool:
+			# in order, as the ratings depend on the order of the games
+			for shard_result, shard_instruments in pool.imap(play_instrumented_shard_task, tasks):
+				for game in shard_result:
+					stats.add_game(game)
+				instruments.merge(shard_instruments)
+	else:
+		with Pool(workers) as pool:
+			for shard_result in pool.imap(play_shard_task, tasks):
+				for game in shard_result:
+					stats.add_game(game)
+	return stats
+
+
+def main() -> None:
+	"""Runs a tournament from the command line and prints the per-seat report"""
+	parser = argparse.ArgumentParser(description="Play AI-vs-AI games of Hearts across every core.")
+	parser.add_argument("--seats", nargs="+", default=["basic", "better", "better", "better"], choices=sorted(STRATEGIES), help="strategy of each seat, 3 to 5 seats")
+	parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+	parser.add_argument("--target-score", type=int, default=100, help="score that ends each game")
+	parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: every core)")
+	parser.add_argument("--shard-size", type=int, default=50, help="games per worker task")
+	parser.add_argument("--seed", type=int, default=None, help="master seed of the tournament (default: random)")
+	parser.add_argument("--replay", type=int, default=None, metavar="GAME_IDX", help="only replay one game of the tournament given by --seed")
+	parser.add_argument("--ratings", default=None, metavar="PATH", help="rate the strategies, carrying the ratings over from PATH if it exists and saving them back to it")
+	parser.add_argument("--instrument", default=None, metavar="PATH", help="time every phase of the games and dump the timings to PATH (.prom for Prometheus text, JSON otherwise)")
+	args = parser.parse_args()
+	if len(args.seats) < 3 or len(args.seats) > 5:
+		parser.error("Hearts needs 3 to 5 seats")
+
+	if args.replay is not None:
+		if args.seed is None:
+			parser.error("--replay needs the --seed of the tournament")
+		print(play_game([STRATEGIES[seat] for seat in args.seats], args.target_score, derive_seed(args.seed, args.replay)))
+		return
+
+	instruments = Instruments() if args.instrument is not None else None
+	ratings = RatingTable.load(args.ratings) if args.ratings is not None and os.path.exists(args.ratings) else None
+	start = time.perf_counter()
+	stats = run_tournament(args.seats, args.games, args.target_score, args.workers, args.shard_size, args.seed, instruments, ratings)
+	elapsed = time.perf_counter() - start
+	print(stats.report())
+	print(f"{stats.games} games in {elapsed:.1f}s ({stats.games/elapsed:.1f} games/sec), seed {stats.master_seed}")
+	if args.ratings is not None:
+		stats.ratings.save(args.ratings)
+	if instruments is not None:
+		instruments.dump(args.instrument)
+		print(f"phase timings written to {args.instrument}")
+
+
+
+if __name__ == "__main__":
+	main()